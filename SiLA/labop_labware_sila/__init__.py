@@ -1,8 +1,12 @@
 # Generated by sila2.code_generator; sila2.__version__: 0.10.1
+from .async_client import AsyncClient
+from .caching_client import CachingClient
 from .generated import Client
 from .server import Server
 
 __all__ = [
+    "AsyncClient",
+    "CachingClient",
     "Client",
     "Server",
 ]
@@ -1,14 +1,22 @@
 # Generated by sila2.code_generator; sila2.__version__: 0.10.1
 import logging
+import os
 import signal
-from typing import Optional
-from uuid import UUID
+import sys
+import tempfile
+from typing import Callable, Dict, List, Optional
+from uuid import UUID, uuid4
 
 import typer
+from labop_labware_ontology.metrics import serve_metrics
+from labop_labware_ontology.snapshot import compile_snapshot, open_snapshot
 from sila2.framework.utils import running_in_docker
+from sila2.server.encryption import generate_self_signed_certificate
 from typer import BadParameter, Option
 
+from .admission import DEFAULT_LIMITS, SWITCH_INTERVAL, AdmissionLimit
 from .server import Server
+from .workers import WRITER, run_workers
 
 logger = logging.getLogger(__name__)
 
@@ -35,6 +43,52 @@ def main(
     ca_export_file: Optional[str] = Option(
         None, help="When using a self-signed certificate, write the generated CA to this file"
     ),
+    ontology: List[str] = Option(
+        [], "-o", "--ontology", help="Ontology source file (N-Triples, other formats need rdflib), can be repeated"
+    ),
+    snapshot: Optional[str] = Option(
+        None,
+        "-s",
+        "--snapshot",
+        help="Compiled ontology snapshot, rebuilt from the ontology sources if it is missing or stale",
+    ),
+    wal: Optional[str] = Option(
+        None,
+        "-w",
+        "--wal",
+        help="Write-ahead log of the created labware, replayed on start (checkpoints go into the snapshot)",
+    ),
+    checkpoint_interval: float = Option(
+        300.0, "--checkpoint-interval", help="Seconds between two checkpoints of the write-ahead log"
+    ),
+    query_timeout: float = Option(
+        30.0, "--query-timeout", help="Default time limit of a SPARQL query in seconds (0: no limit)"
+    ),
+    query_row_budget: int = Option(
+        10_000_000,
+        "--query-row-budget",
+        help="Maximal number of intermediate results of a SPARQL query (0: no limit)",
+    ),
+    admission: List[str] = Option(
+        [],
+        "--admission",
+        help="Limits of a call class (automation, write, query) as CLASS=CONCURRENCY:QUEUE_SIZE, can be repeated",
+    ),
+    metrics_port: int = Option(
+        0,
+        "--metrics-port",
+        help="Serve the metrics in the Prometheus text format at http://127.0.0.1:PORT/metrics (0: disabled), "
+        "with --workers worker N at PORT+N",
+    ),
+    workers: int = Option(
+        1,
+        "--workers",
+        help="Number of server processes sharing the port and the snapshot (requires --snapshot), "
+        "the first one handles all writes",
+    ),
+    compile_only: bool = Option(
+        False, "--compile-only", help="Compile the ontology sources into the snapshot and exit without serving"
+    ),
     quiet: bool = Option(False, "--quiet", help="Only log errors"),
     verbose: bool = Option(False, "--verbose", help="Enable verbose logging"),
     debug: bool = Option(False, "--debug", help="Enable debug logging"),
@@ -46,6 +100,13 @@ def main(
         raise BadParameter("Either provide both --private-key-file and --cert-file, or none of them")
     if insecure and ca_export_file is not None:
         raise BadParameter("Cannot use --export-ca-file with --insecure")
+    if compile_only and snapshot is None:
+        raise BadParameter("--compile-only requires --snapshot")
+    admission_limits = parse_admission_limits(admission)
+    if workers < 1:
+        raise BadParameter("--workers must be at least 1")
+    if workers > 1 and snapshot is None:
+        raise BadParameter("--workers requires --snapshot")
 
     # prepare server parameters
     cert = open(cert_file, "rb").read() if cert_file is not None else None
@@ -56,18 +117,128 @@ def main(
     # logging setup
     initialize_logging(quiet=quiet, verbose=verbose, debug=debug)
 
-    # run server
-    server = Server(server_uuid=parsed_server_uuid)
+    if compile_only:
+        compile_snapshot(ontology, snapshot)
+        logger.info(f"Compiled {len(ontology)} ontology sources into '{snapshot}'")
+        return
+
+    # lookups wait less for the GIL while queries compute (see admission)
+    sys.setswitchinterval(SWITCH_INTERVAL)
+
+    if workers > 1:
+        # compile a missing or stale snapshot once, the workers only map it
+        open_snapshot(ontology, snapshot)
+        # all workers are one SiLA server: same UUID and certificate
+        parsed_server_uuid = parsed_server_uuid or uuid4()
+        if not insecure and cert is None:
+            private_key, cert = generate_self_signed_certificate(parsed_server_uuid, ip_address)
+            ca_for_discovery = ca_for_discovery or cert
+            if ca_export_file is not None:
+                with open(ca_export_file, "wb") as fp:
+                    fp.write(cert)
+                logger.info(f"Wrote generated CA to '{ca_export_file}'")
+                ca_export_file = None
+        replication_directory = tempfile.TemporaryDirectory(prefix="labware-")
+        replication_address = os.path.join(replication_directory.name, "writer.sock")
+        replication_key = os.urandom(32)
+
+        def serve_worker(number: int, started: Callable[[], None]) -> None:
+            writer = number == WRITER
+            server = Server(
+                server_uuid=parsed_server_uuid,
+                ontology_sources=ontology if writer else (),
+                snapshot_path=snapshot,
+                wal_path=wal if writer else None,
+                checkpoint_interval=checkpoint_interval,
+                writer_address=None if writer else replication_address,
+                replica_address=replication_address if writer else None,
+                replication_key=replication_key,
+                query_timeout=query_timeout or None,
+                query_row_budget=query_row_budget or None,
+                admission_limits=admission_limits,
+            )
+            # only the writer announces the server via SiLA Server Discovery
+            run_server(
+                server,
+                ip_address,
+                port,
+                insecure,
+                cert,
+                private_key,
+                not disable_discovery and writer,
+                ca_for_discovery,
+                ca_export_file,
+                started,
+                metrics_port + number if metrics_port else 0,
+            )
+
+        with replication_directory:
+            sys.exit(run_workers(workers, serve_worker))
+
+    server = Server(
+        server_uuid=parsed_server_uuid,
+        ontology_sources=ontology,
+        snapshot_path=snapshot,
+        wal_path=wal,
+        checkpoint_interval=checkpoint_interval,
+        query_timeout=query_timeout or None,
+        query_row_budget=query_row_budget or None,
+        admission_limits=admission_limits,
+    )
+    run_server(
+        server,
+        ip_address,
+        port,
+        insecure,
+        cert,
+        private_key,
+        not disable_discovery,
+        ca_for_discovery,
+        ca_export_file,
+        metrics_port=metrics_port,
+    )
+
+
+def parse_admission_limits(options: List[str]) -> Dict[str, AdmissionLimit]:
+    """admission limits from CLASS=CONCURRENCY:QUEUE_SIZE options"""
+    limits = {}
+    for option in options:
+        name, _, value = option.partition("=")
+        concurrency, _, queue_size = value.partition(":")
+        if name not in DEFAULT_LIMITS or not concurrency.isdigit() or not queue_size.isdigit() or int(concurrency) < 1:
+            raise BadParameter(f"invalid admission limit '{option}', expected CLASS=CONCURRENCY:QUEUE_SIZE")
+        limits[name] = AdmissionLimit(int(concurrency), int(queue_size))
+    return limits
+
+
+def run_server(
+    server: Server,
+    ip_address: str,
+    port: int,
+    insecure: bool,
+    cert: Optional[bytes],
+    private_key: Optional[bytes],
+    enable_discovery: bool,
+    ca_for_discovery: Optional[bytes],
+    ca_export_file: Optional[str],
+    started: Callable[[], None] = lambda: None,
+    metrics_port: int = 0,
+) -> None:
+    """starts the server and serves until it is stopped (SIGTERM, Ctrl-C)"""
+    metrics_endpoint = None
     try:
+        if metrics_port:
+            metrics_endpoint = serve_metrics(server.metrics, "127.0.0.1", metrics_port)
+            logger.info(f"Serving metrics at http://127.0.0.1:{metrics_port}/metrics")
         if insecure:
-            server.start_insecure(ip_address, port, enable_discovery=not disable_discovery)
+            server.start_insecure(ip_address, port, enable_discovery=enable_discovery)
         else:
             server.start(
                 ip_address,
                 port,
                 cert_chain=cert,
                 private_key=private_key,
-                enable_discovery=not disable_discovery,
+                enable_discovery=enable_discovery,
                 ca_for_discovery=ca_for_discovery,
             )
             if ca_export_file is not None:
@@ -75,6 +246,7 @@ def main(
                     fp.write(server.generated_ca)
                 logger.info(f"Wrote generated CA to '{ca_export_file}'")
         logger.info("Server startup complete")
+        started()
 
         signal.signal(signal.SIGTERM, lambda *args: server.stop())
 
@@ -83,6 +255,8 @@ def main(
         except KeyboardInterrupt:
             pass
     finally:
+        if metrics_endpoint is not None:
+            metrics_endpoint.shutdown()
         if server.running:
             server.stop()
         logger.info("Server shutdown complete")
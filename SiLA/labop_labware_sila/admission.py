@@ -0,0 +1,109 @@
+"""Admission control: bounded concurrency and queueing per class of calls
+
+All calls run in the threads of the gRPC thread pool of the server. Without admission control
+a flood of expensive calls (ad-hoc SPARQL queries) occupies all threads, and the latency of the
+cheap, latency-critical calls (labware lookups of robots) grows without bound.
+
+Every call is admitted in its class: at most `concurrency` calls of a class execute at the same time,
+at most `queue_size` more wait in arrival order, further calls are rejected right away (load shedding).
+The limits of all classes together stay below the size of the gRPC thread pool,
+so a call of one class always finds a thread.
+
+The executing calls still share the GIL: a lookup releases and reacquires it several times
+(network I/O, (de)serialization), each time waiting up to the switch interval while queries compute.
+The server shortens the switch interval to SWITCH_INTERVAL, so waiting lookups get the GIL sooner.
+"""
+
+from collections import deque
+from contextlib import contextmanager
+from threading import Event, Lock
+from typing import Deque, Dict, Iterator, NamedTuple, Type
+
+AUTOMATION = "automation"
+WRITE = "write"
+QUERY = "query"
+
+
+class AdmissionLimit(NamedTuple):
+    concurrency: int  # calls executing at the same time
+    queue_size: int  # calls waiting for a free slot
+
+
+DEFAULT_LIMITS = {
+    AUTOMATION: AdmissionLimit(concurrency=16, queue_size=32),
+    WRITE: AdmissionLimit(concurrency=2, queue_size=14),
+    # per process, with --workers the queries of N processes run in parallel
+    QUERY: AdmissionLimit(concurrency=2, queue_size=14),
+}
+
+# seconds, the default of 5 ms lets few CPU-bound queries delay a lookup by 100s of ms
+SWITCH_INTERVAL = 0.0005
+
+
+class _ClassState:
+    def __init__(self, limit: AdmissionLimit) -> None:
+        self.limit = limit
+        self.running = 0
+        self.waiting: Deque[Event] = deque()
+        self.admitted = 0
+        self.rejected = 0
+
+
+class AdmissionController:
+    def __init__(self, limits: Dict[str, AdmissionLimit]) -> None:
+        """Admission of calls by class
+
+        :param limits: concurrency and queue limits per class
+        """
+        self.limits = dict(limits)
+        self._classes = {name: _ClassState(limit) for name, limit in limits.items()}
+        self._lock = Lock()
+
+    @property
+    def capacity(self) -> int:
+        """number of calls that can hold a thread at the same time (executing or waiting)"""
+        return sum(limit.concurrency + limit.queue_size for limit in self.limits.values())
+
+    @contextmanager
+    def admit(self, name: str, busy_error: Type[Exception]) -> Iterator[None]:
+        """executes the body as call of a class, waits for a free slot if all are taken
+
+        :param name: the class of the call
+        :param busy_error: exception raised (with a message) if the queue of the class is full
+        """
+        state = self._classes[name]
+        ticket = None
+        with self._lock:
+            if state.running < state.limit.concurrency and not state.waiting:
+                state.running += 1
+            elif len(state.waiting) >= state.limit.queue_size:
+                state.rejected += 1
+                raise busy_error(f"The server is busy: too many {name} calls, retry later.")
+            else:
+                ticket = Event()
+                state.waiting.append(ticket)
+            state.admitted += 1
+        if ticket is not None:
+            # a finishing call hands its slot over
+            ticket.wait()
+        try:
+            yield
+        finally:
+            with self._lock:
+                if state.waiting:
+                    state.waiting.popleft().set()
+                else:
+                    state.running -= 1
+
+    def stats(self) -> Dict[str, Dict[str, int]]:
+        """running, waiting, admitted and rejected calls per class"""
+        with self._lock:
+            return {
+                name: {
+                    "running": state.running,
+                    "waiting": len(state.waiting),
+                    "admitted": state.admitted,
+                    "rejected": state.rejected,
+                }
+                for name, state in self._classes.items()
+            }
@@ -0,0 +1,246 @@
+"""asyncio client: the features of the server on a gRPC asyncio channel (grpc.aio)
+
+The generated Client blocks a thread per outstanding call. AsyncClient has the same features,
+commands, properties and metadata, but every call is a coroutine, so one event loop resolves the labware
+of many runs at once::
+
+    async with AsyncClient("127.0.0.1", 50052, insecure=True) as client:
+        responses = await asyncio.gather(
+            *(client.LabwareAutomationService.GetLabwareDimensions(vendor, product) for vendor, product in keys)
+        )
+        service = client.LabwareQueryService
+        instance = await service.SPARQLQueryStream(query, metadata=[service.QueryTimeout(0)])
+        async for chunk in instance:
+            ...
+        row_count = (await instance.result()).RowCount
+
+Starting an observable command subscribes to its intermediate responses right away
+(like in SiLA, intermediate responses sent before the subscription are not repeated).
+Errors are raised as by the generated Client (e.g. UnknownLabware, ServerBusy).
+
+sila2 has no asyncio client, the classes here are built from the sila2 feature definitions.
+The attributes of sila2 that are not public are only read in the "sila2 internals" helpers below.
+"""
+
+import asyncio
+from types import ModuleType
+from typing import Any, AsyncIterator, Dict, Iterable, NamedTuple, Optional, Union
+
+import grpc
+from sila2.client.client_metadata import ClientMetadataInstance
+from sila2.client.utils import get_allowed_errors, pack_metadata_for_grpc, rpcerror_to_silaerror
+from sila2.framework import Command, Feature, Property
+
+from .generated import labwareautomationservice, labwaremetricsservice, labwareontologyservice, labwarequeryservice
+
+# the features and the generated modules with the classes of their defined execution errors
+FEATURES = (
+    (labwareautomationservice.LabwareAutomationServiceFeature, labwareautomationservice),
+    (labwaremetricsservice.LabwareMetricsServiceFeature, labwaremetricsservice),
+    (labwareontologyservice.LabwareOntologyServiceFeature, labwareontologyservice),
+    (labwarequeryservice.LabwareQueryServiceFeature, labwarequeryservice),
+)
+
+
+# sila2 internals ---------------------------------------------------------
+# Written against sila2 0.10.1 (the version of the code generator of this package): these helpers and
+# the two lookup tables of AsyncClient (read by sila2.client.utils.rpcerror_to_silaerror) are the only
+# places depending on attributes of sila2 that are not public - check them when updating sila2.
+
+
+class _FeatureInternals(NamedTuple):
+    identifier: str
+    pb2_module: ModuleType  # protobuf messages
+    grpc_module: ModuleType  # gRPC stub
+    unobservable_commands: Dict[str, Command]
+    observable_commands: Dict[str, Command]
+    unobservable_properties: Dict[str, Property]
+
+
+def _feature_internals(feature: Feature) -> _FeatureInternals:
+    """the generated modules and the elements of a feature"""
+    return _FeatureInternals(
+        feature._identifier,
+        feature._pb2_module,
+        feature._grpc_module,
+        feature._unobservable_commands,
+        feature._observable_commands,
+        feature._unobservable_properties,
+    )
+
+
+def _identifier(element: Union[Command, Property]) -> str:
+    """the identifier of a command or property, the name of its RPC"""
+    return element._identifier
+
+
+# -------------------------------------------------------------------------
+
+
+class _AsyncCall:
+    def __init__(self, feature: "AsyncFeatureClient") -> None:
+        self._feature = feature
+
+    async def _call(
+        self, method: str, message: Any, metadata: Optional[Iterable[ClientMetadataInstance]], origin: Any
+    ) -> Any:
+        try:
+            return await getattr(self._feature._stub, method)(message, metadata=pack_metadata_for_grpc(metadata))
+        except grpc.RpcError as error:
+            raise rpcerror_to_silaerror(error, get_allowed_errors(origin, metadata), self._feature._client) from None
+
+
+class AsyncUnobservableCommand(_AsyncCall):
+    def __init__(self, feature: "AsyncFeatureClient", command: Command) -> None:
+        super().__init__(feature)
+        self._command = command
+
+    async def __call__(self, *args, metadata: Optional[Iterable[ClientMetadataInstance]] = None, **kwargs) -> Any:
+        """executes the command, returns its responses"""
+        command = self._command
+        message = command.parameters.to_message(*args, **kwargs, toplevel_named_data_node=command.parameters)
+        responses = await self._call(_identifier(command), message, metadata, command)
+        return command.responses.to_native_type(responses)
+
+
+class AsyncObservableCommandInstance(_AsyncCall):
+    def __init__(self, feature: "AsyncFeatureClient", command: Command, execution_uuid: str) -> None:
+        """a running observable command, async iteration gives its intermediate responses"""
+        super().__init__(feature)
+        self._command = command
+        self.execution_uuid = execution_uuid
+        self._uuid_message = feature._pb2.SiLAFramework__pb2.CommandExecutionUUID(value=execution_uuid)
+        self._intermediate = None
+        if command.intermediate_responses is not None:
+            # the stream starts now, not on the first iteration
+            self._intermediate = getattr(feature._stub, f"{_identifier(command)}_Intermediate")(self._uuid_message)
+
+    async def __aiter__(self) -> AsyncIterator[Any]:
+        if self._intermediate is None:
+            raise TypeError(f"{_identifier(self._command)} has no intermediate responses")
+        try:
+            async for message in self._intermediate:
+                yield self._command.intermediate_responses.to_native_type(message)
+        except grpc.RpcError as error:
+            raise rpcerror_to_silaerror(error, get_allowed_errors(self._command, None), self._feature._client) from None
+
+    async def result(self) -> Any:
+        """waits until the command finished, returns its responses"""
+        identifier = _identifier(self._command)
+        info = getattr(self._feature._stub, f"{identifier}_Info")(self._uuid_message)
+        try:
+            # the execution info stream ends when the command finished
+            async for _ in info:
+                pass
+        except grpc.RpcError as error:
+            raise rpcerror_to_silaerror(error, [], self._feature._client) from None
+        responses = await self._call(f"{identifier}_Result", self._uuid_message, None, self._command)
+        return self._command.responses.to_native_type(responses)
+
+    def cancel(self) -> None:
+        """stops receiving intermediate responses"""
+        if self._intermediate is not None:
+            self._intermediate.cancel()
+
+
+class AsyncObservableCommand(_AsyncCall):
+    def __init__(self, feature: "AsyncFeatureClient", command: Command) -> None:
+        super().__init__(feature)
+        self._command = command
+
+    async def __call__(
+        self, *args, metadata: Optional[Iterable[ClientMetadataInstance]] = None, **kwargs
+    ) -> AsyncObservableCommandInstance:
+        """starts the command"""
+        command = self._command
+        message = command.parameters.to_message(*args, **kwargs, toplevel_named_data_node=command.parameters)
+        confirmation = await self._call(_identifier(command), message, metadata, command)
+        return AsyncObservableCommandInstance(self._feature, command, confirmation.commandExecutionUUID.value)
+
+
+class AsyncUnobservableProperty(_AsyncCall):
+    def __init__(self, feature: "AsyncFeatureClient", prop: Property) -> None:
+        super().__init__(feature)
+        self._property = prop
+
+    async def get(self, *, metadata: Optional[Iterable[ClientMetadataInstance]] = None) -> Any:
+        """reads the current value"""
+        prop = self._property
+        message = prop.get_parameters_message()
+        response = await self._call(f"Get_{_identifier(prop)}", message, metadata, prop)
+        return prop.to_native_type(response)
+
+
+class AsyncFeatureClient:
+    def __init__(self, client: "AsyncClient", feature: Feature) -> None:
+        """the commands, properties and metadata of a feature as attributes"""
+        internals = _feature_internals(feature)
+        self._client = client
+        self._pb2 = internals.pb2_module
+        self._stub = getattr(internals.grpc_module, f"{internals.identifier}Stub")(client._channel)
+        for identifier, command in internals.unobservable_commands.items():
+            setattr(self, identifier, AsyncUnobservableCommand(self, command))
+        for identifier, command in internals.observable_commands.items():
+            setattr(self, identifier, AsyncObservableCommand(self, command))
+        for identifier, prop in internals.unobservable_properties.items():
+            setattr(self, identifier, AsyncUnobservableProperty(self, prop))
+        for identifier, metadata in feature.metadata_definitions.items():
+            setattr(self, identifier, lambda value, metadata=metadata: ClientMetadataInstance(metadata, value))
+
+
+class AsyncClient:
+    LabwareAutomationService: AsyncFeatureClient
+    LabwareMetricsService: AsyncFeatureClient
+    LabwareOntologyService: AsyncFeatureClient
+    LabwareQueryService: AsyncFeatureClient
+
+    def __init__(
+        self,
+        address: str,
+        port: int,
+        *,
+        insecure: bool = False,
+        root_certs: Optional[bytes] = None,
+        private_key: Optional[bytes] = None,
+        cert_chain: Optional[bytes] = None,
+    ) -> None:
+        """client of a server on a gRPC asyncio channel, create it in the event loop it is used in
+
+        :param address: IP address or host name of the server
+        :param port: port of the server
+        :param insecure: connect without encryption
+        :param root_certs: PEM-encoded CA certificate(s) of the server, default: the system CAs
+        :param private_key: PEM-encoded private key of the client (mutual TLS)
+        :param cert_chain: PEM-encoded certificate chain of the client (mutual TLS)
+        """
+        target = f"{address}:{port}"
+        if insecure:
+            self._channel = grpc.aio.insecure_channel(target)
+        else:
+            credentials = grpc.ssl_channel_credentials(root_certs, private_key, cert_chain)
+            self._channel = grpc.aio.secure_channel(target, credentials)
+        # looked up by rpcerror_to_silaerror, like in the generated Client
+        self._children_by_fully_qualified_identifier: Dict[Any, Any] = {}
+        self._registered_defined_execution_error_classes: Dict[Any, type] = {}
+        for feature, module in FEATURES:
+            self._add_feature(feature, module)
+
+    def _add_feature(self, feature: Feature, module: ModuleType) -> None:
+        self._children_by_fully_qualified_identifier[feature.fully_qualified_identifier] = feature
+        self._children_by_fully_qualified_identifier.update(feature.children_by_fully_qualified_identifier)
+        for name, error in feature.defined_execution_errors.items():
+            self._registered_defined_execution_error_classes[error.fully_qualified_identifier] = getattr(module, name)
+        setattr(self, _feature_internals(feature).identifier, AsyncFeatureClient(self, feature))
+
+    async def close(self) -> None:
+        await self._channel.close()
+
+    async def __aenter__(self) -> "AsyncClient":
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        await self.close()
+
+    async def wait_for_ready(self, timeout: Optional[float] = None) -> None:
+        """waits until the channel is connected"""
+        await asyncio.wait_for(self._channel.channel_ready(), timeout)
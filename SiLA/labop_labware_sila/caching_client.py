@@ -0,0 +1,162 @@
+"""Caching client: labware dimensions are answered from a local cache, without a call to the server
+
+Labware dimensions practically never change, but instruments look them up again and again
+while executing methods. CachingClient is a drop-in replacement for the generated Client:
+GetLabwareDimensions and GetLabwareDimensionsBatch of the LabwareAutomationService are answered
+from a bounded LRU cache, everything else is passed through.
+
+Cached entries expire after their TTL. Before answering from the cache, the client checks at most
+every `validate_interval` seconds whether the catalog of the server changed (the CatalogVersion property,
+one cheap call): if it did, the whole cache is dropped. Unknown labware is not cached.
+"""
+
+import time
+from collections import OrderedDict
+from threading import Lock
+from typing import Any, Callable, Iterable, List, NamedTuple, Optional, Tuple
+
+from labop_labware_ontology.labware_index import LabwareKey, normalize_key
+
+from .generated.client import Client
+from .generated.labwareautomationservice import GetLabwareDimensions_Responses, GetLabwareDimensionsBatch_Responses
+
+
+class LabwareDimensionsResult(NamedTuple):
+    """an item of the GetLabwareDimensionsBatch response"""
+
+    Found: bool
+    Dimensions: str
+
+
+class DimensionsCache:
+    def __init__(self, max_size: int, ttl: Optional[float], clock: Callable[[], float] = time.monotonic) -> None:
+        """dimensions (as JSON) by labware key, the least recently used entries are evicted first
+
+        :param max_size: maximal number of entries
+        :param ttl: seconds an entry is valid, None: until the cache is cleared
+        :param clock: current time in seconds, for the TTL and the validation interval
+        """
+        self.max_size = max_size
+        self.ttl = ttl
+        self.clock = clock
+        self._entries: "OrderedDict[LabwareKey, Tuple[float, str]]" = OrderedDict()
+        self._lock = Lock()
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: LabwareKey) -> Optional[str]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or (self.ttl is not None and entry[0] < self.clock()):
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def put(self, key: LabwareKey, dimensions: str) -> None:
+        expires = self.clock() + self.ttl if self.ttl is not None else 0.0
+        with self._lock:
+            self._entries[key] = (expires, dimensions)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self.invalidations += 1
+
+
+class CachingLabwareAutomationServiceClient:
+    def __init__(self, service: Any, cache: DimensionsCache, validate_interval: Optional[float]) -> None:
+        """LabwareAutomationService client answering dimension lookups from the cache
+
+        :param service: the LabwareAutomationService client of the generated Client
+        :param cache: cache of the dimensions
+        :param validate_interval: seconds between two checks of the catalog version, None: only expire by TTL
+        """
+        self._service = service
+        self.cache = cache
+        self.validate_interval = validate_interval
+        self._catalog_version: Optional[str] = None
+        self._validated = -float("inf")
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._service, name)
+
+    def validate(self) -> None:
+        """drops the cache if the catalog of the server changed since the last check"""
+        version = self._service.CatalogVersion.get()
+        if version != self._catalog_version:
+            if self._catalog_version is not None:
+                # entries fetched meanwhile may already be newer, dropping them is only conservative
+                self.cache.clear()
+            self._catalog_version = version
+        self._validated = self.cache.clock()
+
+    def _validate_if_due(self) -> None:
+        if self.validate_interval is not None and self.cache.clock() - self._validated >= self.validate_interval:
+            self.validate()
+
+    def GetLabwareDimensions(
+        self, Vendor: str, ProductNumber: str, *, metadata: Optional[Iterable[Any]] = None
+    ) -> GetLabwareDimensions_Responses:
+        if metadata is not None:
+            return self._service.GetLabwareDimensions(Vendor, ProductNumber, metadata=metadata)
+        self._validate_if_due()
+        key = normalize_key(Vendor, ProductNumber)
+        dimensions = self.cache.get(key)
+        if dimensions is None:
+            dimensions = self._service.GetLabwareDimensions(Vendor, ProductNumber).Dimensions
+            self.cache.put(key, dimensions)
+        return GetLabwareDimensions_Responses(Dimensions=dimensions)
+
+    def GetLabwareDimensionsBatch(
+        self, Labware: List[Any], *, metadata: Optional[Iterable[Any]] = None
+    ) -> GetLabwareDimensionsBatch_Responses:
+        if metadata is not None:
+            return self._service.GetLabwareDimensionsBatch(Labware, metadata=metadata)
+        self._validate_if_due()
+        results: List[Optional[LabwareDimensionsResult]] = []
+        missing: List[int] = []
+        for vendor, product_number in Labware:
+            dimensions = self.cache.get(normalize_key(vendor, product_number))
+            if dimensions is None:
+                missing.append(len(results))
+            results.append(None if dimensions is None else LabwareDimensionsResult(True, dimensions))
+        if missing:
+            # one call for all labware not in the cache
+            response = self._service.GetLabwareDimensionsBatch([tuple(Labware[index]) for index in missing])
+            for index, (found, dimensions) in zip(missing, response.Dimensions):
+                results[index] = LabwareDimensionsResult(found, dimensions)
+                if found:
+                    self.cache.put(normalize_key(*Labware[index]), dimensions)
+        return GetLabwareDimensionsBatch_Responses(Dimensions=results)
+
+
+class CachingClient(Client):
+    def __init__(
+        self,
+        *args,
+        cache_size: int = 10_000,
+        ttl: Optional[float] = 3600.0,
+        validate_interval: Optional[float] = 1.0,
+        **kwargs,
+    ) -> None:
+        """the generated Client, with labware dimensions cached (see caching_client)
+
+        :param cache_size: maximal number of cached labware
+        :param ttl: seconds a cached entry is used, None: until the catalog changes
+        :param validate_interval: seconds between two checks of the catalog version of the server,
+            0: before every lookup answered from the cache, None: never (entries only expire)
+        """
+        super().__init__(*args, **kwargs)
+        self.dimensions_cache = DimensionsCache(cache_size, ttl)
+        self.LabwareAutomationService = CachingLabwareAutomationServiceClient(
+            self.LabwareAutomationService, self.dimensions_cache, validate_interval
+        )
@@ -1,11 +1,22 @@
 # Generated by sila2.code_generator; sila2.__version__: 0.10.1
 from __future__ import annotations
 
-from typing import TYPE_CHECKING
+import json
+from typing import TYPE_CHECKING, List
 
+from labop_labware_ontology.labware_service import UnknownLabwareError
 from sila2.server import MetadataDict
 
-from ..generated.labwareautomationservice import GetLabwareDimensions_Responses, LabwareAutomationServiceBase
+from ..admission import AUTOMATION
+from ..generated.labwareautomationservice import (
+    GetLabwareDimensions_Responses,
+    GetLabwareDimensionsBatch_Responses,
+    LabwareAutomationServiceBase,
+    LabwareDimensions,
+    LabwareKey,
+    ServerBusy,
+    UnknownLabware,
+)
 
 if TYPE_CHECKING:
     from ..server import Server
@@ -15,7 +26,25 @@ class LabwareAutomationServiceImpl(LabwareAutomationServiceBase):
     def __init__(self, parent_server: Server) -> None:
         super().__init__(parent_server=parent_server)
 
+    def get_CatalogVersion(self, *, metadata: MetadataDict) -> str:
+        return self.parent_server.catalog_version()
+
     def GetLabwareDimensions(
         self, Vendor: str, ProductNumber: str, *, metadata: MetadataDict
     ) -> GetLabwareDimensions_Responses:
-        raise NotImplementedError  # TODO
+        with self.parent_server.admission.admit(AUTOMATION, ServerBusy):
+            try:
+                dimensions = self.parent_server.service.dimensions(Vendor, ProductNumber)
+            except UnknownLabwareError as error:
+                raise UnknownLabware(str(error))
+            return GetLabwareDimensions_Responses(Dimensions=json.dumps(dimensions))
+
+    def GetLabwareDimensionsBatch(
+        self, Labware: List[LabwareKey], *, metadata: MetadataDict
+    ) -> GetLabwareDimensionsBatch_Responses:
+        with self.parent_server.admission.admit(AUTOMATION, ServerBusy):
+            dimensions = self.parent_server.service.dimensions_batch((key.Vendor, key.ProductNumber) for key in Labware)
+            results: List[LabwareDimensions] = [
+                (False, "") if record is None else (True, json.dumps(record)) for record in dimensions
+            ]
+            return GetLabwareDimensionsBatch_Responses(Dimensions=results)
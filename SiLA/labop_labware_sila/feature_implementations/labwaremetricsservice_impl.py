@@ -0,0 +1,19 @@
+# Generated by sila2.code_generator; sila2.__version__: 0.10.1
+from __future__ import annotations
+
+from typing import TYPE_CHECKING
+
+from sila2.server import MetadataDict
+
+from ..generated.labwaremetricsservice import LabwareMetricsServiceBase
+
+if TYPE_CHECKING:
+    from ..server import Server
+
+
+class LabwareMetricsServiceImpl(LabwareMetricsServiceBase):
+    def __init__(self, parent_server: Server) -> None:
+        super().__init__(parent_server=parent_server)
+
+    def get_Metrics(self, *, metadata: MetadataDict) -> str:
+        return self.parent_server.metrics.render()
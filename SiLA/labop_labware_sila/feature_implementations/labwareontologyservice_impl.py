@@ -1,19 +1,69 @@
 # Generated by sila2.code_generator; sila2.__version__: 0.10.1
 from __future__ import annotations
 
-from typing import TYPE_CHECKING
+import json
+from typing import TYPE_CHECKING, List, Optional
 
+from labop_labware_ontology.labware_batch import LabwareDefinition as Definition
 from sila2.server import MetadataDict
 
-from ..generated.labwareontologyservice import CreateLabware_Responses, LabwareOntologyServiceBase
+from ..admission import WRITE
+from ..generated.labwareontologyservice import (
+    CreateLabware_Responses,
+    CreateLabwareBatch_Responses,
+    CreateLabwareResult,
+    LabwareDefinition,
+    LabwareOntologyServiceBase,
+    ServerBusy,
+)
 
 if TYPE_CHECKING:
     from ..server import Server
 
 
+def _reject_constant(name: str) -> float:
+    """JSON parse_constant: NaN and Infinity are no valid dimensions"""
+    raise ValueError(f"{name} is not a number")
+
+
 class LabwareOntologyServiceImpl(LabwareOntologyServiceBase):
     def __init__(self, parent_server: Server) -> None:
         super().__init__(parent_server=parent_server)
 
     def CreateLabware(self, Name: str, *, metadata: MetadataDict) -> CreateLabware_Responses:
-        raise NotImplementedError  # TODO
+        with self.parent_server.admission.admit(WRITE, ServerBusy):
+            self.parent_server.create_labware(Name)
+        return CreateLabware_Responses()
+
+    def CreateLabwareBatch(
+        self, Labware: List[LabwareDefinition], *, metadata: MetadataDict
+    ) -> CreateLabwareBatch_Responses:
+        definitions: List[Optional[Definition]] = []
+        errors: List[Optional[str]] = []
+        for item in Labware:
+            try:
+                dimensions = (
+                    json.loads(item.Dimensions, parse_constant=_reject_constant) if item.Dimensions.strip() else None
+                )
+                if dimensions is not None and not isinstance(dimensions, dict):
+                    raise ValueError("no JSON object")
+            except ValueError as error:
+                definitions.append(None)
+                errors.append(f"invalid dimensions: {error}")
+                continue
+            definitions.append(Definition(item.Name, item.Vendor, item.ProductNumber, dimensions))
+            errors.append(None)
+
+        # one store update for the whole batch, the indexes are merged once
+        with self.parent_server.admission.admit(WRITE, ServerBusy):
+            batch_errors = iter(
+                self.parent_server.create_labware_batch(
+                    [definition for definition in definitions if definition is not None]
+                )
+            )
+        results: List[CreateLabwareResult] = []
+        for item, definition, error in zip(Labware, definitions, errors):
+            if definition is not None:
+                error = next(batch_errors)
+            results.append((item.Name, error is None, error or ""))
+        return CreateLabwareBatch_Responses(Results=results)
@@ -1,19 +1,146 @@
 # Generated by sila2.code_generator; sila2.__version__: 0.10.1
 from __future__ import annotations
 
-from typing import TYPE_CHECKING
+from contextlib import contextmanager
+from threading import Lock
+from typing import TYPE_CHECKING, Dict, Iterator, List, Optional, Set, Union
 
-from sila2.server import MetadataDict
+from labop_labware_ontology.labware_service import UnknownQueryHandleError
+from labop_labware_ontology.sparql import BindingError, QueryBudget
+from labop_labware_ontology.sparql import QueryLimitExceeded as QueryLimitError
+from labop_labware_ontology.sparql import SPARQLSyntaxError
+from sila2.framework import Command, Feature, FullyQualifiedIdentifier, Property
+from sila2.server import MetadataDict, ObservableCommandInstanceWithIntermediateResponses
 
-from ..generated.labwarequeryservice import LabwareQueryServiceBase, SPARQLQuery_Responses
+from ..admission import QUERY
+from ..generated.labwarequeryservice import (
+    ExecutePrepared_Responses,
+    ExecutePreparedBatch_Responses,
+    InvalidBindings,
+    InvalidQuery,
+    LabwareQueryServiceBase,
+    LabwareQueryServiceFeature,
+    PrepareQuery_Responses,
+    QueryBinding,
+    QueryBindingSet,
+    QueryLimitExceeded,
+    ServerBusy,
+    SPARQLQuery_Responses,
+    SPARQLQueryStream_IntermediateResponses,
+    SPARQLQueryStream_Responses,
+    UnknownQueryHandle,
+)
 
 if TYPE_CHECKING:
     from ..server import Server
 
+# result rows per intermediate response of SPARQLQueryStream
+RESULT_CHUNK_SIZE = 1000
+
 
 class LabwareQueryServiceImpl(LabwareQueryServiceBase):
     def __init__(self, parent_server: Server) -> None:
         super().__init__(parent_server=parent_server)
+        # budgets of the running queries, cancelled when the server stops
+        self._running: Set[QueryBudget] = set()
+        self._running_lock = Lock()
+
+    def stop(self) -> None:
+        with self._running_lock:
+            for budget in self._running:
+                budget.cancel()
+        super().stop()
+
+    def get_calls_affected_by_QueryTimeout(self) -> List[Union[Feature, Command, Property, FullyQualifiedIdentifier]]:
+        # not SPARQLQuery: sila2 requires the metadata on every affected call, existing clients do not send it
+        return [
+            LabwareQueryServiceFeature["SPARQLQueryStream"],
+            LabwareQueryServiceFeature["ExecutePrepared"],
+            LabwareQueryServiceFeature["ExecutePreparedBatch"],
+        ]
+
+    @contextmanager
+    def _query_budget(self, metadata: Optional[MetadataDict] = None) -> Iterator[QueryBudget]:
+        """admits a query (see admission) and gives its budget: the time limit of the client (QueryTimeout metadata,
+        if the call takes it) or the server default and the row budget of the server,
+        a query exceeding it is aborted with QueryLimitExceeded"""
+        timeout = metadata[LabwareQueryServiceFeature["QueryTimeout"]] if metadata is not None else None
+        budget = self.parent_server.service.query_budget(timeout)
+        message = None
+        with self.parent_server.admission.admit(QUERY, ServerBusy):
+            with self._running_lock:
+                self._running.add(budget)
+            try:
+                yield budget
+            except QueryLimitError as error:
+                message = str(error)
+            finally:
+                with self._running_lock:
+                    self._running.discard(budget)
+        if message is not None:
+            # raised outside of the handler - the traceback of the engine error would keep the partial result alive
+            raise QueryLimitExceeded(message)
 
     def SPARQLQuery(self, Query: str, *, metadata: MetadataDict) -> SPARQLQuery_Responses:
-        raise NotImplementedError  # TODO
+        with self._query_budget() as budget:
+            try:
+                # repeated queries are answered from the result cache
+                result = self.parent_server.service.query_json(Query, budget)
+            except SPARQLSyntaxError as error:
+                raise InvalidQuery(str(error))
+            return SPARQLQuery_Responses(Results=result)
+
+    def SPARQLQueryStream(
+        self,
+        Query: str,
+        *,
+        metadata: MetadataDict,
+        instance: ObservableCommandInstanceWithIntermediateResponses[SPARQLQueryStream_IntermediateResponses],
+    ) -> SPARQLQueryStream_Responses:
+        with self._query_budget(metadata) as budget:
+            try:
+                result = self.parent_server.service.query(Query, budget)
+            except SPARQLSyntaxError as error:
+                raise InvalidQuery(str(error))
+            instance.begin_execution()
+            # rows are evaluated chunk by chunk, only the current chunk is held in memory
+            for chunk in result.json_chunks(RESULT_CHUNK_SIZE):
+                instance.send_intermediate_response(SPARQLQueryStream_IntermediateResponses(Results=chunk))
+            return SPARQLQueryStream_Responses(RowCount=result.row_count)
+
+    def PrepareQuery(self, Query: str, Parameters: List[str], *, metadata: MetadataDict) -> PrepareQuery_Responses:
+        # parsing and planning a client-supplied template is query work
+        with self.parent_server.admission.admit(QUERY, ServerBusy):
+            try:
+                handle = self.parent_server.service.prepare_query(Query, Parameters)
+            except SPARQLSyntaxError as error:
+                raise InvalidQuery(str(error))
+        return PrepareQuery_Responses(Handle=handle)
+
+    def ExecutePrepared(
+        self, Handle: str, Bindings: List[QueryBinding], *, metadata: MetadataDict
+    ) -> ExecutePrepared_Responses:
+        results = self._execute_prepared(Handle, [Bindings], metadata)
+        return ExecutePrepared_Responses(Results=results[0])
+
+    def ExecutePreparedBatch(
+        self, Handle: str, BindingSets: List[QueryBindingSet], *, metadata: MetadataDict
+    ) -> ExecutePreparedBatch_Responses:
+        results = self._execute_prepared(Handle, [binding_set.Bindings for binding_set in BindingSets], metadata)
+        return ExecutePreparedBatch_Responses(Results=results)
+
+    def _execute_prepared(
+        self, handle: str, binding_sets: List[List[QueryBinding]], metadata: MetadataDict
+    ) -> List[str]:
+        values: List[Dict[str, str]] = []
+        for bindings in binding_sets:
+            values.append({binding.Name: binding.Value for binding in bindings})
+            if len(values[-1]) != len(bindings):
+                raise InvalidBindings("a parameter is bound more than once")
+        with self._query_budget(metadata) as budget:
+            try:
+                return self.parent_server.service.execute_prepared_batch(handle, values, budget)
+            except UnknownQueryHandleError as error:
+                raise UnknownQueryHandle(str(error))
+            except BindingError as error:
+                raise InvalidBindings(str(error))
@@ -6,25 +6,65 @@ from typing import Set
 from sila2.client import SilaClient
 from sila2.framework import FullyQualifiedFeatureIdentifier
 
-from .labwareautomationservice import LabwareAutomationServiceClient
-from .labwareontologyservice import LabwareOntologyServiceClient
-from .labwarequeryservice import LabwareQueryServiceClient
+from . import labwareautomationservice, labwareontologyservice, labwarequeryservice
+from .labwareautomationservice import LabwareAutomationServiceClient, LabwareAutomationServiceFeature
+from .labwaremetricsservice import LabwareMetricsServiceClient
+from .labwareontologyservice import LabwareOntologyServiceClient, LabwareOntologyServiceFeature
+from .labwarequeryservice import LabwareQueryServiceClient, LabwareQueryServiceFeature
 
 
 class Client(SilaClient):
 
     LabwareAutomationService: LabwareAutomationServiceClient
 
-    LabwareOntologyService: LabwareOntologyServiceClient
+    LabwareMetricsService: LabwareMetricsServiceClient
 
     LabwareQueryService: LabwareQueryServiceClient
 
+    LabwareOntologyService: LabwareOntologyServiceClient
+
     _expected_features: Set[FullyQualifiedFeatureIdentifier] = {
         FullyQualifiedFeatureIdentifier("org.silastandard/core/SiLAService/v1"),
         FullyQualifiedFeatureIdentifier("de.unigreifswald/labware/LabwareAutomationService/v1"),
-        FullyQualifiedFeatureIdentifier("de.unigreifswald/labware/LabwareOntologyService/v1"),
+        FullyQualifiedFeatureIdentifier("de.unigreifswald/labware/LabwareMetricsService/v1"),
         FullyQualifiedFeatureIdentifier("de.unigreifswald/labware/LabwareQueryService/v1"),
+        FullyQualifiedFeatureIdentifier("de.unigreifswald/labware/LabwareOntologyService/v1"),
     }
 
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
+
+        self._register_defined_execution_error_class(
+            LabwareAutomationServiceFeature.defined_execution_errors["UnknownLabware"],
+            labwareautomationservice.UnknownLabware,
+        )
+
+        self._register_defined_execution_error_class(
+            LabwareAutomationServiceFeature.defined_execution_errors["ServerBusy"], labwareautomationservice.ServerBusy
+        )
+
+        self._register_defined_execution_error_class(
+            LabwareQueryServiceFeature.defined_execution_errors["InvalidQuery"], labwarequeryservice.InvalidQuery
+        )
+
+        self._register_defined_execution_error_class(
+            LabwareQueryServiceFeature.defined_execution_errors["QueryLimitExceeded"],
+            labwarequeryservice.QueryLimitExceeded,
+        )
+
+        self._register_defined_execution_error_class(
+            LabwareQueryServiceFeature.defined_execution_errors["ServerBusy"], labwarequeryservice.ServerBusy
+        )
+
+        self._register_defined_execution_error_class(
+            LabwareQueryServiceFeature.defined_execution_errors["UnknownQueryHandle"],
+            labwarequeryservice.UnknownQueryHandle,
+        )
+
+        self._register_defined_execution_error_class(
+            LabwareQueryServiceFeature.defined_execution_errors["InvalidBindings"], labwarequeryservice.InvalidBindings
+        )
+
+        self._register_defined_execution_error_class(
+            LabwareOntologyServiceFeature.defined_execution_errors["ServerBusy"], labwareontologyservice.ServerBusy
+        )
@@ -1,12 +1,23 @@
 # Generated by sila2.code_generator; sila2.__version__: 0.10.1
 from .labwareautomationservice_base import LabwareAutomationServiceBase
 from .labwareautomationservice_client import LabwareAutomationServiceClient
+from .labwareautomationservice_errors import ServerBusy, UnknownLabware
 from .labwareautomationservice_feature import LabwareAutomationServiceFeature
-from .labwareautomationservice_types import GetLabwareDimensions_Responses
+from .labwareautomationservice_types import (
+    GetLabwareDimensions_Responses,
+    GetLabwareDimensionsBatch_Responses,
+    LabwareDimensions,
+    LabwareKey,
+)
 
 __all__ = [
     "LabwareAutomationServiceBase",
     "LabwareAutomationServiceFeature",
     "LabwareAutomationServiceClient",
     "GetLabwareDimensions_Responses",
+    "GetLabwareDimensionsBatch_Responses",
+    "UnknownLabware",
+    "ServerBusy",
+    "LabwareKey",
+    "LabwareDimensions",
 ]
@@ -2,11 +2,15 @@
 from __future__ import annotations
 
 from abc import ABC, abstractmethod
-from typing import TYPE_CHECKING
+from typing import TYPE_CHECKING, List
 
 from sila2.server import FeatureImplementationBase, MetadataDict
 
-from .labwareautomationservice_types import GetLabwareDimensions_Responses
+from .labwareautomationservice_types import (
+    GetLabwareDimensions_Responses,
+    GetLabwareDimensionsBatch_Responses,
+    LabwareKey,
+)
 
 if TYPE_CHECKING:
     from ...server import Server
@@ -23,6 +27,16 @@ class LabwareAutomationServiceBase(FeatureImplementationBase, ABC):
         """
         super().__init__(parent_server=parent_server)
 
+    @abstractmethod
+    def get_CatalogVersion(self, *, metadata: MetadataDict) -> str:
+        """
+        Version of the labware catalog of the server. It changes whenever labware is created or the ontology is recompiled, cached labware dimensions with the same version are current.
+
+        :param metadata: The SiLA Client Metadata attached to the call
+        :return: Version of the labware catalog of the server. It changes whenever labware is created or the ontology is recompiled, cached labware dimensions with the same version are current.
+        """
+        pass
+
     @abstractmethod
     def GetLabwareDimensions(
         self, Vendor: str, ProductNumber: str, *, metadata: MetadataDict
@@ -42,5 +56,25 @@ class LabwareAutomationServiceBase(FeatureImplementationBase, ABC):
             - Dimensions: Dimensions of the labware.
 
 
+        """
+        pass
+
+    @abstractmethod
+    def GetLabwareDimensionsBatch(
+        self, Labware: List[LabwareKey], *, metadata: MetadataDict
+    ) -> GetLabwareDimensionsBatch_Responses:
+        """
+        Get the dimensions of many labware (e.g. of a whole deck) in one call.
+
+
+        :param Labware: Vendor and product number of each labware.
+
+        :param metadata: The SiLA Client Metadata attached to the call
+
+        :return:
+
+            - Dimensions: Dimensions of each labware, in the order of the requested labware.
+
+
         """
         pass
@@ -6,14 +6,15 @@
 
 from __future__ import annotations
 
-from typing import TYPE_CHECKING
+from typing import Iterable, List, Optional
 
-if TYPE_CHECKING:
+from sila2.client import ClientMetadataInstance, ClientUnobservableProperty
 
-    from typing import Iterable, Optional
-
-    from labwareautomationservice_types import GetLabwareDimensions_Responses
-    from sila2.client import ClientMetadataInstance
+from .labwareautomationservice_types import (
+    GetLabwareDimensions_Responses,
+    GetLabwareDimensionsBatch_Responses,
+    LabwareKey,
+)
 
 
 class LabwareAutomationServiceClient:
@@ -23,6 +24,11 @@ class LabwareAutomationServiceClient:
 
     """
 
+    CatalogVersion: ClientUnobservableProperty[str]
+    """
+    Version of the labware catalog of the server. It changes whenever labware is created or the ontology is recompiled, cached labware dimensions with the same version are current.
+    """
+
     def GetLabwareDimensions(
         self, Vendor: str, ProductNumber: str, *, metadata: Optional[Iterable[ClientMetadataInstance]] = None
     ) -> GetLabwareDimensions_Responses:
@@ -30,3 +36,11 @@ class LabwareAutomationServiceClient:
         Get Labware Dimensions.
         """
         ...
+
+    def GetLabwareDimensionsBatch(
+        self, Labware: List[LabwareKey], *, metadata: Optional[Iterable[ClientMetadataInstance]] = None
+    ) -> GetLabwareDimensionsBatch_Responses:
+        """
+        Get the dimensions of many labware (e.g. of a whole deck) in one call.
+        """
+        ...
@@ -1,2 +1,22 @@
 # Generated by sila2.code_generator; sila2.__version__: 0.10.1
 from __future__ import annotations
+
+from typing import Optional
+
+from sila2.framework.errors.defined_execution_error import DefinedExecutionError
+
+from .labwareautomationservice_feature import LabwareAutomationServiceFeature
+
+
+class UnknownLabware(DefinedExecutionError):
+    def __init__(self, message: Optional[str] = None):
+        if message is None:
+            message = "There is no labware with the given vendor and product number."
+        super().__init__(LabwareAutomationServiceFeature.defined_execution_errors["UnknownLabware"], message=message)
+
+
+class ServerBusy(DefinedExecutionError):
+    def __init__(self, message: Optional[str] = None):
+        if message is None:
+            message = "The server is overloaded: too many calls of this kind are running or waiting. Retry later."
+        super().__init__(LabwareAutomationServiceFeature.defined_execution_errors["ServerBusy"], message=message)
@@ -1,7 +1,7 @@
 # Generated by sila2.code_generator; sila2.__version__: 0.10.1
 from __future__ import annotations
 
-from typing import NamedTuple
+from typing import Any, List, NamedTuple
 
 
 class GetLabwareDimensions_Responses(NamedTuple):
@@ -10,3 +10,16 @@ class GetLabwareDimensions_Responses(NamedTuple):
     """
     Dimensions of the labware.
     """
+
+
+class GetLabwareDimensionsBatch_Responses(NamedTuple):
+
+    Dimensions: List[LabwareDimensions]
+    """
+    Dimensions of each labware, in the order of the requested labware.
+    """
+
+
+LabwareKey = Any
+
+LabwareDimensions = Any
@@ -0,0 +1,10 @@
+# Generated by sila2.code_generator; sila2.__version__: 0.10.1
+from .labwaremetricsservice_base import LabwareMetricsServiceBase
+from .labwaremetricsservice_client import LabwareMetricsServiceClient
+from .labwaremetricsservice_feature import LabwareMetricsServiceFeature
+
+__all__ = [
+    "LabwareMetricsServiceBase",
+    "LabwareMetricsServiceFeature",
+    "LabwareMetricsServiceClient",
+]
@@ -0,0 +1,32 @@
+# Generated by sila2.code_generator; sila2.__version__: 0.10.1
+from __future__ import annotations
+
+from abc import ABC, abstractmethod
+from typing import TYPE_CHECKING
+
+from sila2.server import FeatureImplementationBase, MetadataDict
+
+if TYPE_CHECKING:
+    from ...server import Server
+
+
+class LabwareMetricsServiceBase(FeatureImplementationBase, ABC):
+    parent_server: Server
+
+    def __init__(self, parent_server: Server):
+        """
+
+        Operational metrics of the Labware Ontology server.
+
+        """
+        super().__init__(parent_server=parent_server)
+
+    @abstractmethod
+    def get_Metrics(self, *, metadata: MetadataDict) -> str:
+        """
+        Latencies, in-flight and error counts of the calls, admission, cache and store metrics of the server process, in the Prometheus text exposition format.
+
+        :param metadata: The SiLA Client Metadata attached to the call
+        :return: Latencies, in-flight and error counts of the calls, admission, cache and store metrics of the server process, in the Prometheus text exposition format.
+        """
+        pass
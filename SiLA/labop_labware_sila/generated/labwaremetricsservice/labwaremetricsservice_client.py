@@ -0,0 +1,22 @@
+# Generated by sila2.code_generator; sila2.__version__: 0.10.1
+# -----
+# This class does not do anything useful at runtime. Its only purpose is to provide type annotations.
+# Since sphinx does not support .pyi files (yet?), so this is a .py file.
+# -----
+
+from __future__ import annotations
+
+from sila2.client import ClientUnobservableProperty
+
+
+class LabwareMetricsServiceClient:
+    """
+
+    Operational metrics of the Labware Ontology server.
+
+    """
+
+    Metrics: ClientUnobservableProperty[str]
+    """
+    Latencies, in-flight and error counts of the calls, admission, cache and store metrics of the server process, in the Prometheus text exposition format.
+    """
@@ -0,0 +1,2 @@
+# Generated by sila2.code_generator; sila2.__version__: 0.10.1
+from __future__ import annotations
@@ -1,12 +1,22 @@
 # Generated by sila2.code_generator; sila2.__version__: 0.10.1
 from .labwareontologyservice_base import LabwareOntologyServiceBase
 from .labwareontologyservice_client import LabwareOntologyServiceClient
+from .labwareontologyservice_errors import ServerBusy
 from .labwareontologyservice_feature import LabwareOntologyServiceFeature
-from .labwareontologyservice_types import CreateLabware_Responses
+from .labwareontologyservice_types import (
+    CreateLabware_Responses,
+    CreateLabwareBatch_Responses,
+    CreateLabwareResult,
+    LabwareDefinition,
+)
 
 __all__ = [
     "LabwareOntologyServiceBase",
     "LabwareOntologyServiceFeature",
     "LabwareOntologyServiceClient",
     "CreateLabware_Responses",
+    "CreateLabwareBatch_Responses",
+    "ServerBusy",
+    "LabwareDefinition",
+    "CreateLabwareResult",
 ]
@@ -2,11 +2,11 @@
 from __future__ import annotations
 
 from abc import ABC, abstractmethod
-from typing import TYPE_CHECKING
+from typing import TYPE_CHECKING, List
 
 from sila2.server import FeatureImplementationBase, MetadataDict
 
-from .labwareontologyservice_types import CreateLabware_Responses
+from .labwareontologyservice_types import CreateLabware_Responses, CreateLabwareBatch_Responses, LabwareDefinition
 
 if TYPE_CHECKING:
     from ...server import Server
@@ -33,5 +33,25 @@ class LabwareOntologyServiceBase(FeatureImplementationBase, ABC):
 
         :param metadata: The SiLA Client Metadata attached to the call
 
+        """
+        pass
+
+    @abstractmethod
+    def CreateLabwareBatch(
+        self, Labware: List[LabwareDefinition], *, metadata: MetadataDict
+    ) -> CreateLabwareBatch_Responses:
+        """
+        Creates many Labware individuals in Labware ontology in one transaction. Every labware definition gets its own result, invalid definitions do not abort the batch.
+
+
+        :param Labware: Definitions of the labware to create.
+
+        :param metadata: The SiLA Client Metadata attached to the call
+
+        :return:
+
+            - Results: Result of each labware definition, in the order of the definitions.
+
+
         """
         pass
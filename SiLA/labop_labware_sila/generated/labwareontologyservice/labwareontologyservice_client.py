@@ -6,14 +6,11 @@
 
 from __future__ import annotations
 
-from typing import TYPE_CHECKING
+from typing import Iterable, List, Optional
 
-if TYPE_CHECKING:
+from sila2.client import ClientMetadataInstance
 
-    from typing import Iterable, Optional
-
-    from labwareontologyservice_types import CreateLabware_Responses
-    from sila2.client import ClientMetadataInstance
+from .labwareontologyservice_types import CreateLabware_Responses, CreateLabwareBatch_Responses, LabwareDefinition
 
 
 class LabwareOntologyServiceClient:
@@ -30,3 +27,11 @@ class LabwareOntologyServiceClient:
         Creates Labware individual in Labware ontology.
         """
         ...
+
+    def CreateLabwareBatch(
+        self, Labware: List[LabwareDefinition], *, metadata: Optional[Iterable[ClientMetadataInstance]] = None
+    ) -> CreateLabwareBatch_Responses:
+        """
+        Creates many Labware individuals in Labware ontology in one transaction. Every labware definition gets its own result, invalid definitions do not abort the batch.
+        """
+        ...
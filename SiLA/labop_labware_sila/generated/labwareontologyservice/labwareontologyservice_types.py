@@ -1,9 +1,22 @@
 # Generated by sila2.code_generator; sila2.__version__: 0.10.1
 from __future__ import annotations
 
-from typing import NamedTuple
+from typing import Any, List, NamedTuple
 
 
 class CreateLabware_Responses(NamedTuple):
 
     pass
+
+
+class CreateLabwareBatch_Responses(NamedTuple):
+
+    Results: List[CreateLabwareResult]
+    """
+    Result of each labware definition, in the order of the definitions.
+    """
+
+
+LabwareDefinition = Any
+
+CreateLabwareResult = Any
@@ -1,12 +1,40 @@
 # Generated by sila2.code_generator; sila2.__version__: 0.10.1
 from .labwarequeryservice_base import LabwareQueryServiceBase
 from .labwarequeryservice_client import LabwareQueryServiceClient
+from .labwarequeryservice_errors import (
+    InvalidBindings,
+    InvalidQuery,
+    QueryLimitExceeded,
+    ServerBusy,
+    UnknownQueryHandle,
+)
 from .labwarequeryservice_feature import LabwareQueryServiceFeature
-from .labwarequeryservice_types import SPARQLQuery_Responses
+from .labwarequeryservice_types import (
+    ExecutePrepared_Responses,
+    ExecutePreparedBatch_Responses,
+    PrepareQuery_Responses,
+    QueryBinding,
+    QueryBindingSet,
+    SPARQLQuery_Responses,
+    SPARQLQueryStream_IntermediateResponses,
+    SPARQLQueryStream_Responses,
+)
 
 __all__ = [
     "LabwareQueryServiceBase",
     "LabwareQueryServiceFeature",
     "LabwareQueryServiceClient",
     "SPARQLQuery_Responses",
+    "PrepareQuery_Responses",
+    "ExecutePrepared_Responses",
+    "ExecutePreparedBatch_Responses",
+    "SPARQLQueryStream_Responses",
+    "SPARQLQueryStream_IntermediateResponses",
+    "InvalidQuery",
+    "QueryLimitExceeded",
+    "ServerBusy",
+    "UnknownQueryHandle",
+    "InvalidBindings",
+    "QueryBinding",
+    "QueryBindingSet",
 ]
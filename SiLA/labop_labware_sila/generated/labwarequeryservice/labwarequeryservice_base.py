@@ -2,11 +2,21 @@
 from __future__ import annotations
 
 from abc import ABC, abstractmethod
-from typing import TYPE_CHECKING
+from typing import TYPE_CHECKING, List, Union
 
-from sila2.server import FeatureImplementationBase, MetadataDict
+from sila2.framework import Command, Feature, FullyQualifiedIdentifier, Property
+from sila2.server import FeatureImplementationBase, MetadataDict, ObservableCommandInstanceWithIntermediateResponses
 
-from .labwarequeryservice_types import SPARQLQuery_Responses
+from .labwarequeryservice_types import (
+    ExecutePrepared_Responses,
+    ExecutePreparedBatch_Responses,
+    PrepareQuery_Responses,
+    QueryBinding,
+    QueryBindingSet,
+    SPARQLQuery_Responses,
+    SPARQLQueryStream_IntermediateResponses,
+    SPARQLQueryStream_Responses,
+)
 
 if TYPE_CHECKING:
     from ...server import Server
@@ -26,12 +36,120 @@ class LabwareQueryServiceBase(FeatureImplementationBase, ABC):
     @abstractmethod
     def SPARQLQuery(self, Query: str, *, metadata: MetadataDict) -> SPARQLQuery_Responses:
         """
-        SPARQL query the Labware Ontology.
+        SPARQL query the Labware Ontology. The query runs with the time limit of the server.
 
 
         :param Query: SPARQL query.
 
         :param metadata: The SiLA Client Metadata attached to the call
 
+        :return:
+
+            - Results: Query results in the SPARQL 1.1 Query Results JSON Format.
+
+
+        """
+        pass
+
+    @abstractmethod
+    def PrepareQuery(self, Query: str, Parameters: List[str], *, metadata: MetadataDict) -> PrepareQuery_Responses:
+        """
+        Registers a SPARQL query template with named parameters. The server plans the template once, it is executed with values of the parameters by ExecutePrepared.
+
+
+        :param Query: SPARQL query template, the parameters are variables of its graph pattern.
+
+        :param Parameters: Names of the variables that are bound by the caller on execution (without '?').
+
+        :param metadata: The SiLA Client Metadata attached to the call
+
+        :return:
+
+            - Handle: Handle of the prepared query, the same for the same template and parameters.
+
+
+        """
+        pass
+
+    @abstractmethod
+    def ExecutePrepared(
+        self, Handle: str, Bindings: List[QueryBinding], *, metadata: MetadataDict
+    ) -> ExecutePrepared_Responses:
+        """
+        Executes a prepared query with values of its parameters.
+
+
+        :param Handle: Handle of the prepared query.
+
+        :param Bindings: A value for each parameter of the query.
+
+        :param metadata: The SiLA Client Metadata attached to the call
+
+        :return:
+
+            - Results: Query results in the SPARQL 1.1 Query Results JSON Format.
+
+
+        """
+        pass
+
+    @abstractmethod
+    def ExecutePreparedBatch(
+        self, Handle: str, BindingSets: List[QueryBindingSet], *, metadata: MetadataDict
+    ) -> ExecutePreparedBatch_Responses:
+        """
+        Executes a prepared query once for each set of values of its parameters, in one call. The time limit applies to the whole batch.
+
+
+        :param Handle: Handle of the prepared query.
+
+        :param BindingSets: Values of the parameters for each execution.
+
+        :param metadata: The SiLA Client Metadata attached to the call
+
+        :return:
+
+            - Results: Query results of each execution in the SPARQL 1.1 Query Results JSON Format, in the order of the binding sets.
+
+
+        """
+        pass
+
+    @abstractmethod
+    def SPARQLQueryStream(
+        self,
+        Query: str,
+        *,
+        metadata: MetadataDict,
+        instance: ObservableCommandInstanceWithIntermediateResponses[SPARQLQueryStream_IntermediateResponses],
+    ) -> SPARQLQueryStream_Responses:
+        """
+        SPARQL query the Labware Ontology, the results are sent in chunks as intermediate responses while the query is evaluated.
+
+
+        :param Query: SPARQL query.
+
+        :param metadata: The SiLA Client Metadata attached to the call
+        :param instance: The command instance, enabling sending status updates to subscribed clients
+
+        :return:
+
+            - RowCount: Total number of result rows sent as intermediate responses.
+
+
+        """
+        pass
+
+    @abstractmethod
+    def get_calls_affected_by_QueryTimeout(self) -> List[Union[Feature, Command, Property, FullyQualifiedIdentifier]]:
+        """
+        Returns the fully qualified identifiers of all features, commands and properties affected by the
+        SiLA Client Metadata 'Delay'.
+
+        **Description of 'QueryTimeout'**:
+        Maximal evaluation time of a query in seconds, 0 for the default of the server. Taken by SPARQLQueryStream, ExecutePrepared and ExecutePreparedBatch, SPARQLQuery always runs with the default of the server.
+
+        :return: Fully qualified identifiers of all features, commands and properties affected by the
+            SiLA Client Metadata 'Delay'.
         """
         pass
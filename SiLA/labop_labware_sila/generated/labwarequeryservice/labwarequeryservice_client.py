@@ -6,14 +6,24 @@
 
 from __future__ import annotations
 
-from typing import TYPE_CHECKING
+from typing import Iterable, List, Optional
 
-if TYPE_CHECKING:
+from sila2.client import (
+    ClientMetadata,
+    ClientMetadataInstance,
+    ClientObservableCommandInstanceWithIntermediateResponses,
+)
 
-    from typing import Iterable, Optional
-
-    from labwarequeryservice_types import SPARQLQuery_Responses
-    from sila2.client import ClientMetadataInstance
+from .labwarequeryservice_types import (
+    ExecutePrepared_Responses,
+    ExecutePreparedBatch_Responses,
+    PrepareQuery_Responses,
+    QueryBinding,
+    QueryBindingSet,
+    SPARQLQuery_Responses,
+    SPARQLQueryStream_IntermediateResponses,
+    SPARQLQueryStream_Responses,
+)
 
 
 class LabwareQueryServiceClient:
@@ -23,10 +33,53 @@ class LabwareQueryServiceClient:
 
     """
 
+    QueryTimeout: ClientMetadata[float]
+    """
+    Maximal evaluation time of a query in seconds, 0 for the default of the server. Taken by SPARQLQueryStream, ExecutePrepared and ExecutePreparedBatch, SPARQLQuery always runs with the default of the server.
+    """
+
     def SPARQLQuery(
         self, Query: str, *, metadata: Optional[Iterable[ClientMetadataInstance]] = None
     ) -> SPARQLQuery_Responses:
         """
-        SPARQL query the Labware Ontology.
+        SPARQL query the Labware Ontology. The query runs with the time limit of the server.
+        """
+        ...
+
+    def PrepareQuery(
+        self, Query: str, Parameters: List[str], *, metadata: Optional[Iterable[ClientMetadataInstance]] = None
+    ) -> PrepareQuery_Responses:
+        """
+        Registers a SPARQL query template with named parameters. The server plans the template once, it is executed with values of the parameters by ExecutePrepared.
+        """
+        ...
+
+    def ExecutePrepared(
+        self, Handle: str, Bindings: List[QueryBinding], *, metadata: Optional[Iterable[ClientMetadataInstance]] = None
+    ) -> ExecutePrepared_Responses:
+        """
+        Executes a prepared query with values of its parameters.
+        """
+        ...
+
+    def ExecutePreparedBatch(
+        self,
+        Handle: str,
+        BindingSets: List[QueryBindingSet],
+        *,
+        metadata: Optional[Iterable[ClientMetadataInstance]] = None,
+    ) -> ExecutePreparedBatch_Responses:
+        """
+        Executes a prepared query once for each set of values of its parameters, in one call. The time limit applies to the whole batch.
+        """
+        ...
+
+    def SPARQLQueryStream(
+        self, Query: str, *, metadata: Optional[Iterable[ClientMetadataInstance]] = None
+    ) -> ClientObservableCommandInstanceWithIntermediateResponses[
+        SPARQLQueryStream_IntermediateResponses, SPARQLQueryStream_Responses
+    ]:
+        """
+        SPARQL query the Labware Ontology, the results are sent in chunks as intermediate responses while the query is evaluated.
         """
         ...
@@ -1,2 +1,43 @@
 # Generated by sila2.code_generator; sila2.__version__: 0.10.1
 from __future__ import annotations
+
+from typing import Optional
+
+from sila2.framework.errors.defined_execution_error import DefinedExecutionError
+
+from .labwarequeryservice_feature import LabwareQueryServiceFeature
+
+
+class InvalidQuery(DefinedExecutionError):
+    def __init__(self, message: Optional[str] = None):
+        if message is None:
+            message = "The query is not valid SPARQL or uses SPARQL features that are not supported."
+        super().__init__(LabwareQueryServiceFeature.defined_execution_errors["InvalidQuery"], message=message)
+
+
+class QueryLimitExceeded(DefinedExecutionError):
+    def __init__(self, message: Optional[str] = None):
+        if message is None:
+            message = "The evaluation of the query was aborted: it exceeded its time limit or its budget of intermediate results, or the server is shutting down."
+        super().__init__(LabwareQueryServiceFeature.defined_execution_errors["QueryLimitExceeded"], message=message)
+
+
+class ServerBusy(DefinedExecutionError):
+    def __init__(self, message: Optional[str] = None):
+        if message is None:
+            message = "The server is overloaded: too many calls of this kind are running or waiting. Retry later."
+        super().__init__(LabwareQueryServiceFeature.defined_execution_errors["ServerBusy"], message=message)
+
+
+class UnknownQueryHandle(DefinedExecutionError):
+    def __init__(self, message: Optional[str] = None):
+        if message is None:
+            message = "There is no prepared query with this handle (it was never prepared, or evicted, or prepared at another server process). Prepare the query again."
+        super().__init__(LabwareQueryServiceFeature.defined_execution_errors["UnknownQueryHandle"], message=message)
+
+
+class InvalidBindings(DefinedExecutionError):
+    def __init__(self, message: Optional[str] = None):
+        if message is None:
+            message = "The bindings do not give exactly one value for each parameter of the prepared query, or a value is no single RDF term."
+        super().__init__(LabwareQueryServiceFeature.defined_execution_errors["InvalidBindings"], message=message)
@@ -1,9 +1,57 @@
 # Generated by sila2.code_generator; sila2.__version__: 0.10.1
 from __future__ import annotations
 
-from typing import NamedTuple
+from typing import Any, List, NamedTuple
 
 
 class SPARQLQuery_Responses(NamedTuple):
 
-    pass
+    Results: str
+    """
+    Query results in the SPARQL 1.1 Query Results JSON Format.
+    """
+
+
+class PrepareQuery_Responses(NamedTuple):
+
+    Handle: str
+    """
+    Handle of the prepared query, the same for the same template and parameters.
+    """
+
+
+class ExecutePrepared_Responses(NamedTuple):
+
+    Results: str
+    """
+    Query results in the SPARQL 1.1 Query Results JSON Format.
+    """
+
+
+class ExecutePreparedBatch_Responses(NamedTuple):
+
+    Results: List[str]
+    """
+    Query results of each execution in the SPARQL 1.1 Query Results JSON Format, in the order of the binding sets.
+    """
+
+
+class SPARQLQueryStream_Responses(NamedTuple):
+
+    RowCount: int
+    """
+    Total number of result rows sent as intermediate responses.
+    """
+
+
+class SPARQLQueryStream_IntermediateResponses(NamedTuple):
+
+    Results: str
+    """
+    Next chunk of the query results in the SPARQL 1.1 Query Results JSON Format.
+    """
+
+
+QueryBinding = Any
+
+QueryBindingSet = Any
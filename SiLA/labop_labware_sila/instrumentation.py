@@ -0,0 +1,144 @@
+"""Instrumentation of the server: metrics of the SiLA command calls, the admission, the caches and the store
+
+Every command implementation is wrapped when it is registered (Server.set_feature_implementation),
+the wrapper records the duration, the number of calls in flight and the errors by type.
+All other metrics are computed from their source (e.g. AdmissionController.stats()) when rendered.
+
+The metrics are per process, with --workers every worker serves its own.
+They are read by the Metrics property of the LabwareMetricsService or scraped from the
+HTTP endpoint (--metrics-port, labop_labware_ontology.metrics.serve_metrics).
+"""
+
+import time
+from functools import wraps
+from typing import TYPE_CHECKING, Any, Callable, Dict
+
+from labop_labware_ontology.metrics import MetricsRegistry
+from sila2.framework import Command, Feature
+from sila2.server import FeatureImplementationBase
+
+if TYPE_CHECKING:
+    from .server import Server
+
+
+class CallMetrics:
+    def __init__(self, registry: MetricsRegistry) -> None:
+        """metrics of the command calls, by feature and command"""
+        labels = ("feature", "command")
+        self.duration = registry.histogram("labware_call_duration_seconds", "Duration of the command calls", labels)
+        self.in_flight = registry.gauge("labware_calls_in_flight", "Command calls executing or waiting", labels)
+        self.errors = registry.counter(
+            "labware_call_errors_total", "Command calls failed, by error type", labels + ("error",)
+        )
+
+    def instrument(self, feature: Feature, implementation: FeatureImplementationBase) -> None:
+        """wraps the command methods of a feature implementation, before it is set in the server"""
+        for node in feature.children_by_fully_qualified_identifier.values():
+            if isinstance(node, Command):
+                # <originator>/<category>/<feature>/v<version>/Command/<command>
+                _, _, feature_identifier, _, _, identifier = str(node.fully_qualified_identifier).split("/")
+                method = getattr(implementation, identifier)
+                setattr(implementation, identifier, self._wrap(feature_identifier, identifier, method))
+
+    def _wrap(self, feature: str, command: str, method: Callable[..., Any]) -> Callable[..., Any]:
+        duration, in_flight, errors = self.duration, self.in_flight, self.errors
+
+        @wraps(method)
+        def call(*args, **kwargs):
+            in_flight.inc(feature, command)
+            start = time.perf_counter()
+            try:
+                return method(*args, **kwargs)
+            except Exception as error:
+                errors.inc(feature, command, type(error).__name__)
+                raise
+            finally:
+                duration.observe(time.perf_counter() - start, feature, command)
+                in_flight.dec(feature, command)
+
+        return call
+
+
+def register_server_metrics(registry: MetricsRegistry, server: "Server") -> None:
+    """metrics of the admission, the caches (server.caches) and the store of a server"""
+
+    def admission(key: str) -> Callable[[], Dict[tuple, float]]:
+        return lambda: {(name,): stats[key] for name, stats in server.admission.stats().items()}
+
+    registry.gauge("labware_admission_running", "Calls executing, by call class", ("class",), admission("running"))
+    registry.gauge(
+        "labware_admission_waiting", "Calls waiting for a slot, by call class", ("class",), admission("waiting")
+    )
+    registry.counter(
+        "labware_admission_admitted_total", "Calls admitted, by call class", ("class",), admission("admitted")
+    )
+    registry.counter(
+        "labware_admission_rejected_total",
+        "Calls rejected (ServerBusy), by call class",
+        ("class",),
+        admission("rejected"),
+    )
+
+    def cache_requests() -> Dict[tuple, float]:
+        requests = {}
+        for name, cache in server.caches.items():
+            requests[(name, "hit")] = cache.hits
+            requests[(name, "miss")] = cache.misses
+        return requests
+
+    def cache_hit_ratio() -> Dict[tuple, float]:
+        return {
+            (name,): cache.hits / (cache.hits + cache.misses)
+            for name, cache in server.caches.items()
+            if cache.hits + cache.misses > 0
+        }
+
+    registry.counter(
+        "labware_cache_requests_total", "Cache lookups, by cache and result", ("cache", "result"), cache_requests
+    )
+    registry.gauge(
+        "labware_cache_hit_ratio", "Share of the cache lookups answered from the cache", ("cache",), cache_hit_ratio
+    )
+    registry.gauge(
+        "labware_cache_entries",
+        "Entries in the cache",
+        ("cache",),
+        lambda: {(name,): len(cache) for name, cache in server.caches.items()},
+    )
+    registry.gauge(
+        "labware_cache_bytes",
+        "Size of the cached entries, by cache",
+        ("cache",),
+        lambda: {(name,): cache.bytes for name, cache in server.caches.items() if hasattr(cache, "bytes")},
+    )
+    registry.counter(
+        "labware_cache_evictions_total",
+        "Cache entries evicted to stay within the size limit",
+        ("cache",),
+        lambda: {(name,): cache.evictions for name, cache in server.caches.items() if hasattr(cache, "evictions")},
+    )
+    registry.counter(
+        "labware_cache_invalidations_total",
+        "Cache entries (or whole caches) invalidated by changes of the store",
+        ("cache",),
+        lambda: {
+            (name,): cache.invalidations for name, cache in server.caches.items() if hasattr(cache, "invalidations")
+        },
+    )
+
+    registry.gauge(
+        "labware_store_triples", "Triples in the current store version", (), lambda: len(server.store.version)
+    )
+    registry.gauge(
+        "labware_store_version", "Number of the current store version", (), lambda: server.store.version.number
+    )
+    registry.gauge(
+        "labware_store_terms", "Terms in the dictionary of the store", (), lambda: len(server.store.dictionary)
+    )
+    if server.write_ahead_log is not None:
+        registry.gauge(
+            "labware_wal_last_lsn",
+            "Sequence number of the last write-ahead log record",
+            (),
+            lambda: server.write_ahead_log.last_lsn,
+        )
@@ -0,0 +1,298 @@
+"""Load generator: drives a running server through the generated client with a mix of calls
+
+    python -m labop_labware_sila.loadgen --mix lookup=90,query=8,create=2 --concurrency 16 --duration 60
+    python -m labop_labware_sila.loadgen --rate 500 --concurrency 64 --output load.json
+
+Closed loop (default): every worker sends its next call when the previous one returned,
+the throughput is what the server sustains at this concurrency.
+Open loop (--rate): calls are scheduled at a fixed total rate, independent of the responses.
+The latency of a call is measured from its scheduled start, so calls waiting for a free worker
+(the server falls behind) show up in the latency instead of lowering the rate (no coordinated omission).
+
+Lookups use the keys of the synthetic catalog (labop_labware_ontology.synthetic_catalog) of --catalog-size,
+start the server on the same catalog to get hits. Creates add new labware with unique names.
+"""
+
+import itertools
+import json
+import logging
+import random
+import threading
+import time
+from collections import Counter, defaultdict
+from queue import Queue
+from typing import Callable, Dict, List, Mapping, Optional, Sequence, Tuple
+
+import typer
+from labop_labware_ontology.synthetic_catalog import generate_catalog
+from typer import BadParameter, Option
+
+from .generated.client import Client
+
+LOOKUP = "lookup"
+QUERY = "query"
+CREATE = "create"
+
+QUERIES = (
+    "SELECT ?x ?height { ?x lw:vendor 'Corning' ; lw:productNumber 'CLS0000001' ; lw:height ?height }",
+    "SELECT ?x ?label { ?x a lw:TipRack ; rdfs:label ?label } LIMIT 100",
+    "SELECT ?x ?label { ?x lw:wellCount 1536 ; lw:vendor 'Nunc' ; rdfs:label ?label }",
+    "ASK { ?x a lw:Reservoir ; lw:wellCount 12 }",
+)
+
+# keys of the catalog used for lookups
+LOOKUP_KEYS = 10_000
+
+Operation = Callable[[Client, random.Random], None]
+
+
+def parse_mix(mix: str) -> Dict[str, float]:
+    """weights of the commands from COMMAND=WEIGHT,..."""
+    weights = {}
+    for part in mix.split(","):
+        name, _, weight = part.partition("=")
+        name = name.strip()
+        try:
+            weights[name] = float(weight)
+        except ValueError:
+            raise BadParameter(f"invalid mix '{part}', expected COMMAND=WEIGHT") from None
+        if name not in (LOOKUP, QUERY, CREATE) or weights[name] < 0:
+            raise BadParameter(f"invalid mix '{part}', commands are {LOOKUP}, {QUERY} and {CREATE}")
+    if sum(weights.values()) <= 0:
+        raise BadParameter("the mix has no calls")
+    return weights
+
+
+def make_operations(catalog_size: int, seed: int) -> Dict[str, Operation]:
+    """the calls of the mix, each gets a client and a random generator"""
+    step = max(catalog_size // LOOKUP_KEYS, 1)
+    keys = [
+        (entry.definition.vendor, entry.definition.product_number)
+        for entry in itertools.islice(generate_catalog(catalog_size), 0, None, step)
+    ]
+    # unique per run, repeated runs against the same server do not collide
+    names = (f"loadgen {seed} {time.time_ns()} {number}" for number in itertools.count())
+    names_lock = threading.Lock()
+
+    def lookup(client: Client, rng: random.Random) -> None:
+        client.LabwareAutomationService.GetLabwareDimensions(*rng.choice(keys))
+
+    def query(client: Client, rng: random.Random) -> None:
+        client.LabwareQueryService.SPARQLQuery(rng.choice(QUERIES))
+
+    def create(client: Client, rng: random.Random) -> None:
+        with names_lock:
+            name = next(names)
+        client.LabwareOntologyService.CreateLabware(name)
+
+    return {LOOKUP: lookup, QUERY: query, CREATE: create}
+
+
+def percentile(latencies: Sequence[float], fraction: float) -> float:
+    """the latency of the sorted latencies that the fraction of the calls did not exceed"""
+    return latencies[min(int(len(latencies) * fraction), len(latencies) - 1)]
+
+
+def summarize(
+    latencies: Mapping[str, Sequence[float]], errors: Mapping[str, Mapping[str, int]], elapsed: float
+) -> Dict[str, dict]:
+    """per command (and in total): calls, errors by type, throughput and latency percentiles in ms
+
+    :param latencies: seconds per call, per command
+    :param errors: number of calls per error type, per command
+    :param elapsed: seconds the load was generated
+    """
+    report = {}
+    commands = sorted(command for command, values in latencies.items() if values)
+    for command in commands + ["total"]:
+        if command == "total":
+            values = sorted(itertools.chain.from_iterable(latencies.values()))
+            error_types = dict(sum((Counter(errors.get(name, {})) for name in commands), Counter()))
+        else:
+            values = sorted(latencies[command])
+            error_types = dict(errors.get(command, {}))
+        if not values:
+            continue
+        report[command] = {
+            "calls": len(values),
+            "errors": sum(error_types.values()),
+            "error_types": error_types,
+            "throughput_per_s": len(values) / elapsed,
+            "p50_ms": percentile(values, 0.5) * 1000,
+            "p95_ms": percentile(values, 0.95) * 1000,
+            "p99_ms": percentile(values, 0.99) * 1000,
+            "max_ms": values[-1] * 1000,
+        }
+    return report
+
+
+def format_report(report: Dict[str, dict]) -> List[str]:
+    """the lines of the report table, with the error types below the calls of a command"""
+    lines = [
+        f"{'command':>8} {'calls':>8} {'errors':>7} {'calls/s':>9} "
+        f"{'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'max ms':>8}"
+    ]
+    for command, stats in report.items():
+        lines.append(
+            f"{command:>8} {stats['calls']:>8} {stats['errors']:>7} {stats['throughput_per_s']:>9.1f} "
+            f"{stats['p50_ms']:>8.2f} {stats['p95_ms']:>8.2f} {stats['p99_ms']:>8.2f} {stats['max_ms']:>8.2f}"
+        )
+        if stats["error_types"]:
+            error_types = sorted(stats["error_types"].items(), key=lambda item: (-item[1], item[0]))
+            lines.append(f"{'':>8} errors: {', '.join(f'{name} {count}' for name, count in error_types)}")
+    return lines
+
+
+class Recorder:
+    def __init__(self) -> None:
+        """latencies and errors per command"""
+        self.latencies: Dict[str, List[float]] = defaultdict(list)
+        self.errors: Dict[str, Dict[str, int]] = defaultdict(lambda: defaultdict(int))
+        self._lock = threading.Lock()
+
+    def record(self, command: str, latency: float, error: Optional[str]) -> None:
+        with self._lock:
+            self.latencies[command].append(latency)
+            if error is not None:
+                self.errors[command][error] += 1
+
+    def report(self, elapsed: float) -> Dict[str, dict]:
+        """the summary of the calls recorded so far (see summarize)"""
+        with self._lock:
+            latencies = {command: list(values) for command, values in self.latencies.items()}
+            errors = {command: dict(counts) for command, counts in self.errors.items()}
+        return summarize(latencies, errors, elapsed)
+
+
+def execute(operations: Dict[str, Operation], command: str, client: Client, rng: random.Random) -> Optional[str]:
+    """runs a call, returns the type of its error (None on success)"""
+    try:
+        operations[command](client, rng)
+    except Exception as error:  # pylint: disable=broad-except
+        # defined execution errors (e.g. ServerBusy) and connection errors are counted, the load goes on
+        return type(error).__name__
+    return None
+
+
+def run_closed_loop(
+    clients: List[Client],
+    operations: Dict[str, Operation],
+    weights: Dict[str, float],
+    duration: float,
+    recorder: Recorder,
+    seed: int,
+) -> float:
+    """every client calls in a loop until the duration is over, returns the elapsed time"""
+    commands, cumulative = list(weights), list(itertools.accumulate(weights.values()))
+    end = time.monotonic() + duration
+
+    def worker(number: int) -> None:
+        rng = random.Random(seed + number)
+        while time.monotonic() < end:
+            command = rng.choices(commands, cum_weights=cumulative)[0]
+            start = time.perf_counter()
+            error = execute(operations, command, clients[number], rng)
+            recorder.record(command, time.perf_counter() - start, error)
+
+    return _run_workers(worker, len(clients))
+
+
+def run_open_loop(
+    clients: List[Client],
+    operations: Dict[str, Operation],
+    weights: Dict[str, float],
+    duration: float,
+    rate: float,
+    recorder: Recorder,
+    seed: int,
+) -> float:
+    """schedules calls at the rate, the clients execute them in order, returns the elapsed time"""
+    commands, cumulative = list(weights), list(itertools.accumulate(weights.values()))
+    rng = random.Random(seed)
+    scheduled: "Queue[Optional[Tuple[str, float]]]" = Queue()
+
+    def worker(number: int) -> None:
+        worker_rng = random.Random(seed + number + 1)
+        while True:
+            call = scheduled.get()
+            if call is None:
+                return
+            command, start = call
+            delay = start - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            error = execute(operations, command, clients[number], worker_rng)
+            recorder.record(command, time.perf_counter() - start, error)
+
+    def schedule() -> None:
+        start = time.perf_counter()
+        for number in range(int(duration * rate)):
+            # queued ahead of time, a worker waits for the scheduled start
+            due = start + number / rate
+            while due - time.perf_counter() > 0.1:
+                time.sleep(0.05)
+            scheduled.put((rng.choices(commands, cum_weights=cumulative)[0], due))
+        for _ in clients:
+            scheduled.put(None)
+
+    threading.Thread(target=schedule, name="loadgen-scheduler", daemon=True).start()
+    return _run_workers(worker, len(clients))
+
+
+def _run_workers(worker: Callable[[int], None], count: int) -> float:
+    threads = [threading.Thread(target=worker, args=(number,), name=f"loadgen-{number}") for number in range(count)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return time.perf_counter() - start
+
+
+def print_report(report: Dict[str, dict]) -> None:
+    for line in format_report(report):
+        print(line)
+
+
+def main(
+    ip_address: str = Option("127.0.0.1", "-a", "--ip-address", help="The IP address of the server"),
+    port: int = Option(50052, "-p", "--port", help="The port of the server"),
+    mix: str = Option(
+        "lookup=90,query=8,create=2", "--mix", help="Weights of the commands as lookup=W,query=W,create=W"
+    ),
+    concurrency: int = Option(8, "-c", "--concurrency", help="Number of concurrent clients"),
+    duration: float = Option(30.0, "-d", "--duration", help="Seconds to generate load"),
+    rate: float = Option(0.0, "-r", "--rate", help="Calls per second in total (open loop), 0: closed loop"),
+    catalog_size: int = Option(
+        100_000, "--catalog-size", help="Size of the synthetic catalog the server was started with (lookup keys)"
+    ),
+    seed: int = Option(0, "--seed", help="Seed of the random choices of calls and keys"),
+    output: Optional[str] = Option(None, "-o", "--output", help="File to write the results to as JSON"),
+):
+    """Drives a running (insecure) server with a mix of lookups, queries and creates and reports the latencies"""
+    weights = parse_mix(mix)
+    if concurrency < 1:
+        raise BadParameter("--concurrency must be at least 1")
+    if rate < 0:
+        raise BadParameter("--rate must not be negative")
+    logging.basicConfig(level=logging.WARNING, format="%(asctime)s:%(levelname)s:%(name)s:%(message)s")
+
+    operations = make_operations(catalog_size, seed)
+    # one connection per client like independent callers, clients are created one after the other
+    clients = [Client(ip_address, port, insecure=True) for _ in range(concurrency)]
+    recorder = Recorder()
+    if rate > 0:
+        elapsed = run_open_loop(clients, operations, weights, duration, rate, recorder, seed)
+    else:
+        elapsed = run_closed_loop(clients, operations, weights, duration, recorder, seed)
+    report = recorder.report(elapsed)
+    print_report(report)
+
+    if output is not None:
+        parameters = dict(mix=weights, concurrency=concurrency, duration=duration, rate=rate, catalog_size=catalog_size)
+        with open(output, "w", encoding="utf-8") as stream:
+            json.dump({"parameters": parameters, "elapsed_s": elapsed, "commands": report}, stream, indent=2)
+
+
+if __name__ == "__main__":
+    typer.run(main)
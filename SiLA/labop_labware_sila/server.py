@@ -1,20 +1,52 @@
 # Generated by sila2.code_generator; sila2.__version__: 0.10.1
 
-from typing import Optional
+from typing import Any, Dict, List, Optional, Sequence, Tuple
 from uuid import UUID
 
-from sila2.server import SilaServer
+from labop_labware_ontology.labware_batch import LabwareDefinition
+from labop_labware_ontology.labware_service import LabwareService
+from labop_labware_ontology.metrics import MetricsRegistry
+from labop_labware_ontology.replication import Replica, ReplicationPublisher
+from sila2.framework import Feature
+from sila2.server import FeatureImplementationBase, SilaServer
 
+from .admission import DEFAULT_LIMITS, AdmissionController, AdmissionLimit
 from .feature_implementations.labwareautomationservice_impl import LabwareAutomationServiceImpl
+from .feature_implementations.labwaremetricsservice_impl import LabwareMetricsServiceImpl
 from .feature_implementations.labwareontologyservice_impl import LabwareOntologyServiceImpl
 from .feature_implementations.labwarequeryservice_impl import LabwareQueryServiceImpl
 from .generated.labwareautomationservice import LabwareAutomationServiceFeature
+from .generated.labwaremetricsservice import LabwareMetricsServiceFeature
 from .generated.labwareontologyservice import LabwareOntologyServiceFeature
 from .generated.labwarequeryservice import LabwareQueryServiceFeature
+from .instrumentation import CallMetrics, register_server_metrics
+
+# threads serving the calls, the admission limits keep some for subscriptions and the SiLAService
+GRPC_WORKERS = 100
+
+# write operations a read replica forwards to the writer process
+WRITE_OPERATIONS = ("create_labware", "create_labware_batch")
 
 
 class Server(SilaServer):
-    def __init__(self, server_uuid: Optional[UUID] = None):
+    def __init__(
+        self,
+        server_uuid: Optional[UUID] = None,
+        ontology_sources: Sequence[str] = (),
+        snapshot_path: Optional[str] = None,
+        wal_path: Optional[str] = None,
+        checkpoint_interval: float = 300.0,
+        writer_address: Optional[str] = None,
+        replica_address: Optional[str] = None,
+        replication_key: bytes = b"",
+        query_timeout: Optional[float] = 30.0,
+        query_row_budget: Optional[int] = 10_000_000,
+        admission_limits: Optional[Dict[str, AdmissionLimit]] = None,
+    ):
+        # metrics of this process (see instrumentation), the calls of all features (also SiLAService) are measured
+        self.metrics = MetricsRegistry()
+        self.call_metrics = CallMetrics(self.metrics)
+
         # TODO: fill in your server information
         super().__init__(
             server_name="TODO",
@@ -23,13 +55,92 @@ class Server(SilaServer):
             server_description="TODO",
             server_vendor_url="https://gitlab.com/SiLA2/sila_python",
             server_uuid=server_uuid,
+            max_grpc_workers=GRPC_WORKERS,
+        )
+
+        # the labware operations (see labop_labware_ontology.labware_service), the features are adapters to them;
+        # loads the compiled snapshot, parses the ontology sources only if it is missing or stale.
+        # The limits of SPARQL queries are the defaults, the time limit can be overridden by the client (QueryTimeout)
+        # on the streaming and prepared queries
+        self.service = LabwareService(
+            ontology_sources,
+            snapshot_path,
+            wal_path=wal_path if writer_address is None else None,
+            checkpoint_interval=checkpoint_interval,
+            query_timeout=query_timeout,
+            query_row_budget=query_row_budget,
         )
+        self.store = self.service.store
+        self.dimension_table = self.service.dimension_table
+        self.write_ahead_log = self.service.write_ahead_log
+
+        # a read replica (worker process of a multi-process server) forwards writes to the writer process
+        self.replica: Optional[Replica] = None
+        self.replication_publisher: Optional[ReplicationPublisher] = None
+        if writer_address is not None:
+            self.replica = Replica(self.store, writer_address, replication_key)
+        if replica_address is not None:
+            self.replication_publisher = ReplicationPublisher(
+                self.store, replica_address, replication_key, self._execute_forwarded
+            )
+
+        # classes of the calls, bounded so that a call of every class finds a gRPC thread
+        self.admission = AdmissionController({**DEFAULT_LIMITS, **(admission_limits or {})})
+        if self.admission.capacity >= GRPC_WORKERS:
+            raise ValueError(
+                f"the admission limits allow {self.admission.capacity} calls, more than the {GRPC_WORKERS} gRPC threads"
+            )
+
+        # caches are reported by name: hits, misses, entries (len) and invalidations if counted
+        self.caches: Dict[str, Any] = {"dimension_table": self.dimension_table}
+        if self.service.plan_cache is not None:
+            self.caches["query_plans"] = self.service.plan_cache
+        if self.service.result_cache is not None:
+            self.caches["query_results"] = self.service.result_cache
+        register_server_metrics(self.metrics, self)
 
         self.labwareautomationservice = LabwareAutomationServiceImpl(self)
         self.set_feature_implementation(LabwareAutomationServiceFeature, self.labwareautomationservice)
 
+        self.labwaremetricsservice = LabwareMetricsServiceImpl(self)
+        self.set_feature_implementation(LabwareMetricsServiceFeature, self.labwaremetricsservice)
+
         self.labwareontologyservice = LabwareOntologyServiceImpl(self)
         self.set_feature_implementation(LabwareOntologyServiceFeature, self.labwareontologyservice)
 
         self.labwarequeryservice = LabwareQueryServiceImpl(self)
         self.set_feature_implementation(LabwareQueryServiceFeature, self.labwarequeryservice)
+
+    def set_feature_implementation(self, feature: Feature, implementation: FeatureImplementationBase) -> None:
+        self.call_metrics.instrument(feature, implementation)
+        super().set_feature_implementation(feature, implementation)
+
+    def create_labware(self, name: str) -> None:
+        """creates a labware individual (in the writer process)"""
+        if self.replica is not None:
+            self.replica.call("create_labware", name)
+            return
+        self.service.create_labware(name)
+
+    def create_labware_batch(self, definitions: Sequence[LabwareDefinition]) -> List[Optional[str]]:
+        """creates labware individuals as one store update (in the writer process), see create_labware_batch"""
+        if self.replica is not None:
+            return self.replica.call("create_labware_batch", list(definitions))
+        return self.service.create_labware_batch(definitions)
+
+    def catalog_version(self) -> str:
+        """version of the labware catalog, the same in all worker processes once they are in sync"""
+        return self.service.catalog_version()
+
+    def _execute_forwarded(self, operation: str, args: Tuple[Any, ...]) -> Any:
+        if operation not in WRITE_OPERATIONS:
+            raise ValueError(f"unknown write operation '{operation}'")
+        return getattr(self, operation)(*args)
+
+    def stop(self, grace_period: Optional[float] = None) -> None:
+        super().stop(grace_period)
+        if self.replica is not None:
+            self.replica.close()
+        if self.replication_publisher is not None:
+            self.replication_publisher.close()
+        self.service.close()
@@ -0,0 +1,69 @@
+"""Multi-process serving: worker processes bound to the same port, one of them the writer
+
+The gRPC servers of all workers listen on the same address (SO_REUSEPORT, enabled by gRPC on Linux),
+the kernel distributes the connections among them. Every worker memory-maps the same compiled snapshot,
+so the ontology is in memory once. Worker 0 is the writer, the others are read replicas
+forwarding writes to it (see labop_labware_ontology.replication).
+"""
+
+import logging
+import multiprocessing
+import signal
+import time
+from multiprocessing.connection import wait
+from typing import Callable, List, Set
+
+logger = logging.getLogger(__name__)
+
+WRITER = 0
+
+
+def run_workers(count: int, serve: Callable[[int, Callable[[], None]], None], start_timeout: float = 120.0) -> int:
+    """forks worker processes and waits until they are stopped, returns an exit code
+
+    The writer (worker 0) is started first, the replicas after it serves.
+    SIGTERM is forwarded to all workers (SIGINT of a terminal reaches them anyway),
+    if one of them exits, all are stopped.
+
+    :param count: number of worker processes
+    :param serve: runs the server of a worker until it is stopped, gets the worker number
+        and a callback to call once the server serves
+    :param start_timeout: seconds to wait for the writer to serve
+    """
+    context = multiprocessing.get_context("fork")
+    started = context.Event()
+    processes: List[multiprocessing.Process] = []
+    terminated: Set[int] = set()
+
+    def stop(*args) -> None:
+        # once per worker, a second SIGTERM would interrupt its shutdown (e.g. the last checkpoint)
+        for number, process in enumerate(processes):
+            if number not in terminated and process.is_alive():
+                terminated.add(number)
+                process.terminate()
+
+    signal.signal(signal.SIGTERM, stop)
+    try:
+        processes.append(context.Process(target=serve, args=(WRITER, started.set), name="labware-writer"))
+        processes[WRITER].start()
+        deadline = time.monotonic() + start_timeout
+        while not started.wait(0.1):
+            if not processes[WRITER].is_alive() or time.monotonic() > deadline:
+                logger.error("the writer process did not start")
+                return 1
+        for number in range(1, count):
+            processes.append(
+                context.Process(target=serve, args=(number, lambda: None), name=f"labware-worker-{number}")
+            )
+            processes[number].start()
+        logger.info(f"Started {count} worker processes")
+
+        # a worker exiting (e.g. crashing) stops all others
+        wait([process.sentinel for process in processes])
+    except KeyboardInterrupt:
+        pass
+    finally:
+        stop()
+        for process in reversed(processes):
+            process.join()
+    return max((abs(process.exitcode or 0) for process in processes), default=0)
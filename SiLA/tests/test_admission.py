@@ -0,0 +1,93 @@
+#!/usr/bin/env python
+"""Tests for the admission control of the SiLA server."""
+
+# pylint: disable=wrong-import-position
+import threading
+
+import pytest
+
+pytest.importorskip("sila2")
+
+from labop_labware_sila.__main__ import parse_admission_limits
+from labop_labware_sila.admission import QUERY, WRITE, AdmissionController, AdmissionLimit
+from typer import BadParameter
+
+
+class Busy(Exception):
+    pass
+
+
+def test_waiting_call_gets_slot_of_finished_call():
+    """ a call waits while all slots of its class are taken, and runs when a running call finishes
+    """
+    controller = AdmissionController({QUERY: AdmissionLimit(concurrency=1, queue_size=1)})
+    release, entered = threading.Event(), threading.Event()
+    order = []
+
+    def first():
+        with controller.admit(QUERY, Busy):
+            entered.set()
+            release.wait()
+            order.append("first")
+
+    def second():
+        with controller.admit(QUERY, Busy):
+            order.append("second")
+
+    threads = [threading.Thread(target=first), threading.Thread(target=second)]
+    threads[0].start()
+    assert entered.wait(5)
+    threads[1].start()
+    while controller.stats()[QUERY]["waiting"] != 1:
+        threading.Event().wait(0.001)
+    assert order == []
+
+    release.set()
+    for thread in threads:
+        thread.join(5)
+    assert order == ["first", "second"]
+    assert controller.stats()[QUERY] == {"running": 0, "waiting": 0, "admitted": 2, "rejected": 0}
+
+
+def test_full_queue_rejects_calls():
+    """ calls beyond the concurrency and queue limits are rejected with the busy error, per class
+    """
+    controller = AdmissionController(
+        {QUERY: AdmissionLimit(concurrency=1, queue_size=0), WRITE: AdmissionLimit(concurrency=1, queue_size=0)}
+    )
+    assert controller.capacity == 2
+    with controller.admit(QUERY, Busy):
+        with pytest.raises(Busy):
+            with controller.admit(QUERY, Busy):
+                pass
+        # another class has its own slots
+        with controller.admit(WRITE, Busy):
+            stats = controller.stats()
+            assert stats[QUERY] == {"running": 1, "waiting": 0, "admitted": 1, "rejected": 1}
+            assert stats[WRITE] == {"running": 1, "waiting": 0, "admitted": 1, "rejected": 0}
+    with controller.admit(QUERY, Busy):
+        pass
+    assert controller.stats()[QUERY] == {"running": 0, "waiting": 0, "admitted": 2, "rejected": 1}
+
+
+def test_slot_released_on_error():
+    """ a call failing with an exception frees its slot
+    """
+    controller = AdmissionController({QUERY: AdmissionLimit(concurrency=1, queue_size=0)})
+    with pytest.raises(KeyError):
+        with controller.admit(QUERY, Busy):
+            raise KeyError("lookup")
+    assert controller.stats()[QUERY]["running"] == 0
+
+
+def test_parse_admission_limits():
+    """ CLASS=CONCURRENCY:QUEUE_SIZE options are parsed, invalid ones rejected
+    """
+    assert parse_admission_limits(["query=4:8", "write=1:0"]) == {
+        QUERY: AdmissionLimit(4, 8),
+        WRITE: AdmissionLimit(1, 0),
+    }
+    assert parse_admission_limits([]) == {}
+    for option in ["query=4", "query=0:8", "query=-1:8", "query=a:8", "query=4:x", "lookups=4:8", "query"]:
+        with pytest.raises(BadParameter):
+            parse_admission_limits([option])
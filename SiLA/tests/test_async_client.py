@@ -0,0 +1,143 @@
+#!/usr/bin/env python
+"""Tests for the asyncio client, on a fake gRPC stub."""
+
+# pylint: disable=protected-access,redefined-outer-name,wrong-import-position
+import asyncio
+from base64 import standard_b64encode
+
+import pytest
+
+pytest.importorskip("sila2")
+
+import grpc
+from labop_labware_sila.async_client import AsyncClient
+from labop_labware_sila.generated.labwarequeryservice import InvalidQuery, LabwareQueryServiceFeature
+from sila2.framework import Command
+
+
+def command(identifier: str) -> Command:
+    return LabwareQueryServiceFeature[identifier]
+
+
+class SilaRpcError(grpc.RpcError):
+    """the RpcError of a server raising a defined execution error"""
+
+    def __init__(self, error: Exception) -> None:
+        super().__init__()
+        self._details = standard_b64encode(error.to_message().SerializeToString()).decode("ascii")
+
+    def code(self) -> grpc.StatusCode:
+        return grpc.StatusCode.ABORTED
+
+    def details(self) -> str:
+        return self._details
+
+
+class Stream:
+    """server stream of a fake stub"""
+
+    def __init__(self, messages) -> None:
+        self.messages = messages
+        self.cancelled = False
+
+    async def __aiter__(self):
+        for message in self.messages:
+            yield message
+
+    def cancel(self) -> None:
+        self.cancelled = True
+
+
+class FakeStub:
+    """LabwareQueryService stub recording the requests"""
+
+    def __init__(self, pb2) -> None:
+        self.pb2 = pb2
+        self.requests = []
+
+    async def SPARQLQuery(self, message, metadata=()):
+        self.requests.append(message)
+        if message.Query.value == "SELECT":
+            raise SilaRpcError(InvalidQuery("expected a variable"))
+        return command("SPARQLQuery").responses.to_message('{"results": {"bindings": []}}')
+
+    async def SPARQLQueryStream(self, message, metadata=()):
+        self.requests.append(message)
+        framework = self.pb2.SiLAFramework__pb2
+        return framework.CommandConfirmation(commandExecutionUUID=framework.CommandExecutionUUID(value="uuid-1"))
+
+    def SPARQLQueryStream_Intermediate(self, uuid):
+        intermediate = command("SPARQLQueryStream").intermediate_responses
+        return Stream([intermediate.to_message(f"chunk {index}") for index in range(2)])
+
+    def SPARQLQueryStream_Info(self, uuid):
+        return Stream([self.pb2.SiLAFramework__pb2.ExecutionInfo()])
+
+    async def SPARQLQueryStream_Result(self, uuid, metadata=()):
+        return command("SPARQLQueryStream").responses.to_message(2)
+
+
+class RecordedParameters:
+    """the parameters of a command, recording the keyword arguments of to_message"""
+
+    def __init__(self, parameters) -> None:
+        self.parameters = parameters
+        self.calls = []
+
+    def to_message(self, *args, **kwargs):
+        self.calls.append(kwargs)
+        return self.parameters.to_message(*args, **kwargs)
+
+
+@pytest.fixture
+def recorded(monkeypatch):
+    """the recorded parameters of the two query commands"""
+    parameters = {}
+    for identifier in ("SPARQLQuery", "SPARQLQueryStream"):
+        parameters[identifier] = RecordedParameters(command(identifier).parameters)
+        monkeypatch.setattr(command(identifier), "parameters", parameters[identifier])
+    return parameters
+
+
+def run(test) -> None:
+    async def main():
+        async with AsyncClient("127.0.0.1", 1, insecure=True) as client:
+            service = client.LabwareQueryService
+            service._stub = FakeStub(service._pb2)
+            await test(service)
+
+    asyncio.run(main())
+
+
+def test_unobservable_command(recorded):
+    """ parameters are sent as the message of the command, responses and defined errors are converted
+    """
+
+    async def test(service):
+        responses = await service.SPARQLQuery("SELECT ?x { ?x ?p ?o }")
+        assert responses.Results == '{"results": {"bindings": []}}'
+        parameters = recorded["SPARQLQuery"].parameters
+        assert service._stub.requests == [parameters.to_message("SELECT ?x { ?x ?p ?o }")]
+        assert recorded["SPARQLQuery"].calls == [{"toplevel_named_data_node": recorded["SPARQLQuery"]}]
+        with pytest.raises(InvalidQuery, match="expected a variable"):
+            await service.SPARQLQuery("SELECT")
+
+    run(test)
+
+
+def test_observable_command(recorded):
+    """ starting a command gives its instance, with the intermediate responses and the result
+    """
+
+    async def test(service):
+        instance = await service.SPARQLQueryStream("SELECT ?x { ?x ?p ?o }")
+        assert instance.execution_uuid == "uuid-1"
+        parameters = recorded["SPARQLQueryStream"].parameters
+        assert service._stub.requests == [parameters.to_message("SELECT ?x { ?x ?p ?o }")]
+        assert recorded["SPARQLQueryStream"].calls == [{"toplevel_named_data_node": recorded["SPARQLQueryStream"]}]
+        assert [response.Results async for response in instance] == ["chunk 0", "chunk 1"]
+        assert (await instance.result()).RowCount == 2
+        instance.cancel()
+        assert instance._intermediate.cancelled
+
+    run(test)
@@ -0,0 +1,119 @@
+#!/usr/bin/env python
+"""Tests for the dimensions cache of the caching client."""
+
+# pylint: disable=redefined-outer-name,wrong-import-position
+import pytest
+
+pytest.importorskip("sila2")
+
+from labop_labware_ontology.labware_index import normalize_key
+from labop_labware_sila.caching_client import CachingLabwareAutomationServiceClient, DimensionsCache
+
+
+class Clock:
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class Property:
+    def __init__(self, value: str) -> None:
+        self.value = value
+
+    def get(self) -> str:
+        return self.value
+
+
+class Response:
+    def __init__(self, **fields) -> None:
+        self.__dict__.update(fields)
+
+
+class FakeService:
+    """LabwareAutomationService client with a catalog of dimensions, counting the calls"""
+
+    def __init__(self) -> None:
+        self.catalog = {normalize_key("Corning", "3635"): '{"height": 14.2}'}
+        self.CatalogVersion = Property("1")
+        self.calls = 0
+
+    def GetLabwareDimensions(self, Vendor, ProductNumber):
+        self.calls += 1
+        return Response(Dimensions=self.catalog[normalize_key(Vendor, ProductNumber)])
+
+    def GetLabwareDimensionsBatch(self, Labware):
+        self.calls += 1
+        results = [self.catalog.get(normalize_key(*item)) for item in Labware]
+        return Response(Dimensions=[(result is not None, result or "") for result in results])
+
+
+@pytest.fixture
+def clock():
+    return Clock()
+
+
+def test_lru_eviction(clock):
+    """ the least recently used entry is evicted when the cache is full
+    """
+    cache = DimensionsCache(2, None, clock)
+    cache.put(("a", "1"), "A")
+    cache.put(("b", "2"), "B")
+    assert cache.get(("a", "1")) == "A"
+    cache.put(("c", "3"), "C")
+    assert len(cache) == 2
+    assert cache.get(("b", "2")) is None
+    assert cache.get(("a", "1")) == "A" and cache.get(("c", "3")) == "C"
+    assert (cache.hits, cache.misses) == (3, 1)
+
+
+def test_ttl_expiry(clock):
+    """ entries are not used after their TTL, without a TTL they do not expire
+    """
+    cache = DimensionsCache(10, 60.0, clock)
+    cache.put(("a", "1"), "A")
+    clock.now = 60.0
+    assert cache.get(("a", "1")) == "A"
+    clock.now = 60.5
+    assert cache.get(("a", "1")) is None
+
+    cache = DimensionsCache(10, None, clock)
+    cache.put(("a", "1"), "A")
+    clock.now = 1e9
+    assert cache.get(("a", "1")) == "A"
+
+
+def test_catalog_version_invalidation(clock):
+    """ the cache is dropped when the catalog version changed, checked at most every validate_interval
+    """
+    service = FakeService()
+    client = CachingLabwareAutomationServiceClient(service, DimensionsCache(10, None, clock), validate_interval=1.0)
+    assert client.GetLabwareDimensions("Corning", "3635").Dimensions == '{"height": 14.2}'
+    assert client.GetLabwareDimensions("corning ", "36 35").Dimensions == '{"height": 14.2}'
+    assert service.calls == 1
+
+    service.catalog[normalize_key("Corning", "3635")] = '{"height": 15.0}'
+    service.CatalogVersion.value = "2"
+    clock.now = 0.5
+    # not checked yet, the cached entry is used
+    assert client.GetLabwareDimensions("Corning", "3635").Dimensions == '{"height": 14.2}'
+    clock.now = 1.0
+    assert client.GetLabwareDimensions("Corning", "3635").Dimensions == '{"height": 15.0}'
+    assert client.cache.invalidations == 1 and service.calls == 2
+
+
+def test_batch_fetches_missing_only(clock):
+    """ a batch lookup fetches the labware not in the cache with one call, unknown labware is not cached
+    """
+    service = FakeService()
+    service.catalog[normalize_key("Nunc", "1")] = '{"height": 10.0}'
+    client = CachingLabwareAutomationServiceClient(service, DimensionsCache(10, None, clock), validate_interval=None)
+    client.GetLabwareDimensions("Corning", "3635")
+    response = client.GetLabwareDimensionsBatch([("Corning", "3635"), ("Nunc", "1"), ("nobody", "0")])
+    assert [(result.Found, result.Dimensions) for result in response.Dimensions] == [
+        (True, '{"height": 14.2}'),
+        (True, '{"height": 10.0}'),
+        (False, ""),
+    ]
+    assert service.calls == 2 and len(client.cache) == 2
@@ -0,0 +1,53 @@
+#!/usr/bin/env python
+"""Tests for the defined execution errors of the generated client."""
+
+# pylint: disable=protected-access,wrong-import-position
+from typing import Any, List, get_type_hints
+
+import pytest
+
+pytest.importorskip("sila2")
+
+from labop_labware_sila.generated import labwareautomationservice, labwareontologyservice, labwarequeryservice
+from labop_labware_sila.generated.client import Client
+from sila2.client import SilaClient
+
+
+def test_errors_registered_per_feature(monkeypatch):
+    """ the errors of each feature are raised as its own classes, also errors of the same name in several features
+    """
+
+    def connect(client, *args, **kwargs):
+        # the error registry of SilaClient, without connecting to a server
+        client._registered_defined_execution_error_classes = {}
+
+    monkeypatch.setattr(SilaClient, "__init__", connect)
+    registered = Client("127.0.0.1", 1, insecure=True)._registered_defined_execution_error_classes
+
+    features = [
+        (labwareautomationservice, labwareautomationservice.LabwareAutomationServiceFeature),
+        (labwareontologyservice, labwareontologyservice.LabwareOntologyServiceFeature),
+        (labwarequeryservice, labwarequeryservice.LabwareQueryServiceFeature),
+    ]
+    for module, feature in features:
+        for name, error in feature.defined_execution_errors.items():
+            assert registered[error.fully_qualified_identifier] is getattr(module, name)
+    busy = {
+        registered[feature.defined_execution_errors["ServerBusy"].fully_qualified_identifier] for _, feature in features
+    }
+    assert len(busy) == 3
+
+
+def test_annotations_resolve():
+    """ the annotations of the generated clients and base classes name types that are imported
+    """
+    feature = labwareautomationservice
+    for stub in (feature.LabwareAutomationServiceClient, feature.LabwareAutomationServiceBase):
+        assert get_type_hints(stub.GetLabwareDimensionsBatch)["Labware"] == List[Any]
+    feature = labwareontologyservice
+    for stub in (feature.LabwareOntologyServiceClient, feature.LabwareOntologyServiceBase):
+        assert get_type_hints(stub.CreateLabwareBatch)["Labware"] == List[Any]
+    feature = labwarequeryservice
+    for stub in (feature.LabwareQueryServiceClient, feature.LabwareQueryServiceBase):
+        assert get_type_hints(stub.ExecutePrepared)["Bindings"] == List[Any]
+        assert get_type_hints(stub.ExecutePreparedBatch)["BindingSets"] == List[Any]
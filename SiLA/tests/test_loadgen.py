@@ -0,0 +1,70 @@
+#!/usr/bin/env python
+"""Tests for the aggregation of the load generator."""
+
+# pylint: disable=wrong-import-position
+import pytest
+
+pytest.importorskip("sila2")
+
+from labop_labware_sila.loadgen import Recorder, format_report, parse_mix, percentile, summarize
+from typer import BadParameter
+
+
+def test_percentile():
+    """ a percentile is the latency of the call at the fraction of the sorted calls
+    """
+    latencies = [float(value) for value in range(1, 101)]
+    assert percentile(latencies, 0.5) == 51.0
+    assert percentile(latencies, 0.95) == 96.0
+    assert percentile(latencies, 0.99) == 100.0
+    assert percentile(latencies, 1.0) == 100.0
+    assert percentile([0.25], 0.99) == 0.25
+
+
+def test_summarize():
+    """ calls, errors by type, throughput and percentiles per command and in total
+    """
+    latencies = {"lookup": [0.004, 0.001, 0.002, 0.003], "query": [0.1, 0.2], "create": []}
+    errors = {"query": {"ServerBusy": 1}, "lookup": {"ServerBusy": 2, "UnknownLabware": 1}}
+    report = summarize(latencies, errors, elapsed=2.0)
+
+    assert list(report) == ["lookup", "query", "total"]
+    lookup = report["lookup"]
+    assert (lookup["calls"], lookup["errors"], lookup["throughput_per_s"]) == (4, 3, 2.0)
+    assert lookup["error_types"] == {"ServerBusy": 2, "UnknownLabware": 1}
+    assert lookup["p50_ms"] == pytest.approx(3.0) and lookup["max_ms"] == pytest.approx(4.0)
+    total = report["total"]
+    assert (total["calls"], total["errors"]) == (6, 4)
+    assert total["error_types"] == {"ServerBusy": 3, "UnknownLabware": 1}
+    assert total["p99_ms"] == pytest.approx(200.0)
+    assert summarize({}, {}, elapsed=1.0) == {}
+
+
+def test_format_report():
+    """ the error types are printed below their command, the most frequent first
+    """
+    report = summarize({"lookup": [0.001, 0.002]}, {"lookup": {"ServerBusy": 1, "SilaConnectionError": 2}}, 1.0)
+    lines = format_report(report)
+    assert lines[0].split()[:4] == ["command", "calls", "errors", "calls/s"]
+    assert lines[1].split()[:3] == ["lookup", "2", "3"]
+    assert lines[2].strip() == "errors: SilaConnectionError 2, ServerBusy 1"
+    assert lines[3].split()[0] == "total" and len(lines) == 5
+
+
+def test_recorder():
+    """ recorded calls are summarized per command
+    """
+    recorder = Recorder()
+    recorder.record("lookup", 0.001, None)
+    recorder.record("lookup", 0.003, "ServerBusy")
+    report = recorder.report(elapsed=1.0)
+    assert report["lookup"]["calls"] == 2 and report["lookup"]["error_types"] == {"ServerBusy": 1}
+
+
+def test_parse_mix():
+    """ the mix gives the weight of each command, invalid mixes are rejected
+    """
+    assert parse_mix("lookup=90,query=8,create=2") == {"lookup": 90.0, "query": 8.0, "create": 2.0}
+    for mix in ["lookup", "lookup=x", "read=1", "lookup=-1", "lookup=0"]:
+        with pytest.raises(BadParameter):
+            parse_mix(mix)
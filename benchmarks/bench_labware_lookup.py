@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""_____________________________________________________________________
+
+:PROJECT: LabOP Labware Ontology
+
+* Benchmark of the (vendor, product number) lookup *
+
+:details: Lookup latency of GetLabwareDimensions for stores with increasing numbers of labware individuals:
+          LabwareService.dimensions on the memory-mapped snapshot of the store, as served by the feature
+          (index probe on the pinned store version + row of the dimension table).
+          The latency should stay flat over the store size.
+
+          python benchmarks/bench_labware_lookup.py --sizes 1000 10000 100000 1000000
+
+.. note:: -
+.. todo:: -
+________________________________________________________________________
+"""
+
+import argparse
+import json
+import multiprocessing
+import os
+import random
+import tempfile
+import time
+
+from labop_labware_ontology.labware import DIMENSION_PROPERTIES, PRODUCT_NUMBER, VENDOR
+from labop_labware_ontology.labware_index import LabwareIndex
+from labop_labware_ontology.labware_service import LabwareService
+from labop_labware_ontology.namespaces import LABWARE
+from labop_labware_ontology.rdf_terms import iri, literal
+from labop_labware_ontology.snapshot import write_snapshot
+from labop_labware_ontology.triple_store import TripleStore
+
+VENDORS = ["Greiner Bio-One", "Corning", "Eppendorf", "Thermo Fisher Scientific", "Sarstedt", "Nunc"]
+
+
+def build_store(size: int) -> TripleStore:
+    store = TripleStore()
+    vendors = [literal(vendor) for vendor in VENDORS]
+    length, width = DIMENSION_PROPERTIES["length"], DIMENSION_PROPERTIES["width"]
+    for index in range(size):
+        labware = iri(LABWARE.term(f"labware_{index}"))
+        store.add(labware, VENDOR, vendors[index % len(vendors)])
+        store.add(labware, PRODUCT_NUMBER, literal(f"P{index:08d}"))
+        store.add(labware, length, literal(127.76))
+        store.add(labware, width, literal(85.48))
+    return store
+
+
+def compile_store(size: int, path: str) -> None:
+    """writes the snapshot of a store of the given size"""
+    store = build_store(size)
+    write_snapshot(path, store, LabwareIndex(store), source_hash="")
+
+
+def measure_lookups(service: LabwareService, size: int, lookups: int) -> dict:
+    rng = random.Random(size)
+    keys = []
+    for _ in range(lookups):
+        number = rng.randrange(size)
+        keys.append((VENDORS[number % len(VENDORS)], f"P{number:08d}"))
+    latencies = []
+    for vendor, product_number in keys:
+        start = time.perf_counter()
+        json.dumps(service.dimensions(vendor, product_number))
+        latencies.append(time.perf_counter() - start)
+    latencies.sort()
+    return {
+        "size": size,
+        "lookups": lookups,
+        "mean_us": sum(latencies) / lookups * 1e6,
+        "p50_us": latencies[lookups // 2] * 1e6,
+        "p99_us": latencies[int(lookups * 0.99)] * 1e6,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("*")[1].strip())
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1_000, 10_000, 100_000, 1_000_000])
+    parser.add_argument("--lookups", type=int, default=10_000)
+    args = parser.parse_args()
+
+    print(f"{'individuals':>12} {'mean [us]':>10} {'p50 [us]':>10} {'p99 [us]':>10}")
+    for size in args.sizes:
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, f"labware-{size}.snapshot")
+            # built in its own process, only the memory-mapped snapshot is in the measuring process (like a server)
+            process = multiprocessing.Process(target=compile_store, args=(size, path))
+            process.start()
+            process.join()
+            if process.exitcode != 0:
+                raise SystemExit(f"building the store of {size} labware individuals failed")
+            with LabwareService(snapshot_path=path) as service:
+                result = measure_lookups(service, size, args.lookups)
+        print(f"{size:>12} {result['mean_us']:>10.2f} {result['p50_us']:>10.2f} {result['p99_us']:>10.2f}")
+
+
+if __name__ == "__main__":
+    main()
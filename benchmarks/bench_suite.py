@@ -0,0 +1,282 @@
+#!/usr/bin/env python3
+"""_____________________________________________________________________
+
+:PROJECT: LabOP Labware Ontology
+
+* Benchmark suite on synthetic labware catalogs *
+
+:details: For synthetic catalogs (labop_labware_ontology.synthetic_catalog) of increasing size:
+
+          - compile time (parsing the N-Triples source into a snapshot), snapshot size
+          - load time of the snapshot and resident memory after loading
+          - GetLabwareDimensions lookup latency, latency of representative SPARQL queries
+            and CreateLabware throughput - in-process and through the generated SiLA client
+            of a local server (skipped with --no-client or if labop_labware_sila is not installed)
+
+          Every size is measured in its own process, so memory and caches do not carry over.
+          The results are written as JSON (--output) to compare releases.
+
+          python benchmarks/bench_suite.py --sizes 1000 10000 100000 1000000 --output results.json
+
+.. note:: -
+.. todo:: -
+________________________________________________________________________
+"""
+
+import argparse
+import json
+import multiprocessing
+import os
+import platform
+import random
+import resource
+import socket
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timezone
+from typing import Callable, Dict, List, Sequence, Tuple
+
+from labop_labware_ontology import __version__
+from labop_labware_ontology.labware_batch import LabwareDefinition
+from labop_labware_ontology.labware_service import LabwareService
+from labop_labware_ontology.snapshot import compile_snapshot
+from labop_labware_ontology.synthetic_catalog import generate_catalog, write_catalog
+
+# name -> query, from a key lookup to a scan of the whole catalog
+QUERIES = {
+    "key_lookup": "SELECT ?x ?height { ?x lw:vendor 'Corning' ; lw:productNumber 'CLS0000001' ; lw:height ?height }",
+    "class_limit": "SELECT ?x ?label { ?x a lw:TipRack ; rdfs:label ?label } LIMIT 100",
+    "join": "SELECT ?x ?label { ?x lw:wellCount 1536 ; lw:vendor 'Nunc' ; rdfs:label ?label }",
+    "ask": "ASK { ?x a lw:Reservoir ; lw:wellCount 12 }",
+    "subclass_instances": "SELECT ?x ?label { ?x a/rdfs:subClassOf+ lw:Tube ; rdfs:label ?label } LIMIT 100",
+    "distinct_vendors": "SELECT DISTINCT ?vendor { ?x lw:vendor ?vendor }",
+}
+
+
+def latency_stats(latencies: List[float]) -> Dict[str, float]:
+    latencies = sorted(latencies)
+    count = len(latencies)
+    return {
+        "count": count,
+        "mean_us": sum(latencies) / count * 1e6,
+        "p50_us": latencies[count // 2] * 1e6,
+        "p95_us": latencies[int(count * 0.95)] * 1e6,
+        "p99_us": latencies[int(count * 0.99)] * 1e6,
+        "max_us": latencies[-1] * 1e6,
+    }
+
+
+def rss_bytes() -> int:
+    """current resident set size, the peak if the current one is not available"""
+    try:
+        with open("/proc/self/statm") as statm:
+            return int(statm.read().split()[1]) * resource.getpagesize()
+    except OSError:
+        scale = 1 if sys.platform == "darwin" else 1024
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * scale
+
+
+def sample_keys(size: int, count: int) -> List[Tuple[str, str]]:
+    """(vendor, product number) of random entries of the catalog"""
+    rng = random.Random(size)
+    wanted = {rng.randrange(size) for _ in range(count)}
+    keys = [
+        (entry.definition.vendor, entry.definition.product_number)
+        for number, entry in enumerate(generate_catalog(size))
+        if number in wanted
+    ]
+    return [rng.choice(keys) for _ in range(count)]
+
+
+def new_definitions(count: int, prefix: str) -> List[LabwareDefinition]:
+    """definitions of labware not in any catalog"""
+    return [
+        definition._replace(name=f"{prefix} {definition.name}", vendor=f"{prefix} {definition.vendor}")
+        for definition, _ in generate_catalog(count, seed=1)
+    ]
+
+
+def measure(run: Callable[[], object], repeats: int) -> List[float]:
+    latencies = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        run()
+        latencies.append(time.perf_counter() - start)
+    return latencies
+
+
+def compile_catalog(size: int, directory: str) -> dict:
+    """writes the catalog and compiles it into a snapshot"""
+    source = os.path.join(directory, f"catalog-{size}.nt")
+    with open(source, "w", encoding="utf-8") as stream:
+        triples = write_catalog(stream, size)
+    start = time.perf_counter()
+    compile_snapshot([source], source + ".snapshot")
+    compile_s = time.perf_counter() - start
+    return {
+        "triples": triples,
+        "source_bytes": os.path.getsize(source),
+        "compile_s": compile_s,
+        "snapshot_bytes": os.path.getsize(source + ".snapshot"),
+    }
+
+
+def measure_in_process(size: int, directory: str, args: argparse.Namespace) -> dict:
+    """loads the snapshot and measures lookups, queries and creates without a server (embedded LabwareService)"""
+    source = os.path.join(directory, f"catalog-{size}.nt")
+    rss_before = rss_bytes()
+    start = time.perf_counter()
+    service = LabwareService([source], source + ".snapshot")
+    load_s = time.perf_counter() - start
+    rss_loaded = rss_bytes()
+    results: dict = {"load_s": load_s, "rss_bytes": rss_loaded, "rss_load_bytes": rss_loaded - rss_before}
+
+    keys = iter(sample_keys(size, args.lookups))
+    results["lookup"] = latency_stats(measure(lambda: json.dumps(service.dimensions(*next(keys))), args.lookups))
+
+    results["queries"] = {}
+    for name, query in QUERIES.items():
+        results["queries"][name] = latency_stats(measure(lambda: service.query(query).to_json(), args.query_repeats))
+
+    # CreateLabware: one store update per labware
+    names = iter(definition.name for definition in new_definitions(args.creates, "single"))
+    elapsed = sum(measure(lambda: service.create_labware(next(names)), args.creates))
+    results["create_per_s"] = args.creates / elapsed
+
+    batch = new_definitions(args.batch_size, "batch")
+    start = time.perf_counter()
+    service.create_labware_batch(batch)
+    results["create_batch_per_s"] = args.batch_size / (time.perf_counter() - start)
+    return results
+
+
+def free_port() -> int:
+    with socket.socket() as probe:
+        probe.bind(("127.0.0.1", 0))
+        return probe.getsockname()[1]
+
+
+def measure_client(size: int, directory: str, args: argparse.Namespace) -> dict:
+    """starts a local insecure server on the snapshot and measures through the generated client"""
+    from labop_labware_sila.generated.client import Client
+    from labop_labware_sila.server import Server
+
+    source = os.path.join(directory, f"catalog-{size}.nt")
+    server = Server(ontology_sources=[source], snapshot_path=source + ".snapshot")
+    port = free_port()
+    server.start_insecure("127.0.0.1", port, enable_discovery=False)
+    try:
+        client = Client("127.0.0.1", port, insecure=True)
+        results: dict = {"rss_bytes": rss_bytes()}
+
+        keys = iter(sample_keys(size, args.client_lookups))
+        automation = client.LabwareAutomationService
+        results["lookup"] = latency_stats(
+            measure(lambda: automation.GetLabwareDimensions(*next(keys)), args.client_lookups)
+        )
+
+        query_service = client.LabwareQueryService
+        results["queries"] = {}
+        for name, query in QUERIES.items():
+            results["queries"][name] = latency_stats(
+                measure(lambda: query_service.SPARQLQuery(query), args.query_repeats)
+            )
+
+        names = iter(definition.name for definition in new_definitions(args.client_creates, "client"))
+        ontology_service = client.LabwareOntologyService
+        elapsed = sum(measure(lambda: ontology_service.CreateLabware(next(names)), args.client_creates))
+        results["create_per_s"] = args.client_creates / elapsed
+
+        batch = [
+            (definition.name, definition.vendor, definition.product_number, json.dumps(definition.dimensions))
+            for definition in new_definitions(args.batch_size, "client batch")
+        ]
+        start = time.perf_counter()
+        ontology_service.CreateLabwareBatch(batch)
+        results["create_batch_per_s"] = args.batch_size / (time.perf_counter() - start)
+        return results
+    finally:
+        server.stop()
+
+
+def run_in_process(function: Callable, *args) -> dict:
+    """runs a measurement in a new process"""
+    with ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context("fork")) as executor:
+        return executor.submit(function, *args).result()
+
+
+def client_available() -> bool:
+    try:
+        import labop_labware_sila.server  # noqa: F401 pylint: disable=import-outside-toplevel,unused-import
+    except ImportError:
+        return False
+    return True
+
+
+def benchmark(sizes: Sequence[int], args: argparse.Namespace) -> dict:
+    with_client = not args.no_client and client_available()
+    if not args.no_client and not with_client:
+        print("labop_labware_sila is not installed, skipping the client measurements", file=sys.stderr)
+    results = []
+    for size in sizes:
+        with tempfile.TemporaryDirectory() as directory:
+            result: dict = {"size": size, **run_in_process(compile_catalog, size, directory)}
+            result["in_process"] = run_in_process(measure_in_process, size, directory, args)
+            if with_client:
+                result["client"] = run_in_process(measure_client, size, directory, args)
+        results.append(result)
+        print_result(result)
+    return {
+        "benchmark": "bench_suite",
+        "version": __version__,
+        "date": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+        "parameters": {key: value for key, value in vars(args).items() if key != "output"},
+        "results": results,
+    }
+
+
+def print_result(result: dict) -> None:
+    in_process = result["in_process"]
+    print(
+        f"{result['size']:>9} labware: {result['triples']} triples, compiled in {result['compile_s']:.2f} s, "
+        f"snapshot {result['snapshot_bytes'] / 2**20:.1f} MiB, loaded in {in_process['load_s'] * 1000:.1f} ms, "
+        f"RSS {in_process['rss_bytes'] / 2**20:.0f} MiB"
+    )
+    for mode in ("in_process", "client"):
+        if mode not in result:
+            continue
+        measured = result[mode]
+        queries = ", ".join(f"{name} {stats['p50_us'] / 1000:.2f}" for name, stats in measured["queries"].items())
+        print(
+            f"{'':>9} {mode:>10}: lookup p50 {measured['lookup']['p50_us']:.1f} us "
+            f"p99 {measured['lookup']['p99_us']:.1f} us, creates {measured['create_per_s']:.0f}/s "
+            f"(batch {measured['create_batch_per_s']:.0f}/s), query p50 [ms]: {queries}"
+        )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("*")[1].strip())
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1_000, 10_000, 100_000])
+    parser.add_argument("--lookups", type=int, default=10_000)
+    parser.add_argument("--query-repeats", type=int, default=20)
+    parser.add_argument("--creates", type=int, default=2_000)
+    parser.add_argument("--batch-size", type=int, default=1_000)
+    parser.add_argument("--client-lookups", type=int, default=1_000)
+    parser.add_argument("--client-creates", type=int, default=200)
+    parser.add_argument("--no-client", action="store_true", help="only measure in-process")
+    parser.add_argument("--output", help="file to write the results to as JSON")
+    args = parser.parse_args()
+
+    report = benchmark(args.sizes, args)
+    if args.output is not None:
+        with open(args.output, "w", encoding="utf-8") as stream:
+            json.dump(report, stream, indent=2)
+
+
+if __name__ == "__main__":
+    main()
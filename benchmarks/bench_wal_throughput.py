@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""_____________________________________________________________________
+
+:PROJECT: LabOP Labware Ontology
+
+* Benchmark of the CreateLabware write throughput with write-ahead log *
+
+:details: Durable creates per second for an increasing number of concurrent writers.
+          Every create is one store update under the write lock, logged and synced like in the SiLA server.
+          With group commit the number of fsyncs per create drops as writers are added.
+
+          python benchmarks/bench_wal_throughput.py --writers 1 4 16 --creates 2000
+
+.. note:: -
+.. todo:: -
+________________________________________________________________________
+"""
+
+import argparse
+import os
+import tempfile
+import threading
+import time
+
+from labop_labware_ontology.labware import labware_iri
+from labop_labware_ontology.namespaces import LABWARE, RDF, RDFS
+from labop_labware_ontology.rdf_terms import iri, literal
+from labop_labware_ontology.triple_store import TripleStore
+from labop_labware_ontology.write_ahead_log import WriteAheadLog
+
+
+def measure_writes(writers: int, creates: int, sync: bool) -> dict:
+    fsyncs = [0]
+    original_fsync = os.fsync
+
+    def counting_fsync(fd: int) -> None:
+        fsyncs[0] += 1
+        original_fsync(fd)
+
+    with tempfile.TemporaryDirectory() as directory:
+        store = TripleStore()
+        log = WriteAheadLog(os.path.join(directory, "labware.wal"), sync=sync)
+        log.attach(store)
+        write_lock = threading.Lock()
+
+        def write(writer: int) -> None:
+            for number in range(creates // writers):
+                name = f"labware {writer} {number}"
+                with write_lock:
+                    store.add_all(
+                        [
+                            (labware_iri(name), iri(RDF.type), iri(LABWARE.Labware)),
+                            (labware_iri(name), iri(RDFS.label), literal(name)),
+                        ]
+                    )
+                    lsn = log.last_lsn
+                log.sync(lsn)
+
+        threads = [threading.Thread(target=write, args=(writer,)) for writer in range(writers)]
+        os.fsync = counting_fsync
+        try:
+            start = time.perf_counter()
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+            elapsed = time.perf_counter() - start
+        finally:
+            os.fsync = original_fsync
+        log.close()
+    done = creates // writers * writers
+    return {
+        "writers": writers,
+        "creates": done,
+        "creates_per_s": done / elapsed,
+        "fsyncs": fsyncs[0],
+        "creates_per_fsync": done / max(fsyncs[0], 1),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("*")[1].strip())
+    parser.add_argument("--writers", type=int, nargs="+", default=[1, 4, 16, 64])
+    parser.add_argument("--creates", type=int, default=2_000)
+    parser.add_argument("--no-sync", action="store_true", help="skip fsync (measures the logging overhead only)")
+    args = parser.parse_args()
+
+    print(f"{'writers':>8} {'creates/s':>10} {'fsyncs':>8} {'creates/fsync':>14}")
+    for writers in args.writers:
+        result = measure_writes(writers, args.creates, not args.no_sync)
+        print(
+            f"{writers:>8} {result['creates_per_s']:>10.0f} {result['fsyncs']:>8} {result['creates_per_fsync']:>14.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -6,68 +6,244 @@
 
 * Main module command line interface *
 
-:details:  Main module command line interface. 
-           !!! Warning: it should have a diffent name than the package name.
+:details:  Offline access to a compiled labware snapshot, without a server:
+
+           python -m labop_labware_ontology compile labware.nt -o labware.snapshot
+           python -m labop_labware_ontology lookup labware.snapshot Corning 3596
+           cut -f 2,3 deck.tsv | python -m labop_labware_ontology lookup labware.snapshot
+           python -m labop_labware_ontology query labware.snapshot "SELECT ?x { ?x a lw:TipRack }" --format tsv
+           python -m labop_labware_ontology stats labware.snapshot
+
+           Without VENDOR and PRODUCT_NUMBER, lookup reads one "VENDOR<TAB>PRODUCT_NUMBER" per line from stdin
+           and writes "VENDOR<TAB>PRODUCT_NUMBER<TAB>DIMENSIONS" (JSON, null for unknown labware).
+           The store and the query engine are only imported by the subcommands, so --help and --version stay fast.
 
 .. note:: -
-.. todo:: - 
+.. todo:: -
 ________________________________________________________________________
 """
 
-"""Main module implementation. !!! Warning: it should have a diffent name than the package name. """
-"""Console script for labop_labware_ontology."""
-
 import argparse
-import sys
+import json
 import logging
-from .__init__ import __version__
+import os
+import sys
+from typing import Iterable, Iterator, List, Optional, Tuple
+
+from . import __version__
+
+# stdin lines looked up together
+LOOKUP_BATCH_SIZE = 1000
+
+# exit codes: unknown labware / query aborted, invalid input
+EXIT_NOT_FOUND = 1
+EXIT_INVALID = 2
+
+
+def parse_command_line(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    """Looking for command line arguments"""
+
+    description = "labop_labware_ontology - offline access to compiled labware snapshots"
+    parser = argparse.ArgumentParser(prog="labop_labware_ontology", description=description)
+    parser.add_argument("-v", "--version", action="version", version="%(prog)s " + __version__)
+    parser.add_argument("--debug", action="store_true", help="log debug messages")
+    commands = parser.add_subparsers(dest="command", metavar="COMMAND", required=True)
+
+    compile_parser = commands.add_parser("compile", help="compile ontology sources (N-Triples) into a snapshot")
+    compile_parser.add_argument("sources", nargs="+", metavar="SOURCE", help="ontology source files")
+    compile_parser.add_argument("-o", "--output", required=True, metavar="SNAPSHOT", help="snapshot to write")
+    compile_parser.set_defaults(handler=compile_command)
+
+    lookup_parser = commands.add_parser("lookup", help="dimensions of labware by vendor and product number")
+    lookup_parser.add_argument("snapshot", help="compiled snapshot")
+    lookup_parser.add_argument("vendor", nargs="?", help="vendor, default: read VENDOR<TAB>PRODUCT_NUMBER lines")
+    lookup_parser.add_argument("product_number", nargs="?", help="product number")
+    lookup_parser.set_defaults(handler=lookup_command)
+
+    query_parser = commands.add_parser("query", help="evaluate a SPARQL query")
+    query_parser.add_argument("snapshot", help="compiled snapshot")
+    query_parser.add_argument("query", nargs="?", default="-", help="SPARQL query, default: read from stdin")
+    query_parser.add_argument(
+        "-f", "--format", choices=("json", "tsv"), default="json", help="SPARQL JSON results or tab separated terms"
+    )
+    query_parser.add_argument("--timeout", type=float, default=None, help="time limit in seconds")
+    query_parser.add_argument("--row-budget", type=int, default=None, help="maximal number of intermediate results")
+    query_parser.set_defaults(handler=query_command)
+
+    stats_parser = commands.add_parser("stats", help="size and content of a snapshot")
+    stats_parser.add_argument("snapshot", help="compiled snapshot")
+    stats_parser.set_defaults(handler=stats_command)
+
+    return parser.parse_args(argv)
 
-from .labop_labware_ontology_impl import HelloWorld
 
-logging.basicConfig(
-    format="%(levelname)-4s| %(module)s.%(funcName)s: %(message)s",
-    level=logging.DEBUG,
-)    
+def open_service(path: str, query_timeout: Optional[float] = None, query_row_budget: Optional[int] = None):
+    """the embedded labware service on an existing snapshot
 
-def parse_command_line():
-    """ Looking for command line arguments"""
+    :raises SnapshotError: if the snapshot is missing or damaged (it is not recompiled, there are no sources)
+    """
+    # pylint: disable=import-outside-toplevel
+    from .labware_service import LabwareService
+    from .snapshot import SnapshotFile
 
-    description = "labop_labware_ontology"
-    parser = argparse.ArgumentParser(description=description)
+    SnapshotFile(path)
+    return LabwareService(snapshot_path=path, query_timeout=query_timeout, query_row_budget=query_row_budget)
 
-    parser.add_argument("_", nargs="*")
 
-    parser.add_argument(
-        "-n", "--name", action="store", default="yvain", help="name to greet"
+def compile_command(args: argparse.Namespace) -> int:
+    import time  # pylint: disable=import-outside-toplevel
+
+    from .snapshot import compile_snapshot  # pylint: disable=import-outside-toplevel
+
+    start = time.perf_counter()
+    snapshot = compile_snapshot(args.sources, args.output)
+    print(
+        f"{args.output}: {len(snapshot.store)} triples, {len(snapshot.labware_index)} labware keys, "
+        f"compiled in {time.perf_counter() - start:.2f} s",
+        file=sys.stderr,
     )
+    return 0
 
-    parser.add_argument('-v', '--version', action='version', version='%(prog)s ' + __version__)
 
-    # add more arguments here
+def read_keys(lines: Iterable[str]) -> Iterator[Tuple[str, str]]:
+    """(vendor, product number) of VENDOR<TAB>PRODUCT_NUMBER lines, blank lines are skipped"""
+    for number, line in enumerate(lines, 1):
+        line = line.rstrip("\r\n")
+        if not line.strip():
+            continue
+        vendor, separator, product_number = line.partition("\t")
+        if not separator:
+            raise ValueError(f"line {number}: expected VENDOR<TAB>PRODUCT_NUMBER")
+        yield vendor, product_number
+
+
+def lookup_command(args: argparse.Namespace) -> int:
+    from .labware_service import UnknownLabwareError  # pylint: disable=import-outside-toplevel
+
+    service = open_service(args.snapshot)
+    if args.vendor is not None:
+        if args.product_number is None:
+            raise ValueError("the product number is missing")
+        try:
+            print(json.dumps(service.dimensions(args.vendor, args.product_number)))
+        except UnknownLabwareError as error:
+            print(error, file=sys.stderr)
+            return EXIT_NOT_FOUND
+        return 0
+
+    # looked up in batches, results are written while stdin is read
+    exit_code = 0
+    batch: List[Tuple[str, str]] = []
+    try:
+        for key in read_keys(sys.stdin):
+            batch.append(key)
+            if len(batch) == LOOKUP_BATCH_SIZE:
+                exit_code = write_dimensions(service, batch) or exit_code
+                batch = []
+    except ValueError:
+        # a malformed line: the lines before it are answered, then the error is reported
+        write_dimensions(service, batch)
+        raise
+    return write_dimensions(service, batch) or exit_code
+
+
+def write_dimensions(service, keys: List[Tuple[str, str]]) -> int:
+    """writes a VENDOR<TAB>PRODUCT_NUMBER<TAB>DIMENSIONS line per key, returns EXIT_NOT_FOUND if one is unknown"""
+    exit_code = 0
+    for (vendor, product_number), dimensions in zip(keys, service.dimensions_batch(keys)):
+        if dimensions is None:
+            exit_code = EXIT_NOT_FOUND
+        sys.stdout.write(f"{vendor}\t{product_number}\t{json.dumps(dimensions)}\n")
+    sys.stdout.flush()
+    return exit_code
+
+
+def query_command(args: argparse.Namespace) -> int:
+    # pylint: disable=import-outside-toplevel
+    from .sparql import QueryLimitExceeded, SPARQLSyntaxError
+
+    text = sys.stdin.read() if args.query == "-" else args.query
+    service = open_service(args.snapshot, args.timeout, args.row_budget)
+    try:
+        result = service.query(text)
+        if args.format == "json" or result.query.explain:
+            print(result.to_json())
+        elif result.query.form == "ASK":
+            print("true" if any(True for _ in result.rows) else "false")
+        else:
+            print("\t".join(f"?{variable}" for variable in result.variables))
+            for solution in result.decoded():
+                print("\t".join(solution.get(variable, "") for variable in result.variables))
+    except SPARQLSyntaxError as error:
+        print(f"invalid query: {error}", file=sys.stderr)
+        return EXIT_INVALID
+    except QueryLimitExceeded as error:
+        print(error, file=sys.stderr)
+        return EXIT_NOT_FOUND
+    return 0
+
+
+def stats_command(args: argparse.Namespace) -> int:
+    # pylint: disable=import-outside-toplevel
+    from collections import Counter
+
+    from .namespaces import RDF
+    from .rdf_terms import iri
+    from .snapshot import SnapshotFile
+
+    service = open_service(args.snapshot)
+    meta = SnapshotFile(args.snapshot).meta
+    store = service.store
+    statistics = service.query_engine.statistics.collect()
+    classes: Counter = Counter()
+    type_id = store.term_id(iri(RDF.type))
+    if type_id is not None:
+        classes.update(class_id for _, _, class_id in store.match(None, type_id, None))
+    stats = {
+        "snapshot": args.snapshot,
+        "bytes": os.path.getsize(args.snapshot),
+        "created": meta.get("created"),
+        "sources": meta.get("sources", []),
+        "source_hash": service.source_hash,
+        "wal_lsn": meta.get("wal_lsn", 0),
+        "triples": len(store),
+        "terms": len(store.dictionary),
+        "labware_keys": len(service.labware_index),
+        "instances_per_class": {store.term(class_id): count for class_id, count in classes.most_common()},
+        "predicates": {
+            store.term(predicate): predicate_statistics._asdict()
+            for predicate, predicate_statistics in sorted(
+                statistics.predicates.items(), key=lambda item: item[1].triples, reverse=True
+            )
+        },
+        "characteristic_sets": len(statistics.characteristic_sets),
+    }
+    print(json.dumps(stats, indent=2))
+    return 0
 
-    return parser.parse_args()
 
-def main():
+def main(argv: Optional[List[str]] = None) -> int:
     """Console script for labop_labware_ontology."""
-        # or use logging.INFO (=20) or logging.ERROR (=30) for less output
+    args = parse_command_line(argv)
+    # or use logging.INFO (=20) or logging.ERROR (=30) for less output
     logging.basicConfig(
-        format='%(levelname)-4s| %(module)s.%(funcName)s: %(message)s', level=logging.DEBUG)
-    
-    
-    args = parse_command_line()
-        
-    if len(sys.argv) <= 2:
-        logging.debug("no arguments provided !")
-
-
-    print("Arguments: " + str(args._))
-    print("Replace this message by putting your code into labop_labware_ontology.__main__")
-    
-    hw = HelloWorld()
-    greeting = hw.greet_the_world(args.name)
-    logging.debug(greeting)
-    
-    return 0
+        format="%(levelname)-4s| %(module)s.%(funcName)s: %(message)s",
+        level=logging.DEBUG if args.debug else logging.WARNING,
+    )
+    # imported after parsing, --help and --version exit before
+    from .rdf_sources import SourceError  # pylint: disable=import-outside-toplevel
+    from .snapshot import SnapshotError  # pylint: disable=import-outside-toplevel
+
+    try:
+        return args.handler(args)
+    except BrokenPipeError:
+        # the reader of the output is gone (e.g. head), nothing more to write
+        os.dup2(os.open(os.devnull, os.O_WRONLY), sys.stdout.fileno())
+        return 1
+    except (OSError, ValueError, SnapshotError, SourceError) as error:
+        # missing files, damaged snapshots or sources and invalid input lines
+        print(f"{args.command}: {error}", file=sys.stderr)
+        return EXIT_INVALID
 
 
 if __name__ == "__main__":
@@ -0,0 +1,283 @@
+"""_____________________________________________________________________
+
+:PROJECT: LabOP Labware Ontology
+
+* Class hierarchy closure index *
+
+:details: The rdfs:subClassOf hierarchy with interval labels, so subclass tests and the subclasses
+          of a class need no graph traversal:
+
+          Every class gets a number in the pre-order of a depth-first traversal of a spanning forest
+          of the hierarchy - the subclasses of a class in the forest have the numbers of one interval.
+          Each class keeps the sorted intervals of all its subclasses (direct or not, itself included),
+          one interval for a tree-shaped hierarchy, more for classes with several superclasses.
+
+          C is a subclass of D      the number of C is in an interval of D (constant time for one interval)
+          subclasses of D           the classes numbered in the intervals of D (range scans)
+          instances of D            the rdf:type index of the store for each subclass of D
+
+          Unlike the subclass test, the instances of a class are not one range scan: there is no instance index
+          ordered by class number, each subclass costs one probe of the rdf:type index of the store.
+          That index is already versioned and updated on insert, so pinned readers need no second copy.
+
+          New subClassOf triples update the labels incrementally: a new class is numbered after the last,
+          and all superclasses of the new superclass get the intervals of the new subclass.
+          New individuals need no update, they are in the rdf:type index of the store.
+
+.. note:: -
+.. todo:: -
+________________________________________________________________________
+"""
+
+from bisect import bisect_right
+from threading import Lock
+from typing import Dict, FrozenSet, Iterable, Iterator, List, Optional, Sequence, Set, Tuple
+
+from .namespaces import RDF, RDFS
+from .rdf_terms import iri
+from .triple_store import IDTriple, StoreVersion, TripleStore
+
+Interval = Tuple[int, int]  # first and last number, inclusive
+
+SUBCLASS_OF = iri(RDFS.subClassOf)
+
+
+def _merge(intervals: Iterable[Interval]) -> Tuple[Interval, ...]:
+    """sorted, disjoint and not adjacent intervals covering the same numbers"""
+    merged: List[Interval] = []
+    for first, last in sorted(intervals):
+        if merged and first <= merged[-1][1] + 1:
+            if last > merged[-1][1]:
+                merged[-1] = (merged[-1][0], last)
+        else:
+            merged.append((first, last))
+    return tuple(merged)
+
+
+class ClassLabels:
+    __slots__ = ("version", "number", "classes", "intervals", "parents", "children")
+
+    def __init__(
+        self,
+        version: int,
+        number: Dict[int, int],
+        classes: List[int],
+        intervals: Dict[int, Tuple[Interval, ...]],
+        parents: Dict[int, FrozenSet[int]],
+        children: Dict[int, FrozenSet[int]],
+    ) -> None:
+        """interval labels of one state of the class hierarchy, not modified after construction
+
+        :param version: number of the store version of the last change of the hierarchy
+        :param number: class -> its number
+        :param classes: the classes by number
+        :param intervals: class -> intervals of the numbers of its subclasses
+        :param parents: class -> direct superclasses
+        :param children: class -> direct subclasses
+        """
+        self.version = version
+        self.number = number
+        self.classes = classes
+        self.intervals = intervals
+        self.parents = parents
+        self.children = children
+
+    @classmethod
+    def build(cls, edges: Iterable[Tuple[int, int]], version: int = 0) -> "ClassLabels":
+        """labels of a hierarchy
+
+        :param edges: (subclass, superclass) term IDs
+        :param version: number of the store version of the edges
+        """
+        parents: Dict[int, Set[int]] = {}
+        children: Dict[int, Set[int]] = {}
+        for child, parent in edges:
+            parents.setdefault(child, set()).add(parent)
+            parents.setdefault(parent, set())
+            children.setdefault(parent, set()).add(child)
+            children.setdefault(child, set())
+        number: Dict[int, int] = {}
+        classes: List[int] = []
+        intervals: Dict[int, Tuple[Interval, ...]] = {}
+        tree_edges: Set[Tuple[int, int]] = set()
+        # roots first, then classes on cycles without a root
+        for root in sorted(parents, key=lambda term: (bool(parents[term]), term)):
+            if root in number:
+                continue
+            number[root] = len(classes)
+            classes.append(root)
+            stack = [(root, iter(sorted(children[root])))]
+            while stack:
+                node, pending = stack[-1]
+                child = next(pending, None)
+                if child is None:
+                    stack.pop()
+                    intervals[node] = ((number[node], len(classes) - 1),)
+                elif child not in number:
+                    number[child] = len(classes)
+                    classes.append(child)
+                    tree_edges.add((child, node))
+                    stack.append((child, iter(sorted(children[child]))))
+        labels = cls(
+            version,
+            number,
+            classes,
+            intervals,
+            {term: frozenset(terms) for term, terms in parents.items()},
+            {term: frozenset(terms) for term, terms in children.items()},
+        )
+        for child, parent_set in parents.items():
+            for parent in parent_set:
+                if (child, parent) not in tree_edges:
+                    labels._propagate(child, parent)
+        return labels
+
+    def with_edges(self, edges: Sequence[Tuple[int, int]], version: int) -> "ClassLabels":
+        """the labels with new (subclass, superclass) edges, this object is not changed
+
+        :param version: number of the store version adding the edges
+        """
+        number, classes, intervals = dict(self.number), list(self.classes), dict(self.intervals)
+        parents, children = dict(self.parents), dict(self.children)
+        for child, parent in edges:
+            for term in (child, parent):
+                if term not in number:
+                    number[term] = len(classes)
+                    classes.append(term)
+                    intervals[term] = ((number[term], number[term]),)
+                    parents[term] = children[term] = frozenset()
+            parents[child] = parents[child] | {parent}
+            children[parent] = children[parent] | {child}
+        labels = ClassLabels(version, number, classes, intervals, parents, children)
+        for child, parent in edges:
+            labels._propagate(child, parent)
+        return labels
+
+    def _propagate(self, child: int, parent: int) -> None:
+        """adds the subclasses of child to parent and all its superclasses (while the labels are built)"""
+        added = self.intervals[child]
+        for ancestor in self.ancestors(parent):
+            self.intervals[ancestor] = _merge(self.intervals[ancestor] + added)
+
+    def is_subclass(self, subclass: int, superclass: int) -> bool:
+        """True if subclass is superclass or one of its direct or indirect subclasses"""
+        if subclass == superclass:
+            return True
+        position = self.number.get(subclass)
+        intervals = self.intervals.get(superclass)
+        if position is None or intervals is None:
+            return False
+        if len(intervals) == 1:
+            return intervals[0][0] <= position <= intervals[0][1]
+        index = bisect_right(intervals, (position, len(self.classes))) - 1
+        return index >= 0 and position <= intervals[index][1]
+
+    def is_proper_subclass(self, subclass: int, superclass: int) -> bool:
+        """True if subclass is a direct or indirect subclass of superclass (itself only on a cycle)"""
+        return any(self.is_subclass(parent, superclass) for parent in self.parents.get(subclass, ()))
+
+    def descendants(self, superclass: int) -> Iterator[int]:
+        """the class and all its direct or indirect subclasses, a term that is no class has none"""
+        intervals = self.intervals.get(superclass)
+        if intervals is None:
+            yield superclass
+            return
+        classes = self.classes
+        for first, last in intervals:
+            yield from classes[first : last + 1]
+
+    def proper_descendants(self, superclass: int) -> Iterator[int]:
+        """all direct or indirect subclasses (the class itself only on a cycle)"""
+        intervals = _merge(
+            interval for child in self.children.get(superclass, ()) for interval in self.intervals[child]
+        )
+        classes = self.classes
+        for first, last in intervals:
+            yield from classes[first : last + 1]
+
+    def ancestors(self, subclass: int) -> List[int]:
+        """the class and all its direct or indirect superclasses"""
+        seen = {subclass}
+        result = [subclass]
+        for term in result:
+            for parent in self.parents.get(term, ()):
+                if parent not in seen:
+                    seen.add(parent)
+                    result.append(parent)
+        return result
+
+    def proper_ancestors(self, subclass: int) -> List[int]:
+        """all direct or indirect superclasses (the class itself only on a cycle)"""
+        seen: Set[int] = set()
+        result: List[int] = []
+        pending = list(self.parents.get(subclass, ()))
+        while pending:
+            term = pending.pop()
+            if term not in seen:
+                seen.add(term)
+                result.append(term)
+                pending.extend(self.parents.get(term, ()))
+        return result
+
+
+class ClassHierarchy:
+    def __init__(self, store: TripleStore) -> None:
+        """closure index of the rdfs:subClassOf hierarchy of a store, maintained as a listener of the store
+
+        :param store: the store of the hierarchy
+        """
+        self.store = store
+        self._lock = Lock()
+        self._subclass_of: Optional[int] = None
+        store.add_listener(self._triples_added)
+        with self._lock:
+            version = store.version
+            # (labels, number of the last store version whose new triples were checked)
+            self._state: Tuple[ClassLabels, int] = (self._build(version), version.number)
+
+    def labels(self, version: Optional[StoreVersion] = None) -> ClassLabels:
+        """the labels of the hierarchy of a store version, default: the current one"""
+        version = version if version is not None else self.store.version
+        labels, checked = self._state
+        if labels.version <= version.number <= checked:
+            return labels
+        # a version before the last change of the hierarchy, or a write not yet checked
+        return self._build(version)
+
+    def instances(self, superclass: int, version: Optional[StoreVersion] = None) -> Iterator[int]:
+        """the individuals of the class or any subclass (once per matching rdf:type triple),
+        one rdf:type index lookup per subclass - linear in the subclasses and the individuals, not one range scan
+
+        :param superclass: term ID of the class
+        """
+        version = version if version is not None else self.store.version
+        type_id = version.term_id(iri(RDF.type))
+        if type_id is None:
+            return
+        for subclass in self.labels(version).descendants(superclass):
+            for individual, _, _ in version.match(None, type_id, subclass):
+                yield individual
+
+    def _subclass_id(self) -> Optional[int]:
+        if self._subclass_of is None:
+            self._subclass_of = self.store.term_id(SUBCLASS_OF)
+        return self._subclass_of
+
+    def _build(self, version: StoreVersion) -> ClassLabels:
+        predicate = self._subclass_id()
+        if predicate is None:
+            return ClassLabels.build((), version.number)
+        return ClassLabels.build(((s, o) for s, _, o in version.match(None, predicate, None)), version.number)
+
+    def _triples_added(self, triples: Sequence[IDTriple]) -> None:
+        with self._lock:
+            # called after the new version is published, writes are blocked meanwhile
+            version = self.store.version
+            labels, checked = self._state
+            if version.number <= checked:
+                return
+            predicate = self._subclass_id()
+            edges = [(s, o) for s, p, o in triples if p == predicate] if predicate is not None else []
+            if edges:
+                labels = labels.with_edges(edges, version.number)
+            self._state = (labels, version.number)
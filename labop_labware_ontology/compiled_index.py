@@ -0,0 +1,183 @@
+"""_____________________________________________________________________
+
+:PROJECT: LabOP Labware Ontology
+
+* Compiled (read-only) permutation indexes *
+
+:details: Immutable SPO/POS/OSP indexes as flat arrays of term IDs, the layout of the binary snapshot.
+          Each permutation is a two-level compressed sparse row structure:
+
+          first[a] .. first[a+1]            range of the second components of a in 'second'
+          second_offsets[j] .. [j+1]        range of the third components of (a, second[j]) in 'third'
+
+          The arrays are used directly on the memory-mapped snapshot - loading does not copy or
+          rebuild anything, and all processes mapping the same file share its pages.
+
+.. note:: -
+.. todo:: -
+________________________________________________________________________
+"""
+
+from array import array
+from bisect import bisect_left
+from itertools import accumulate
+from operator import itemgetter
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+IDTriple = Tuple[int, int, int]
+
+PERMUTATIONS = ("spo", "pos", "osp")
+PERMUTATION_ARRAYS = ("first", "second", "second_offsets", "third")
+
+
+class CompiledPermutation:
+    def __init__(
+        self, first: Sequence[int], second: Sequence[int], second_offsets: Sequence[int], third: Sequence[int]
+    ):
+        """one permutation index, the sequences are arrays or memoryviews of unsigned 32 bit integers"""
+        self.first = first
+        self.second = second
+        self.second_offsets = second_offsets
+        self.third = third
+
+    @property
+    def arrays(self) -> Dict[str, Sequence[int]]:
+        return dict(zip(PERMUTATION_ARRAYS, (self.first, self.second, self.second_offsets, self.third)))
+
+    def _second_range(self, a: int) -> Tuple[int, int]:
+        if a + 1 >= len(self.first):
+            return 0, 0
+        return self.first[a], self.first[a + 1]
+
+    def _find_second(self, a: int, b: int) -> Optional[int]:
+        lo, hi = self._second_range(a)
+        j = bisect_left(self.second, b, lo, hi)
+        if j < hi and self.second[j] == b:
+            return j
+        return None
+
+    def thirds(self, a: int, b: int) -> Sequence[int]:
+        """third components of all triples (a, b, ?)"""
+        j = self._find_second(a, b)
+        if j is None:
+            return ()
+        return self.third[self.second_offsets[j] : self.second_offsets[j + 1]]
+
+    def contains(self, a: int, b: int, c: int) -> bool:
+        j = self._find_second(a, b)
+        if j is None:
+            return False
+        lo, hi = self.second_offsets[j], self.second_offsets[j + 1]
+        k = bisect_left(self.third, c, lo, hi)
+        return k < hi and self.third[k] == c
+
+    def pairs(self, a: int) -> Iterator[Tuple[int, int]]:
+        """(second, third) components of all triples (a, ?, ?)"""
+        lo, hi = self._second_range(a)
+        second, offsets, third = self.second, self.second_offsets, self.third
+        for j in range(lo, hi):
+            b = second[j]
+            for c in third[offsets[j] : offsets[j + 1]]:
+                yield b, c
+
+    def count(self, a: int, b: Optional[int] = None) -> int:
+        if b is not None:
+            j = self._find_second(a, b)
+            return 0 if j is None else self.second_offsets[j + 1] - self.second_offsets[j]
+        lo, hi = self._second_range(a)
+        return self.second_offsets[hi] - self.second_offsets[lo] if hi > lo else 0
+
+    def firsts(self) -> Iterator[int]:
+        """all first components that have triples"""
+        first = self.first
+        for a in range(len(first) - 1):
+            if first[a + 1] > first[a]:
+                yield a
+
+
+class CompiledIndexes:
+    def __init__(self, spo: CompiledPermutation, pos: CompiledPermutation, osp: CompiledPermutation) -> None:
+        """read-only SPO/POS/OSP indexes, the base layer of a store loaded from a snapshot"""
+        self.spo = spo
+        self.pos = pos
+        self.osp = osp
+        self.size = len(spo.third)
+
+    def __len__(self) -> int:
+        return self.size
+
+    def contains(self, s: int, p: int, o: int) -> bool:
+        return self.spo.contains(s, p, o)
+
+    def match(self, s: Optional[int] = None, p: Optional[int] = None, o: Optional[int] = None) -> Iterator[IDTriple]:
+        """all triples matching a pattern of term IDs, None is a wildcard"""
+        if s is not None:
+            if p is not None:
+                if o is not None:
+                    if self.spo.contains(s, p, o):
+                        yield s, p, o
+                    return
+                for obj in self.spo.thirds(s, p):
+                    yield s, p, obj
+            elif o is not None:
+                for pred in self.osp.thirds(o, s):
+                    yield s, pred, o
+            else:
+                for pred, obj in self.spo.pairs(s):
+                    yield s, pred, obj
+        elif p is not None:
+            if o is not None:
+                for subj in self.pos.thirds(p, o):
+                    yield subj, p, o
+            else:
+                for obj, subj in self.pos.pairs(p):
+                    yield subj, p, obj
+        elif o is not None:
+            for subj, pred in self.osp.pairs(o):
+                yield subj, pred, o
+        else:
+            for subj in self.spo.firsts():
+                for pred, obj in self.spo.pairs(subj):
+                    yield subj, pred, obj
+
+    def count(self, s: Optional[int] = None, p: Optional[int] = None, o: Optional[int] = None) -> int:
+        if s is None and p is None and o is None:
+            return self.size
+        if s is not None and o is None:
+            return self.spo.count(s, p)
+        if p is not None and s is None:
+            return self.pos.count(p, o)
+        if o is not None and p is None:
+            return self.osp.count(o, s)
+        return 1 if self.spo.contains(s, p, o) else 0
+
+
+def _build_permutation(n_terms: int, rows: List[IDTriple]) -> CompiledPermutation:
+    """builds one permutation from its sorted, duplicate free (a, b, c) rows"""
+    counts = array("I", bytes(4 * n_terms))
+    second, second_offsets, third = array("I"), array("I"), array("I")
+    last_a = last_b = -1
+    for a, b, c in rows:
+        if b != last_b or a != last_a:
+            second.append(b)
+            second_offsets.append(len(third))
+            counts[a] += 1
+            last_a, last_b = a, b
+        third.append(c)
+    second_offsets.append(len(third))
+    first = array("I", [0])
+    first.extend(accumulate(counts))
+    return CompiledPermutation(first, second, second_offsets, third)
+
+
+def compile_indexes(n_terms: int, triples: Iterable[IDTriple]) -> CompiledIndexes:
+    """builds compiled indexes of distinct triples
+
+    :param n_terms: number of term IDs (size of the term dictionary)
+    :param triples: distinct (s, p, o) triples of term IDs, e.g. store.match()
+    """
+    triples = list(triples)
+    spo = _build_permutation(n_terms, sorted(triples))
+    pos = _build_permutation(n_terms, sorted(map(itemgetter(1, 2, 0), triples)))
+    osp = _build_permutation(n_terms, sorted(map(itemgetter(2, 0, 1), triples)))
+    return CompiledIndexes(spo, pos, osp)
@@ -0,0 +1,137 @@
+"""_____________________________________________________________________
+
+:PROJECT: LabOP Labware Ontology
+
+* Columnar labware dimension table *
+
+:details: The numeric geometry of all labware individuals as one column per property
+          (float64 lengths in mm, int32 well count) and a row index by labware term ID.
+          The columns are stored in the snapshot and read directly from the memory-mapped file,
+          so all server processes on a host share one copy through the page cache.
+
+          Labware whose dimensions change after the snapshot was compiled is answered from the store.
+
+.. note:: -
+.. todo:: -
+________________________________________________________________________
+"""
+
+import math
+from array import array
+from typing import Any, Dict, Optional, Sequence, Set, Tuple
+
+from .labware import DIMENSION_PROPERTIES, labware_dimensions
+from .triple_store import IDTriple, StoreVersion, TripleStore
+
+# column name -> array typecode, the names are the keys of the dimension records
+COLUMNS = {
+    "length": "d",
+    "width": "d",
+    "height": "d",
+    "well_count": "i",
+    "well_pitch": "d",
+    "plate_height": "d",
+}
+_MISSING_COUNT = -1
+
+
+def _column_value(value: Any, typecode: str) -> Any:
+    try:
+        return int(value) if typecode == "i" else float(value)
+    except (TypeError, ValueError):
+        return _MISSING_COUNT if typecode == "i" else math.nan
+
+
+def _is_missing(value: Any, typecode: str) -> bool:
+    return value == _MISSING_COUNT if typecode == "i" else math.isnan(value)
+
+
+def _record(dimensions: Dict[str, Any]) -> Dict[str, Any]:
+    """a dimension record of the store with the types of the columns, values that are no number omitted"""
+    record: Dict[str, Any] = {}
+    for name, value in dimensions.items():
+        value = _column_value(value, COLUMNS[name])
+        if not _is_missing(value, COLUMNS[name]):
+            record[name] = value
+    return record
+
+
+class DimensionTable:
+    def __init__(self, store: TripleStore, rows: Sequence[int], columns: Dict[str, Sequence]) -> None:
+        """dimension records of the labware in a store
+
+        :param store: the store the table was built from, fallback for labware not (or no longer) in the table
+        :param rows: row of each term ID, -1 for terms without dimensions
+        :param columns: one sequence per column in COLUMNS
+        """
+        self.store = store
+        self.rows = rows
+        self.columns = columns
+        self._dimension_predicates = self._predicate_ids()
+        self._changed: Set[int] = set()
+        # lookups answered from the table and from the store (metrics, not exact under concurrent lookups)
+        self.hits = 0
+        self.misses = 0
+        store.add_listener(self._triples_added)
+
+    def __len__(self) -> int:
+        return len(self.columns["length"])
+
+    @classmethod
+    def build(cls, store: TripleStore) -> "DimensionTable":
+        """builds the table (in memory) from the dimension statements of the store"""
+        return cls(store, *cls.build_arrays(store))
+
+    @staticmethod
+    def build_arrays(store: TripleStore) -> Tuple[array, Dict[str, array]]:
+        """rows and columns of the dimension statements of the store"""
+        rows = array("i", [-1]) * len(store.dictionary)
+        columns = {name: array(typecode) for name, typecode in COLUMNS.items()}
+        labware_ids: Set[int] = set()
+        for predicate in DIMENSION_PROPERTIES.values():
+            predicate_id = store.term_id(predicate)
+            if predicate_id is not None:
+                labware_ids.update(s for s, _, _ in store.match(None, predicate_id, None))
+        for row, labware_id in enumerate(sorted(labware_ids)):
+            rows[labware_id] = row
+            dimensions = labware_dimensions(store, labware_id)
+            for name, typecode in COLUMNS.items():
+                columns[name].append(_column_value(dimensions.get(name), typecode))
+        return rows, columns
+
+    def dimensions(self, labware_id: int, version: Optional[StoreVersion] = None) -> Dict[str, Any]:
+        """dimension record of a labware individual, properties without value are omitted,
+        lengths are floats and the well count an int whether the record is read from the table or the store
+
+        :param labware_id: term ID of the labware individual
+        :param version: pinned store version for labware changed after compilation, default: the current one
+        """
+        row = self.rows[labware_id] if labware_id < len(self.rows) else -1
+        if row < 0 or labware_id in self._changed:
+            self.misses += 1
+            return _record(labware_dimensions(version if version is not None else self.store, labware_id))
+        self.hits += 1
+        record: Dict[str, Any] = {}
+        for name, column in self.columns.items():
+            value = column[row]
+            if _is_missing(value, COLUMNS[name]):
+                continue
+            record[name] = value
+        return record
+
+    def row(self, labware_id: int) -> Optional[int]:
+        """table row of a labware individual, None if it is not in the table"""
+        row = self.rows[labware_id] if labware_id < len(self.rows) else -1
+        return None if row < 0 else row
+
+    def _predicate_ids(self) -> Set[int]:
+        # looked up, not encoded: the table does not add terms to the dictionary of the store
+        ids = (self.store.term_id(predicate) for predicate in DIMENSION_PROPERTIES.values())
+        return {predicate_id for predicate_id in ids if predicate_id is not None}
+
+    def _triples_added(self, triples: Sequence[IDTriple]) -> None:
+        if len(self._dimension_predicates) < len(DIMENSION_PROPERTIES):
+            # a dimension property unknown so far may be used by the new triples
+            self._dimension_predicates = self._predicate_ids()
+        predicates = self._dimension_predicates
+        self._changed.update(s for s, p, _ in triples if p in predicates)
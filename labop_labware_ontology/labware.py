@@ -0,0 +1,59 @@
+"""_____________________________________________________________________
+
+:PROJECT: LabOP Labware Ontology
+
+* Labware individuals *
+
+:details: Mapping between labware individuals in the triple store and
+          the plain records (dicts) used by the automation interfaces.
+
+.. note:: -
+.. todo:: -
+________________________________________________________________________
+"""
+
+from typing import Any, Dict, Union
+from urllib.parse import quote
+
+from .namespaces import LABWARE
+from .rdf_terms import iri, term_value
+from .triple_store import StoreVersion, TripleStore
+
+VENDOR = iri(LABWARE.vendor)
+PRODUCT_NUMBER = iri(LABWARE.productNumber)
+
+# record key -> predicate of the labware geometry, lengths in mm
+DIMENSION_PROPERTIES = {
+    "length": iri(LABWARE.length),
+    "width": iri(LABWARE.width),
+    "height": iri(LABWARE.height),
+    "well_count": iri(LABWARE.wellCount),
+    "well_pitch": iri(LABWARE.wellPitch),
+    "plate_height": iri(LABWARE.plateHeight),
+}
+
+
+def labware_iri(name: str) -> str:
+    """IRI (N-Triples notation) of the labware individual with the given name
+
+    :param name: name of the labware
+    :type name: str
+    """
+    return iri(LABWARE.term(quote(name, safe="")))
+
+
+def labware_dimensions(store: Union[TripleStore, StoreVersion], labware_id: int) -> Dict[str, Any]:
+    """dimension record of a labware individual, properties not set in the store are omitted
+
+    :param store: triple store (or pinned store version) holding the individual
+    :param labware_id: term ID of the individual
+    """
+    dimensions: Dict[str, Any] = {}
+    decode = store.dictionary.decode
+    for key, predicate in DIMENSION_PROPERTIES.items():
+        predicate_id = store.term_id(predicate)
+        if predicate_id is None:
+            continue
+        for _, _, value_id in store.match(labware_id, predicate_id, None):
+            dimensions[key] = term_value(decode(value_id))
+    return dimensions
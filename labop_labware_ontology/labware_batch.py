@@ -0,0 +1,111 @@
+"""_____________________________________________________________________
+
+:PROJECT: LabOP Labware Ontology
+
+* Batch creation of labware individuals *
+
+:details: Creates many labware individuals as one store update: all definitions are validated first,
+          the triples of the valid ones are then added together, so the secondary indexes
+          (labware index, dimension table) merge the whole batch once.
+          Every definition gets its own result - an invalid one does not abort the batch.
+
+.. note:: -
+.. todo:: -
+________________________________________________________________________
+"""
+
+import math
+import numbers
+from typing import Any, Dict, List, NamedTuple, Optional, Sequence, Set
+
+from .labware import DIMENSION_PROPERTIES, PRODUCT_NUMBER, VENDOR, labware_iri
+from .labware_index import LabwareIndex, LabwareKey, normalize_key
+from .namespaces import LABWARE, RDF, RDFS
+from .rdf_terms import iri, literal
+from .triple_store import IDTriple, Triple, TripleStore
+
+LABWARE_TYPE = iri(LABWARE.Labware)
+
+
+class LabwareDefinition(NamedTuple):
+    name: str
+    vendor: str = ""
+    product_number: str = ""
+    dimensions: Optional[Dict[str, Any]] = None
+
+
+class LabwareDefinitionError(ValueError):
+    """A labware definition is invalid or conflicts with existing labware"""
+
+
+def labware_triples(definition: LabwareDefinition) -> List[Triple]:
+    """triples (N-Triples notation) describing a new labware individual
+
+    :param definition: the labware to create
+    :raises LabwareDefinitionError: if the definition is incomplete or has invalid dimensions
+    """
+    if not definition.name.strip():
+        raise LabwareDefinitionError("the labware name is empty")
+    if bool(definition.vendor.strip()) != bool(definition.product_number.strip()):
+        raise LabwareDefinitionError("vendor and product number must be given together")
+    labware = labware_iri(definition.name)
+    triples = [
+        (labware, iri(RDF.type), LABWARE_TYPE),
+        (labware, iri(RDFS.label), literal(definition.name)),
+    ]
+    if definition.vendor.strip():
+        triples.append((labware, VENDOR, literal(definition.vendor)))
+        triples.append((labware, PRODUCT_NUMBER, literal(definition.product_number)))
+    for key, value in (definition.dimensions or {}).items():
+        predicate = DIMENSION_PROPERTIES.get(key)
+        if predicate is None:
+            raise LabwareDefinitionError(f"unknown dimension '{key}'")
+        if isinstance(value, bool) or not isinstance(value, numbers.Real):
+            raise LabwareDefinitionError(f"dimension '{key}' is not a number")
+        if not math.isfinite(value):
+            raise LabwareDefinitionError(f"dimension '{key}' is not finite")
+        if key == "well_count" and value != int(value):
+            raise LabwareDefinitionError("the well count is not an integer")
+        triples.append((labware, predicate, literal(int(value) if key == "well_count" else float(value))))
+    return triples
+
+
+def create_labware_batch(
+    store: TripleStore, labware_index: LabwareIndex, definitions: Sequence[LabwareDefinition]
+) -> List[Optional[str]]:
+    """creates labware individuals as one store update
+
+    Definitions that are invalid, name existing labware or repeat a name or (vendor, product number)
+    of the batch or the store are skipped. Writes must be serialized by the caller.
+
+    :param store: the triple store to add the individuals to
+    :param labware_index: the (vendor, product number) index of the store
+    :param definitions: the labware to create
+    :return: per definition None if it was created, else the reason why not
+    """
+    encode_triple = store.dictionary.encode_triple
+    results: List[Optional[str]] = []
+    names: Set[str] = set()
+    keys: Set[LabwareKey] = set()
+    batch: List[IDTriple] = []
+    for definition in definitions:
+        try:
+            triples = labware_triples(definition)
+            labware = triples[0][0]
+            if labware in names or triples[0] in store:
+                raise LabwareDefinitionError(f"labware '{definition.name}' already exists")
+            if definition.vendor.strip():
+                key = normalize_key(definition.vendor, definition.product_number)
+                if key in keys or labware_index.lookup(definition.vendor, definition.product_number) is not None:
+                    raise LabwareDefinitionError(
+                        f"there is already labware '{definition.product_number}' of vendor '{definition.vendor}'"
+                    )
+                keys.add(key)
+        except LabwareDefinitionError as error:
+            results.append(str(error))
+            continue
+        names.add(labware)
+        batch.extend(map(encode_triple, triples))
+        results.append(None)
+    store.add_all_ids(batch)
+    return results
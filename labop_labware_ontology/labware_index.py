@@ -0,0 +1,114 @@
+"""_____________________________________________________________________
+
+:PROJECT: LabOP Labware Ontology
+
+* (Vendor, ProductNumber) index *
+
+:details: Hash index from the normalized (vendor, product number) pair to the labware individual,
+          so the automation lookup is a single dictionary probe instead of a query.
+          The index is built from the store once and kept up to date by a store listener.
+          Readers that pinned a store version resolve their keys against that version: keys changed
+          after it (or by a write not yet indexed) are looked up in the pinned version itself.
+
+.. note:: -
+.. todo:: -
+________________________________________________________________________
+"""
+
+from typing import Dict, ItemsView, Iterator, Optional, Sequence, Set, Tuple, Union
+
+from .labware import PRODUCT_NUMBER, VENDOR
+from .rdf_terms import term_value
+from .triple_store import IDTriple, StoreVersion, TripleStore
+
+LabwareKey = Tuple[str, str]
+
+
+def normalize_key(vendor: str, product_number: str) -> LabwareKey:
+    """index key of a (vendor, product number) pair - case and whitespace insensitive
+
+    :param vendor: name of the labware vendor
+    :param product_number: product number of the labware
+    """
+    return " ".join(vendor.split()).casefold(), "".join(product_number.split()).casefold()
+
+
+class LabwareIndex:
+    def __init__(self, store: TripleStore, entries: Optional[Dict[LabwareKey, int]] = None) -> None:
+        """Index of the labware individuals in a store by (vendor, product number).
+
+        :param store: triple store with lw:vendor and lw:productNumber statements
+        :param entries: prebuilt index entries (e.g. of a snapshot), the index is built from the store if not given
+        """
+        self.store = store
+        self._vendor_id = store.dictionary.encode(VENDOR)
+        self._product_number_id = store.dictionary.encode(PRODUCT_NUMBER)
+        self._entries: Dict[LabwareKey, int] = {}
+        # key -> number of the store version that last changed its entry (keys changed after construction)
+        self._changed: Dict[LabwareKey, int] = {}
+        # number of the last store version whose new triples were indexed
+        self._indexed = store.version.number
+        if entries is None:
+            self.rebuild()
+        else:
+            self._entries.update(entries)
+        store.add_listener(self._triples_added)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def items(self) -> ItemsView[LabwareKey, int]:
+        """(normalized key, labware term ID) pairs of the index"""
+        return self._entries.items()
+
+    def rebuild(self) -> None:
+        """(re)builds the index from all vendor / product number statements of the store"""
+        self._entries.clear()
+        for labware_id, _, _ in self.store.match(None, self._product_number_id, None):
+            self._index_labware(labware_id)
+
+    def lookup(self, vendor: str, product_number: str, version: Optional[StoreVersion] = None) -> Optional[int]:
+        """term ID of the labware individual, None if there is none for this vendor and product number
+
+        :param vendor: name of the labware vendor
+        :param product_number: product number of the labware
+        :param version: pinned store version the key is resolved against, default: the current one
+        """
+        key = normalize_key(vendor, product_number)
+        # the entry is read before the checks, the listener marks a key changed before it updates its entry
+        labware_id = self._entries.get(key)
+        if version is None:
+            return labware_id
+        if version.number > self._indexed or self._changed.get(key, -1) > version.number:
+            return self._scan(version, key)
+        return labware_id
+
+    def _keys(self, store: Union[TripleStore, StoreVersion], labware_id: int) -> Iterator[LabwareKey]:
+        decode = store.dictionary.decode
+        for _, _, product_number_id in store.match(labware_id, self._product_number_id, None):
+            product_number = str(term_value(decode(product_number_id)))
+            for _, _, vendor_id in store.match(labware_id, self._vendor_id, None):
+                yield normalize_key(str(term_value(decode(vendor_id))), product_number)
+
+    def _index_labware(self, labware_id: int, version_number: Optional[int] = None) -> None:
+        for key in self._keys(self.store, labware_id):
+            if version_number is not None:
+                self._changed[key] = version_number
+            self._entries[key] = labware_id
+
+    def _scan(self, version: StoreVersion, key: LabwareKey) -> Optional[int]:
+        # all labware of the version, only for keys that changed while the reader held its version
+        found = None
+        for labware_id, _, _ in version.match(None, self._product_number_id, None):
+            if key in self._keys(version, labware_id):
+                found = labware_id
+        return found
+
+    def _triples_added(self, triples: Sequence[IDTriple]) -> None:
+        # called after the new version is published, writes are blocked meanwhile
+        version_number = self.store.version.number
+        keyed = (self._vendor_id, self._product_number_id)
+        changed: Set[int] = {s for s, p, _ in triples if p in keyed}
+        for labware_id in changed:
+            self._index_labware(labware_id, version_number)
+        self._indexed = version_number
@@ -0,0 +1,309 @@
+"""_____________________________________________________________________
+
+:PROJECT: LabOP Labware Ontology
+
+* Embedded labware service *
+
+:details: The operations of the SiLA labware features as an in-process library API:
+          dimension lookups, creating labware and SPARQL queries, on the same store and snapshot
+          format as the server - without a server, gRPC or protobuf serialization.
+
+          with LabwareService(["labware.nt"], "labware.snapshot") as service:
+              dimensions = service.dimensions("Corning", "3596")
+              rows = list(service.query("SELECT ?x { ?x a lw:Microplate }").decoded())
+
+          Reads are lock free (each call pins the current store version), writes are serialized
+          and, with a write-ahead log, durable when the call returns.
+
+          Queries repeated with different constants are prepared once with parameters and executed
+          with their values, the values are never spliced into the query text:
+
+              handle = service.prepare_query("SELECT ?x { ?x lw:vendor ?vendor }", ["vendor"])
+              result = service.execute_prepared(handle, {"vendor": '"Corning"'})
+
+.. note:: -
+.. todo:: -
+________________________________________________________________________
+"""
+
+import hashlib
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from threading import Lock
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+from .labware import labware_iri
+from .labware_batch import LabwareDefinition, create_labware_batch
+from .namespaces import LABWARE, RDF, RDFS
+from .query_cache import PlanCache, ResultCache, query_predicates
+from .rdf_terms import iri, literal
+from .snapshot import open_snapshot
+from .sparql import QueryBudget, QueryEngine, QueryPlan, QueryResult
+from .triple_store import StoreVersion
+from .write_ahead_log import Checkpointer, WriteAheadLog, replay_log
+
+
+class UnknownLabwareError(LookupError):
+    """There is no labware with the given vendor and product number"""
+
+
+class UnknownQueryHandleError(LookupError):
+    """There is no prepared query with the given handle (never prepared, or evicted)"""
+
+
+class LabwareService:
+    def __init__(
+        self,
+        ontology_sources: Sequence[str] = (),
+        snapshot_path: Optional[str] = None,
+        wal_path: Optional[str] = None,
+        checkpoint_interval: float = 300.0,
+        query_timeout: Optional[float] = None,
+        query_row_budget: Optional[int] = None,
+        plan_cache_size: int = 1000,
+        result_cache_bytes: int = 32 << 20,
+        prepared_query_limit: int = 1000,
+    ) -> None:
+        """labware store with the operations of the SiLA features, in this process
+
+        :param ontology_sources: ontology source files (N-Triples)
+        :param snapshot_path: compiled snapshot, loaded if it is up to date, else (re)compiled from the sources
+        :param wal_path: write-ahead log of the created labware, None: created labware is not persisted
+        :param checkpoint_interval: seconds between two checkpoints of the write-ahead log into the snapshot
+        :param query_timeout: default time limit of a query in seconds, None for no limit
+        :param query_row_budget: maximal number of intermediate results of a query, None for no limit
+        :param plan_cache_size: number of query plans kept for repeated queries, 0: no plan cache
+        :param result_cache_bytes: total size of the query results kept for repeated queries (query_json),
+            0: no result cache
+        :param prepared_query_limit: number of prepared queries kept, the least recently used are dropped first
+        """
+        snapshot = open_snapshot(ontology_sources, snapshot_path)
+        self.store = snapshot.store
+        self.labware_index = snapshot.labware_index
+        self.dimension_table = snapshot.dimension_table
+        self.source_hash = snapshot.source_hash
+        self.plan_cache = PlanCache(plan_cache_size) if plan_cache_size > 0 else None
+        self.query_engine = QueryEngine(self.store, plan_cache=self.plan_cache)
+        self.result_cache = ResultCache(self.store, result_cache_bytes) if result_cache_bytes > 0 else None
+        self.query_timeout = query_timeout
+        self.query_row_budget = query_row_budget
+        # handle -> (normalized query text with its parameters, plan)
+        self.prepared_query_limit = prepared_query_limit
+        self._prepared: "OrderedDict[str, Tuple[str, QueryPlan]]" = OrderedDict()
+        self._prepared_lock = Lock()
+
+        # created labware is logged before it is acknowledged, checkpoints go into the snapshot
+        self.write_lock = Lock()
+        self.write_ahead_log: Optional[WriteAheadLog] = None
+        self.checkpointer: Optional[Checkpointer] = None
+        if wal_path is not None:
+            self.write_ahead_log = WriteAheadLog(wal_path, after_lsn=snapshot.wal_lsn)
+            replay_log(self.store, self.write_ahead_log, snapshot.wal_lsn)
+            self.write_ahead_log.attach(self.store)
+            if snapshot_path is not None:
+                self.checkpointer = Checkpointer(
+                    snapshot_path, snapshot, self.write_ahead_log, self.write_lock, checkpoint_interval
+                )
+                self.checkpointer.start()
+
+    def close(self) -> None:
+        """stops the checkpoints and closes the write-ahead log"""
+        if self.checkpointer is not None:
+            self.checkpointer.stop()
+        if self.write_ahead_log is not None:
+            self.write_ahead_log.close()
+
+    def __enter__(self) -> "LabwareService":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def dimensions(self, vendor: str, product_number: str) -> Dict[str, Any]:
+        """dimension record of a labware, read from the dimension columns of the snapshot
+
+        :raises UnknownLabwareError: if there is no labware with this vendor and product number
+        """
+        # pinned store version for the key and the dimensions, concurrent writes are not visible to this call
+        version = self.store.version
+        labware_id = self.labware_index.lookup(vendor, product_number, version)
+        if labware_id is None:
+            raise UnknownLabwareError(f"There is no labware '{product_number}' of vendor '{vendor}'.")
+        return self.dimension_table.dimensions(labware_id, version)
+
+    def dimensions_batch(self, keys: Iterable[Tuple[str, str]]) -> List[Optional[Dict[str, Any]]]:
+        """dimension records of many labware, in the order of the keys, None for unknown labware
+
+        :param keys: (vendor, product number) of the labware
+        """
+        version = self.store.version
+        lookup = self.labware_index.lookup
+        dimensions = self.dimension_table.dimensions
+        results: List[Optional[Dict[str, Any]]] = []
+        for vendor, product_number in keys:
+            labware_id = lookup(vendor, product_number, version)
+            results.append(None if labware_id is None else dimensions(labware_id, version))
+        return results
+
+    @contextmanager
+    def write_transaction(self) -> Iterator[None]:
+        """serializes a write to the store, on exit the write is durable in the write-ahead log"""
+        with self.write_lock:
+            yield
+            lsn = self.write_ahead_log.last_lsn if self.write_ahead_log is not None else 0
+        if self.write_ahead_log is not None:
+            self.write_ahead_log.sync(lsn)
+
+    def create_labware(self, name: str) -> None:
+        """creates a labware individual"""
+        labware = labware_iri(name)
+        # the store indexes (incl. the labware index) are updated on insert, writes must not interleave
+        with self.write_transaction():
+            self.store.add_all(
+                [(labware, iri(RDF.type), iri(LABWARE.Labware)), (labware, iri(RDFS.label), literal(name))]
+            )
+
+    def create_labware_batch(self, definitions: Sequence[LabwareDefinition]) -> List[Optional[str]]:
+        """creates labware individuals as one store update, see labware_batch.create_labware_batch
+
+        :returns: per definition None if it was created, else the error
+        """
+        with self.write_transaction():
+            return create_labware_batch(self.store, self.labware_index, definitions)
+
+    def query_budget(self, timeout: Optional[float] = None) -> QueryBudget:
+        """budget of a query: the time limit (default: query_timeout) and the row budget of the service
+
+        :param timeout: seconds the query may take, None or <= 0 for the default
+        """
+        if timeout is None or timeout <= 0:
+            timeout = self.query_timeout
+        return QueryBudget(timeout, self.query_row_budget)
+
+    def query(self, text: str, budget: Optional[QueryBudget] = None) -> QueryResult:
+        """evaluates a SPARQL query on the current store version, the rows are produced while the result is consumed
+
+        :param text: SPARQL query text
+        :param budget: limits of the evaluation, default: query_budget()
+        :raises SPARQLSyntaxError: if the query is not valid (or not supported) SPARQL
+        """
+        return self.query_engine.query(text, budget if budget is not None else self.query_budget())
+
+    def query_json(self, text: str, budget: Optional[QueryBudget] = None) -> str:
+        """result of a SPARQL query in the SPARQL 1.1 query results JSON format,
+        the result of a repeated query is taken from the result cache while the store did not change it
+
+        :param text: SPARQL query text
+        :param budget: limits of the evaluation, default: query_budget()
+        :raises SPARQLSyntaxError: if the query is not valid (or not supported) SPARQL
+        :raises QueryLimitExceeded: if the evaluation exceeded its budget
+        """
+        engine = self.query_engine
+        version = self.store.version
+        key = engine.normalize(text) if self.result_cache is not None else text
+        return self._result_json(key, lambda: engine.prepare(text, version), (), budget or self.query_budget(), version)
+
+    def prepare_query(self, text: str, parameters: Sequence[str] = ()) -> str:
+        """parses and plans a query with parameters for repeated execution (execute_prepared)
+
+        The handle is derived from the normalized query text and the parameters: preparing the same
+        query again gives the same handle.
+
+        :param text: SPARQL query text
+        :param parameters: names of variables of the graph pattern (without '?') bound on execution
+        :returns: handle of the prepared query
+        :raises SPARQLSyntaxError: if the query is not valid (or not supported) SPARQL or a parameter
+            is not a variable of its graph pattern
+        """
+        engine = self.query_engine
+        plan = engine.prepare(text, parameters=parameters)
+        key = engine.normalize(text)
+        if parameters:
+            key += " PARAMETERS " + " ".join(f"?{name}" for name in plan.parameters)
+        handle = hashlib.sha256(key.encode("utf-8")).hexdigest()[:32]
+        with self._prepared_lock:
+            self._prepared[handle] = (key, plan)
+            self._prepared.move_to_end(handle)
+            while len(self._prepared) > self.prepared_query_limit:
+                self._prepared.popitem(last=False)
+        return handle
+
+    def execute_prepared(self, handle: str, bindings: Dict[str, str], budget: Optional[QueryBudget] = None) -> str:
+        """result of a prepared query in the SPARQL 1.1 query results JSON format, see query_json
+
+        :param handle: handle of the prepared query (see prepare_query)
+        :param bindings: parameter name -> IRI or literal in SPARQL or N-Triples notation, e.g. '"Corning"'
+        :param budget: limits of the evaluation, default: query_budget()
+        :raises UnknownQueryHandleError: if there is no prepared query with this handle
+        :raises BindingError: if the bindings do not give exactly one term for each parameter
+        :raises QueryLimitExceeded: if the evaluation exceeded its budget
+        """
+        return self.execute_prepared_batch(handle, [bindings], budget)[0]
+
+    def execute_prepared_batch(
+        self, handle: str, binding_sets: Sequence[Dict[str, str]], budget: Optional[QueryBudget] = None
+    ) -> List[str]:
+        """results of a prepared query for many sets of parameter values, all on the same store version
+
+        The bindings are checked before the first execution, the budget applies to the whole batch.
+
+        :param handle: handle of the prepared query (see prepare_query)
+        :param binding_sets: parameter values of each execution, see execute_prepared
+        :param budget: limits of the evaluation, default: query_budget()
+        :returns: results in the order of the binding sets
+        """
+        engine = self.query_engine
+        version = self.store.version
+        with self._prepared_lock:
+            prepared = self._prepared.get(handle)
+            if prepared is None:
+                raise UnknownQueryHandleError(f"There is no prepared query with the handle '{handle}'.")
+            self._prepared.move_to_end(handle)
+        key, plan = prepared
+        if not plan.is_current(version):
+            plan = engine.plan(plan.query, version, plan.parameters)
+            with self._prepared_lock:
+                if handle in self._prepared:
+                    self._prepared[handle] = (key, plan)
+        values = [engine.bind(plan, bindings) for bindings in binding_sets]
+        budget = budget or self.query_budget()
+        return [
+            self._result_json(
+                f"{key} BINDINGS {' '.join(terms)}" if terms else key, lambda: plan, terms, budget, version
+            )
+            for terms in values
+        ]
+
+    def _result_json(
+        self,
+        key: str,
+        plan: Callable[[], QueryPlan],
+        values: Sequence[str],
+        budget: QueryBudget,
+        version: StoreVersion,
+    ) -> str:
+        """serialized result of a query, from the result cache if possible
+
+        :param key: result cache key, the normalized query text (and parameter values)
+        :param plan: gives the plan of the query, only called if the result is not cached
+        :param values: terms of the parameters of the plan
+        """
+        engine, cache = self.query_engine, self.result_cache
+        if cache is None:
+            return engine.execute(plan(), budget, version, values).to_json()
+        result = cache.get(key, version)
+        if result is None:
+            start = time.perf_counter()
+            planned = plan()
+            result = engine.execute(planned, budget, version, values).to_json()
+            if not planned.query.explain:
+                cache.put(key, version, result, query_predicates(planned.query), time.perf_counter() - start)
+        return result
+
+    def catalog_version(self) -> str:
+        """version of the labware catalog
+
+        The store only grows, so the ontology sources and the number of triples identify its content.
+        """
+        return f"{self.source_hash}-{len(self.store.version)}"
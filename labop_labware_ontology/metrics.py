@@ -0,0 +1,232 @@
+"""_____________________________________________________________________
+
+:PROJECT: LabOP Labware Ontology
+
+* Metrics in the Prometheus text exposition format *
+
+:details: Counters, gauges and histograms with labels, rendered in the Prometheus text exposition format
+          (version 0.0.4). Values that are known elsewhere (e.g. the store size or the hits of a cache)
+          are not duplicated: such a metric has a function computing its samples when it is rendered.
+
+          serve_metrics() serves the rendered metrics over HTTP (GET /metrics) for a Prometheus scraper.
+
+.. note:: -
+.. todo:: -
+________________________________________________________________________
+"""
+
+import bisect
+import math
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from threading import Lock, Thread
+from typing import Callable, Dict, Iterator, List, Mapping, Optional, Sequence, Tuple, Union
+
+# seconds, from a lookup in the labware index to a query scanning the store
+LATENCY_BUCKETS = (
+    0.0001,
+    0.00025,
+    0.0005,
+    0.001,
+    0.0025,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+LabelValues = Tuple[str, ...]
+SampleFunction = Callable[[], Union[float, Mapping[LabelValues, float]]]
+
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    if value == int(value) and abs(value) < 1e15:
+        return str(int(value))
+    return repr(float(value))
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str]) -> str:
+    if not names:
+        return ""
+    escaped = (str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"') for value in values)
+    return "{" + ",".join(f'{name}="{value}"' for name, value in zip(names, escaped)) + "}"
+
+
+class Metric:
+    kind = "untyped"
+
+    def __init__(
+        self, name: str, help_text: str, label_names: Sequence[str] = (), function: Optional[SampleFunction] = None
+    ) -> None:
+        """a metric with one value per combination of label values
+
+        :param name: metric name, e.g. labware_calls_total
+        :param help_text: description of the metric
+        :param label_names: names of the labels, the values are given in this order
+        :param function: computes the samples when rendered (a value, or a value per label values)
+        """
+        self.name = name
+        self.help_text = help_text
+        self.label_names = tuple(label_names)
+        self.function = function
+        self._values: Dict[LabelValues, float] = {}
+        self._lock = Lock()
+
+    def value(self, *labels: str) -> float:
+        return self._values.get(tuple(labels), 0.0)
+
+    def _add(self, labels: LabelValues, amount: float) -> None:
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0.0) + amount
+
+    def samples(self) -> Iterator[Tuple[str, Sequence[str], LabelValues, float]]:
+        """(name, label names, label values, value) of all samples"""
+        if self.function is not None:
+            values = self.function()
+            if not isinstance(values, Mapping):
+                values = {(): values}
+        else:
+            with self._lock:
+                values = dict(self._values)
+        for labels, value in sorted(values.items()):
+            yield self.name, self.label_names, labels, value
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} {self.kind}"]
+        for name, label_names, labels, value in self.samples():
+            lines.append(f"{name}{_format_labels(label_names, labels)} {_format_value(value)}")
+        return lines
+
+
+class Counter(Metric):
+    kind = "counter"
+
+    def inc(self, *labels: str, amount: float = 1.0) -> None:
+        self._add(labels, amount)
+
+
+class Gauge(Metric):
+    kind = "gauge"
+
+    def inc(self, *labels: str, amount: float = 1.0) -> None:
+        self._add(labels, amount)
+
+    def dec(self, *labels: str, amount: float = 1.0) -> None:
+        self._add(labels, -amount)
+
+    def set(self, value: float, *labels: str) -> None:
+        with self._lock:
+            self._values[labels] = value
+
+
+class Histogram(Metric):
+    kind = "histogram"
+
+    def __init__(
+        self, name: str, help_text: str, label_names: Sequence[str] = (), buckets: Sequence[float] = LATENCY_BUCKETS
+    ) -> None:
+        """distribution of observed values in buckets (upper bounds, +Inf is added)"""
+        super().__init__(name, help_text, label_names)
+        self.buckets = tuple(sorted(buckets))
+        # per label values: observations per bucket (not cumulative, the last one is +Inf), sum
+        self._histograms: Dict[LabelValues, Tuple[List[int], List[float]]] = {}
+
+    def observe(self, value: float, *labels: str) -> None:
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            histogram = self._histograms.get(labels)
+            if histogram is None:
+                histogram = self._histograms[labels] = ([0] * (len(self.buckets) + 1), [0.0])
+            histogram[0][index] += 1
+            histogram[1][0] += value
+
+    def count(self, *labels: str) -> int:
+        histogram = self._histograms.get(tuple(labels))
+        return sum(histogram[0]) if histogram is not None else 0
+
+    def samples(self) -> Iterator[Tuple[str, Sequence[str], LabelValues, float]]:
+        with self._lock:
+            histograms = {labels: (list(counts), total[0]) for labels, (counts, total) in self._histograms.items()}
+        bucket_labels = self.label_names + ("le",)
+        for labels, (counts, total) in sorted(histograms.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets + (math.inf,), counts):
+                cumulative += count
+                yield f"{self.name}_bucket", bucket_labels, labels + (_format_value(bound),), cumulative
+            yield f"{self.name}_sum", self.label_names, labels, total
+            yield f"{self.name}_count", self.label_names, labels, cumulative
+
+
+class MetricsRegistry:
+    def __init__(self) -> None:
+        """the metrics of a process, rendered together"""
+        self._metrics: Dict[str, Metric] = {}
+        self._lock = Lock()
+
+    def register(self, metric: Metric) -> Metric:
+        with self._lock:
+            if metric.name in self._metrics:
+                raise ValueError(f"metric {metric.name} is already registered")
+            self._metrics[metric.name] = metric
+        return metric
+
+    def counter(
+        self, name: str, help_text: str, label_names: Sequence[str] = (), function: Optional[SampleFunction] = None
+    ) -> Counter:
+        return self.register(Counter(name, help_text, label_names, function))
+
+    def gauge(
+        self, name: str, help_text: str, label_names: Sequence[str] = (), function: Optional[SampleFunction] = None
+    ) -> Gauge:
+        return self.register(Gauge(name, help_text, label_names, function))
+
+    def histogram(
+        self, name: str, help_text: str, label_names: Sequence[str] = (), buckets: Sequence[float] = LATENCY_BUCKETS
+    ) -> Histogram:
+        return self.register(Histogram(name, help_text, label_names, buckets))
+
+    def __getitem__(self, name: str) -> Metric:
+        return self._metrics[name]
+
+    def render(self) -> str:
+        """all metrics in the Prometheus text exposition format"""
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines = []
+        for metric in metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+def serve_metrics(registry: MetricsRegistry, address: str, port: int) -> ThreadingHTTPServer:
+    """serves the metrics at http://address:port/metrics in a background thread, shutdown() stops it"""
+
+    class MetricsHandler(BaseHTTPRequestHandler):
+        def do_GET(self) -> None:  # pylint: disable=invalid-name
+            if self.path.split("?")[0] not in ("/", "/metrics"):
+                self.send_error(404)
+                return
+            body = registry.render().encode()
+            self.send_response(200)
+            self.send_header("Content-Type", CONTENT_TYPE)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args) -> None:
+            pass
+
+    server = ThreadingHTTPServer((address, port), MetricsHandler)
+    server.daemon_threads = True
+    Thread(target=server.serve_forever, name="metrics-http", daemon=True).start()
+    return server
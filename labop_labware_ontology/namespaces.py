@@ -0,0 +1,44 @@
+"""_____________________________________________________________________
+
+:PROJECT: LabOP Labware Ontology
+
+* Namespaces of the labware ontology *
+
+:details: IRIs of the vocabularies used by the labware ontology store.
+
+.. note:: -
+.. todo:: -
+________________________________________________________________________
+"""
+
+
+class Namespace(str):
+    """IRI prefix - attribute access returns the full IRI of a local name, e.g. RDF.type"""
+
+    def __getattr__(self, local_name: str) -> str:
+        if local_name.startswith("__"):
+            raise AttributeError(local_name)
+        return self + local_name
+
+    def term(self, local_name: str) -> str:
+        """full IRI of a local name (for local names that are no python identifiers)
+
+        :param local_name: local name within the namespace
+        :type local_name: str
+        """
+        return self + local_name
+
+
+RDF = Namespace("http://www.w3.org/1999/02/22-rdf-syntax-ns#")
+RDFS = Namespace("http://www.w3.org/2000/01/rdf-schema#")
+OWL = Namespace("http://www.w3.org/2002/07/owl#")
+XSD = Namespace("http://www.w3.org/2001/XMLSchema#")
+LABWARE = Namespace("http://www.w3id.org/labop/labware#")
+
+DEFAULT_PREFIXES = {
+    "rdf": str(RDF),
+    "rdfs": str(RDFS),
+    "owl": str(OWL),
+    "xsd": str(XSD),
+    "lw": str(LABWARE),
+}
@@ -0,0 +1,246 @@
+"""_____________________________________________________________________
+
+:PROJECT: LabOP Labware Ontology
+
+* Query caches *
+
+:details: Automation clients send the same query texts again and again.
+          The PlanCache keeps the plans (parsed query, constants resolved to term IDs, join steps)
+          of the most recently used queries, keyed by the normalized query text (see sparql.normalize_query),
+          so a repeated query is neither parsed nor planned again.
+
+          A cached plan is made again when it is no longer current (QueryPlan.is_current): a constant unknown
+          when planning may be in the store now, or the size of the store changed materially.
+
+          The ResultCache keeps serialized results of repeated queries until a write changes triples
+          of a predicate the query depends on, bounded by the total size of the results.
+
+.. note:: -
+.. todo:: -
+________________________________________________________________________
+"""
+
+import heapq
+import itertools
+from collections import OrderedDict
+from threading import Lock
+from typing import Dict, FrozenSet, List, NamedTuple, Optional, Sequence, Tuple
+
+from .sparql import Query, QueryPlan, SubClassPath, Variable, normalize_query
+from .triple_store import IDTriple, StoreVersion, TripleStore
+
+
+class PlanCache:
+    def __init__(self, max_size: int = 1000) -> None:
+        """plans by normalized query text, the least recently used plans are evicted first
+
+        A cache serves one QueryEngine: the normalization depends on the prefixes of the engine.
+
+        :param max_size: maximal number of plans
+        """
+        self.max_size = max_size
+        self._plans: "OrderedDict[str, QueryPlan]" = OrderedDict()
+        # query text as sent -> normalized text, a repeated text is not even tokenized
+        self._keys: "OrderedDict[str, str]" = OrderedDict()
+        self._lock = Lock()
+        # lookups answered from the cache, not answered, and plans made again (metrics)
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    def __len__(self) -> int:
+        return len(self._plans)
+
+    def key(self, text: str, prefixes: Optional[Dict[str, str]] = None) -> str:
+        """the cache key of a query text: its normalized text
+
+        :raises SPARQLSyntaxError: if the query contains invalid characters
+        """
+        with self._lock:
+            key = self._keys.get(text)
+            if key is not None:
+                self._keys.move_to_end(text)
+                return key
+        key = normalize_query(text, prefixes)
+        with self._lock:
+            self._keys[text] = key
+            while len(self._keys) > self.max_size:
+                self._keys.popitem(last=False)
+        return key
+
+    def get(self, key: str, version: StoreVersion) -> Optional[QueryPlan]:
+        """the cached plan, None if there is none or it is not current for the store version"""
+        with self._lock:
+            plan = self._plans.get(key)
+            if plan is None:
+                self.misses += 1
+                return None
+            if not plan.is_current(version):
+                del self._plans[key]
+                self.misses += 1
+                self.invalidations += 1
+                return None
+            self._plans.move_to_end(key)
+            self.hits += 1
+            return plan
+
+    def put(self, key: str, plan: QueryPlan) -> None:
+        with self._lock:
+            self._plans[key] = plan
+            self._plans.move_to_end(key)
+            while len(self._plans) > self.max_size:
+                self._plans.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._plans.clear()
+            self._keys.clear()
+
+
+class _CachedResult(NamedTuple):
+    result: str
+    version: int  # number of the store version the result was computed on
+    predicates: Optional[FrozenSet[str]]  # predicates the result depends on, None: all
+    size: int  # bytes
+    cost: float  # seconds the evaluation took
+    priority: float
+
+
+def query_predicates(query: Query) -> Optional[FrozenSet[str]]:
+    """the predicates of the triple patterns of a query, None if a predicate is a variable
+
+    Only triples with these predicates can change the result of the query.
+    """
+    predicates = set()
+    for pattern in query.patterns:
+        if isinstance(pattern.predicate, Variable):
+            return None
+        if isinstance(pattern.predicate, SubClassPath):
+            predicates.update(pattern.predicate.predicates)
+        else:
+            predicates.add(pattern.predicate)
+    return frozenset(predicates)
+
+
+class ResultCache:
+    # bytes accounted per entry in addition to the result (key, entry, bookkeeping)
+    ENTRY_OVERHEAD = 200
+
+    def __init__(self, store: TripleStore, max_bytes: int = 32 << 20, max_entry_bytes: Optional[int] = None) -> None:
+        """serialized query results by (normalized query text, store version)
+
+        An entry computed on store version V answers the same query on any later version, until a write
+        adds triples with a predicate the query depends on (or any triple if a predicate of the query is
+        a variable) - the entry is then dropped. The writes are observed as a listener of the store.
+
+        When the cache is full, the entry with the lowest priority is evicted (GreedyDual-Size):
+        the priority is the evaluation time per byte plus an inflation value that grows with every
+        eviction, so small results of expensive queries stay longest and unused entries age out.
+
+        :param store: the store the results are computed on
+        :param max_bytes: maximal total size of the cached results
+        :param max_entry_bytes: larger results are not cached, default: max_bytes / 16
+        """
+        self.store = store
+        self.max_bytes = max_bytes
+        self.max_entry_bytes = max_entry_bytes if max_entry_bytes is not None else max_bytes // 16
+        self._entries: Dict[str, _CachedResult] = {}
+        self._heap: List[Tuple[float, int, str]] = []  # (priority, sequence, key), outdated items are skipped
+        self._sequence = itertools.count()
+        self._inflation = 0.0
+        self._lock = Lock()
+        # number of the last store version whose new triples were checked against the entries
+        self._checked_version = store.version.number
+        self.bytes = 0
+        # lookups answered from the cache, not answered, entries dropped by writes and evicted (metrics)
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+        self.evictions = 0
+        store.add_listener(self._triples_added)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: str, version: StoreVersion) -> Optional[str]:
+        """the cached result for the store version, None if there is none"""
+        with self._lock:
+            entry = self._entries.get(key)
+            # valid from the version it was computed on up to the last checked version
+            if entry is None or not entry.version <= version.number <= self._checked_version:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self._push(key, entry._replace(priority=self._inflation + entry.cost / entry.size))
+            return entry.result
+
+    def put(
+        self, key: str, version: StoreVersion, result: str, predicates: Optional[FrozenSet[str]], cost: float
+    ) -> None:
+        """caches the result of a query
+
+        :param key: normalized query text
+        :param version: the store version the result was computed on
+        :param result: serialized result
+        :param predicates: predicates the result depends on (see query_predicates), None: all
+        :param cost: seconds the evaluation took
+        """
+        # the results are JSON with ASCII escapes, one byte per character
+        size = len(result) + len(key) + self.ENTRY_OVERHEAD
+        if size > self.max_entry_bytes:
+            return
+        with self._lock:
+            # a write after the version is not checked against this result
+            if version.number != self._checked_version:
+                return
+            self._remove(key)
+            self.bytes += size
+            self._push(
+                key, _CachedResult(result, version.number, predicates, size, cost, self._inflation + cost / size)
+            )
+            while self.bytes > self.max_bytes:
+                self._evict()
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._heap.clear()
+            self.bytes = 0
+
+    def _push(self, key: str, entry: _CachedResult) -> None:
+        self._entries[key] = entry
+        heapq.heappush(self._heap, (entry.priority, next(self._sequence), key))
+        if len(self._heap) > 2 * len(self._entries) + 64:
+            # drop the outdated items
+            self._heap = [(cached.priority, next(self._sequence), name) for name, cached in self._entries.items()]
+            heapq.heapify(self._heap)
+
+    def _remove(self, key: str) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self.bytes -= entry.size
+
+    def _evict(self) -> None:
+        while True:
+            priority, _, key = heapq.heappop(self._heap)
+            entry = self._entries.get(key)
+            if entry is not None and entry.priority == priority:
+                break
+        self._inflation = priority
+        self._remove(key)
+        self.evictions += 1
+
+    def _triples_added(self, triples: Sequence[IDTriple]) -> None:
+        decode = self.store.dictionary.decode
+        predicates = {decode(p) for p in {p for _, p, _ in triples}}
+        with self._lock:
+            stale = [
+                key
+                for key, entry in self._entries.items()
+                if entry.predicates is None or not entry.predicates.isdisjoint(predicates)
+            ]
+            for key in stale:
+                self._remove(key)
+            self.invalidations += len(stale)
+            # called after the new version is published, writes are blocked meanwhile
+            self._checked_version = self.store.version.number
@@ -0,0 +1,135 @@
+"""_____________________________________________________________________
+
+:PROJECT: LabOP Labware Ontology
+
+* Ontology sources *
+
+:details: Reading ontology source files into a triple store.
+          N-Triples (.nt) is parsed natively, all other RDF formats (Turtle, OWL/XML, RDF/XML, ...)
+          are read with rdflib, which has to be installed for them.
+
+.. note:: -
+.. todo:: -
+________________________________________________________________________
+"""
+
+import logging
+import os
+import re
+from typing import Iterable, Iterator, TextIO, Tuple
+
+from .namespaces import XSD
+from .rdf_terms import blank_node, iri, is_literal, literal, split_literal, unescape
+from .triple_store import TripleStore
+
+Triple = Tuple[str, str, str]
+
+_TERM = r'(<[^>]*>|_:[A-Za-z0-9_\-.]+|"(?:[^"\\]|\\.)*"(?:\^\^<[^>]*>|@[A-Za-z]+(?:-[A-Za-z0-9]+)*)?)'
+_NTRIPLES_LINE_RE = re.compile(rf"^\s*{_TERM}\s*{_TERM}\s*{_TERM}\s*\.\s*(?:#.*)?$")
+_BLANK_LINE_RE = re.compile(r"^\s*(?:#.*)?$")
+_XSD_STRING_SUFFIX = f"^^<{XSD.string}>"
+
+_RDFLIB_FORMATS = {
+    ".ttl": "turtle",
+    ".n3": "n3",
+    ".owl": "xml",
+    ".rdf": "xml",
+    ".xml": "xml",
+    ".jsonld": "json-ld",
+    ".trig": "trig",
+}
+
+
+class SourceError(Exception):
+    """An ontology source could not be read"""
+
+
+def _canonical(term: str) -> str:
+    if "\\" not in term:
+        # fast path - nothing to unescape, only the literal suffix may need normalization
+        if not is_literal(term):
+            return term
+        end = term.rindex('"') + 1
+        suffix = term[end:]
+        if suffix == _XSD_STRING_SUFFIX:
+            return term[:end]
+        if suffix.startswith("@"):
+            return term[:end] + suffix.lower()
+        return term
+    if is_literal(term):
+        lexical, datatype, lang = split_literal(term)
+        return literal(lexical, datatype=datatype, lang=lang)
+    if term.startswith("<"):
+        return iri(unescape(term[1:-1]))
+    return term
+
+
+def parse_ntriples(lines: Iterable[str], source: str = "<string>") -> Iterator[Triple]:
+    """parses N-Triples, terms are returned in canonical N-Triples notation
+
+    :param lines: lines of an N-Triples document
+    :param source: name of the source for error messages
+    :raises SourceError: on lines that are no valid triples
+    """
+    for line_number, line in enumerate(lines, 1):
+        match = _NTRIPLES_LINE_RE.match(line)
+        if match is None:
+            if _BLANK_LINE_RE.match(line):
+                continue
+            raise SourceError(f"{source}:{line_number}: invalid N-Triples line")
+        yield _canonical(match.group(1)), _canonical(match.group(2)), _canonical(match.group(3))
+
+
+def write_ntriples(triples: Iterable[Triple], stream: TextIO) -> int:
+    """writes triples (in N-Triples notation) as N-Triples document, returns the number of triples"""
+    count = 0
+    for s, p, o in triples:
+        stream.write(f"{s} {p} {o} .\n")
+        count += 1
+    return count
+
+
+def _read_with_rdflib(path: str, rdf_format: str) -> Iterator[Triple]:
+    try:
+        import rdflib
+    except ImportError as error:
+        raise SourceError(f"{path}: reading {rdf_format} requires rdflib (pip install rdflib)") from error
+
+    def convert(term) -> str:
+        if isinstance(term, rdflib.URIRef):
+            return iri(str(term))
+        if isinstance(term, rdflib.BNode):
+            return blank_node(str(term))
+        datatype = str(term.datatype) if term.datatype is not None else None
+        return literal(str(term), datatype=datatype, lang=term.language)
+
+    graph = rdflib.Graph()
+    graph.parse(path, format=rdf_format)
+    for s, p, o in graph:
+        yield convert(s), convert(p), convert(o)
+
+
+def read_source(path: str) -> Iterator[Triple]:
+    """triples of an ontology source file, the format is chosen by the file extension
+
+    :param path: path of the source file
+    :type path: str
+    """
+    extension = os.path.splitext(path)[1].lower()
+    if extension == ".nt":
+        with open(path, "r", encoding="utf-8") as stream:
+            yield from parse_ntriples(stream, path)
+    elif extension in _RDFLIB_FORMATS:
+        yield from _read_with_rdflib(path, _RDFLIB_FORMATS[extension])
+    else:
+        raise SourceError(f"{path}: unknown ontology source format '{extension}'")
+
+
+def load_sources(store: TripleStore, paths: Iterable[str]) -> int:
+    """adds the triples of all source files to the store, returns the number of new triples"""
+    added = 0
+    for path in paths:
+        count = store.add_all(read_source(path))
+        logging.debug(f"loaded {count} triples from {path}")
+        added += count
+    return added
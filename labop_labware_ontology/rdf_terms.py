@@ -0,0 +1,142 @@
+"""_____________________________________________________________________
+
+:PROJECT: LabOP Labware Ontology
+
+* RDF term encoding *
+
+:details: RDF terms are handled in their N-Triples notation, e.g. '<http://ex.org/a>',
+          '"96"^^<http://www.w3.org/2001/XMLSchema#integer>' or '_:b0'.
+          This notation is unique per term, so it can be used directly as dictionary key.
+
+.. note:: -
+.. todo:: -
+________________________________________________________________________
+"""
+
+import re
+from typing import Any, Dict, Optional, Tuple, Union
+
+from .namespaces import XSD
+
+_ESCAPES = {"\\": "\\\\", '"': '\\"', "\n": "\\n", "\r": "\\r", "\t": "\\t"}
+_ESCAPE_RE = re.compile(r'[\\"\n\r\t]')
+_UNESCAPE_RE = re.compile(r"\\(?:u([0-9A-Fa-f]{4})|U([0-9A-Fa-f]{8})|(.))")
+_UNESCAPES = {"t": "\t", "b": "\b", "n": "\n", "r": "\r", "f": "\f", '"': '"', "'": "'", "\\": "\\"}
+
+_INTEGER_TYPES = {XSD.integer, XSD.int, XSD.long, XSD.short, XSD.nonNegativeInteger, XSD.positiveInteger}
+_FLOAT_TYPES = {XSD.decimal, XSD.double, XSD.float}
+
+
+def escape(lexical: str) -> str:
+    """escapes a lexical form for the N-Triples notation"""
+    return _ESCAPE_RE.sub(lambda match: _ESCAPES[match.group()], lexical)
+
+
+def unescape(escaped: str) -> str:
+    """resolves N-Triples / SPARQL string escapes"""
+    if "\\" not in escaped:
+        return escaped
+
+    def _replace(match) -> str:
+        short_hex, long_hex, char = match.groups()
+        if char is None:
+            return chr(int(short_hex or long_hex, 16))
+        if char not in _UNESCAPES:
+            raise ValueError(f"invalid escape sequence '\\{char}'")
+        return _UNESCAPES[char]
+
+    return _UNESCAPE_RE.sub(_replace, escaped)
+
+
+def iri(value: str) -> str:
+    """N-Triples notation of an IRI
+
+    :param value: the IRI
+    :type value: str
+    """
+    return f"<{value}>"
+
+
+def blank_node(label: str) -> str:
+    """N-Triples notation of a blank node"""
+    return f"_:{label}"
+
+
+def literal(value: Union[str, int, float, bool], datatype: Optional[str] = None, lang: Optional[str] = None) -> str:
+    """N-Triples notation of a literal - python numbers and booleans get their XSD datatype
+
+    :param value: lexical form or python value of the literal
+    :param datatype: datatype IRI, xsd:string literals are written as plain literals (RDF 1.1)
+    :param lang: language tag
+    """
+    if isinstance(value, bool):
+        lexical, datatype = ("true" if value else "false"), datatype or XSD.boolean
+    elif isinstance(value, int):
+        lexical, datatype = str(value), datatype or XSD.integer
+    elif isinstance(value, float):
+        lexical, datatype = repr(value), datatype or XSD.double
+    else:
+        lexical = value
+    if lang:
+        return f'"{escape(lexical)}"@{lang.lower()}'
+    if datatype and datatype != XSD.string:
+        return f'"{escape(lexical)}"^^<{datatype}>'
+    return f'"{escape(lexical)}"'
+
+
+def is_iri(term: str) -> bool:
+    return term.startswith("<")
+
+
+def is_literal(term: str) -> bool:
+    return term.startswith('"')
+
+
+def is_blank_node(term: str) -> bool:
+    return term.startswith("_:")
+
+
+def split_literal(term: str) -> Tuple[str, Optional[str], Optional[str]]:
+    """splits a literal in N-Triples notation into (lexical form, datatype IRI, language tag)"""
+    end = term.rindex('"')
+    lexical = unescape(term[1:end])
+    suffix = term[end + 1 :]
+    if suffix.startswith("^^"):
+        return lexical, suffix[3:-1], None
+    if suffix.startswith("@"):
+        return lexical, None, suffix[1:]
+    return lexical, None, None
+
+
+def term_value(term: str) -> Any:
+    """python value of a term: IRIs and blank nodes as string without brackets, literals converted by datatype"""
+    if is_iri(term):
+        return term[1:-1]
+    if is_blank_node(term):
+        return term[2:]
+    lexical, datatype, _ = split_literal(term)
+    try:
+        if datatype in _INTEGER_TYPES:
+            return int(lexical)
+        if datatype in _FLOAT_TYPES:
+            return float(lexical)
+    except ValueError:
+        return lexical
+    if datatype == XSD.boolean:
+        return lexical in ("true", "1")
+    return lexical
+
+
+def term_to_json(term: str) -> Dict[str, str]:
+    """term in the SPARQL 1.1 query results JSON format"""
+    if is_iri(term):
+        return {"type": "uri", "value": term[1:-1]}
+    if is_blank_node(term):
+        return {"type": "bnode", "value": term[2:]}
+    lexical, datatype, lang = split_literal(term)
+    result = {"type": "literal", "value": lexical}
+    if datatype:
+        result["datatype"] = datatype
+    if lang:
+        result["xml:lang"] = lang
+    return result
@@ -0,0 +1,227 @@
+"""_____________________________________________________________________
+
+:PROJECT: LabOP Labware Ontology
+
+* Replication of a store to read replicas in other processes *
+
+:details: One writer process updates the store, read replicas in other processes
+          (e.g. the workers of a multi-process server) keep their copy of the store in sync:
+
+          - the publisher in the writer sends every store update (as N-Triples) to all connected replicas,
+            a new replica first gets all triples added since the snapshot was loaded
+          - a replica applies the updates in order, each as a new store version,
+            so its readers are never blocked
+          - a replica forwards write operations to the writer and returns after their update
+            was applied locally - a client reads its own writes from every process
+
+          Replicas connect over a local socket (multiprocessing.connection, authenticated by a shared key).
+          All replicas share the memory-mapped snapshot, only the triples added since it was written
+          are held by every process.
+
+.. note:: -
+.. todo:: -
+________________________________________________________________________
+"""
+
+import logging
+import pickle
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from itertools import count
+from multiprocessing.connection import Client, Connection, Listener
+from queue import Queue
+from threading import Event, Lock, Thread
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+from .triple_store import IDTriple, TripleStore
+
+WriteHandler = Callable[[str, Tuple[Any, ...]], Any]
+
+
+class ReplicationError(Exception):
+    """The writer process is not reachable"""
+
+
+class _ReplicaConnection:
+    def __init__(self, connection: Connection) -> None:
+        """connection of the publisher to one replica, messages are sent in order by a sender thread"""
+        self.connection = connection
+        self._outbox: "Queue[Optional[tuple]]" = Queue()
+        self._sender = Thread(target=self._send_messages, name="replication-sender", daemon=True)
+        self._sender.start()
+
+    def send(self, message: tuple) -> None:
+        self._outbox.put(message)
+
+    def close(self) -> None:
+        self._outbox.put(None)
+
+    def _send_messages(self) -> None:
+        while True:
+            message = self._outbox.get()
+            if message is None:
+                break
+            try:
+                self.connection.send(message)
+            except (OSError, ValueError):
+                break
+        self.connection.close()
+
+
+class ReplicationPublisher:
+    def __init__(
+        self, store: TripleStore, address: str, authkey: bytes, handler: WriteHandler, max_writers: int = 16
+    ) -> None:
+        """publishes the updates of a store to replicas and executes the write operations they forward
+
+        :param store: the store of the writer
+        :param address: path of the socket the replicas connect to
+        :param authkey: key shared with the replicas
+        :param handler: executes a forwarded write operation: handler(operation, args), returns its result
+        :param max_writers: number of forwarded operations executed concurrently
+        """
+        self.store = store
+        self.handler = handler
+        self._replicas: List[_ReplicaConnection] = []
+        self._lock = Lock()
+        self._executor = ThreadPoolExecutor(max_workers=max_writers, thread_name_prefix="replication-writer")
+        self._listener = Listener(address, family="AF_UNIX", authkey=authkey)
+        self.address = address
+        self._closed = False
+        store.add_listener(self._triples_added)
+        Thread(target=self._accept, name="replication-accept", daemon=True).start()
+
+    def close(self) -> None:
+        """disconnects all replicas"""
+        self._closed = True
+        self._listener.close()
+        with self._lock:
+            for replica in self._replicas:
+                replica.close()
+            self._replicas.clear()
+        self._executor.shutdown(wait=False)
+
+    def _decode(self, triples: Sequence[IDTriple]) -> list:
+        decode = self.store.dictionary.decode
+        return [(decode(s), decode(p), decode(o)) for s, p, o in triples]
+
+    def _triples_added(self, triples: Sequence[IDTriple]) -> None:
+        message = ("update", self._decode(triples))
+        with self._lock:
+            for replica in self._replicas:
+                replica.send(message)
+
+    def _accept(self) -> None:
+        while not self._closed:
+            try:
+                connection = self._listener.accept()
+            except OSError:
+                if self._closed:
+                    return
+                logging.exception("replica could not connect")
+                continue
+            replica = _ReplicaConnection(connection)
+            with self._lock:
+                # updates published meanwhile are sent again after the initial state - replicas ignore known triples
+                replica.send(("update", self._decode(list(self.store.version.delta()))))
+                self._replicas.append(replica)
+            Thread(target=self._receive, args=(replica,), name="replication-receiver", daemon=True).start()
+
+    def _receive(self, replica: _ReplicaConnection) -> None:
+        while True:
+            try:
+                _, call_id, operation, args = replica.connection.recv()
+            except (EOFError, OSError):
+                break
+            self._executor.submit(self._execute, replica, call_id, operation, args)
+        with self._lock:
+            if replica in self._replicas:
+                self._replicas.remove(replica)
+        replica.close()
+
+    def _execute(self, replica: _ReplicaConnection, call_id: int, operation: str, args: Tuple[Any, ...]) -> None:
+        try:
+            replica.send(("result", call_id, True, self.handler(operation, args)))
+        except Exception as error:  # pylint: disable=broad-except
+            try:
+                pickle.dumps(error)
+            except Exception:  # pylint: disable=broad-except
+                error = ReplicationError(f"{operation} failed in the writer process: {error!r}")
+            # after the update of a failed operation (if any), like for a successful one
+            replica.send(("result", call_id, False, error))
+
+
+class Replica:
+    def __init__(self, store: TripleStore, address: str, authkey: bytes, timeout: float = 30.0) -> None:
+        """keeps a store in sync with the store of the writer, returns when it is in sync
+
+        :param store: the store of this process, loaded from the same snapshot as the writer
+        :param address: path of the socket of the publisher
+        :param authkey: key shared with the publisher
+        :param timeout: seconds to wait for the writer (it may still be starting)
+        :raises ReplicationError: if the writer is not reachable
+        """
+        self.store = store
+        deadline = time.monotonic() + timeout
+        while True:
+            try:
+                self._connection = Client(address, family="AF_UNIX", authkey=authkey)
+                break
+            except OSError as error:
+                if time.monotonic() > deadline:
+                    raise ReplicationError(f"cannot connect to the writer process at {address}: {error}") from error
+                time.sleep(0.1)
+        self._calls: Dict[int, Future] = {}
+        self._call_ids = count()
+        self._lock = Lock()
+        self._error: Optional[ReplicationError] = None
+        self._synced = Event()
+        Thread(target=self._receive, name="replication-receiver", daemon=True).start()
+        if not self._synced.wait(timeout):
+            raise ReplicationError(f"no initial state from the writer process at {address}")
+
+    def close(self) -> None:
+        self._connection.close()
+
+    def call(self, operation: str, *args: Any) -> Any:
+        """executes a write operation in the writer, returns when its update is applied to this store
+
+        :raises ReplicationError: if the writer is not reachable
+        """
+        future: Future = Future()
+        with self._lock:
+            if self._error is not None:
+                raise self._error
+            call_id = next(self._call_ids)
+            self._calls[call_id] = future
+            try:
+                self._connection.send(("call", call_id, operation, args))
+            except OSError as error:
+                del self._calls[call_id]
+                raise ReplicationError(f"connection to the writer process lost: {error}") from error
+        return future.result()
+
+    def _receive(self) -> None:
+        while True:
+            try:
+                message = self._connection.recv()
+            except (EOFError, OSError):
+                break
+            if message[0] == "update":
+                # the writer sends updates before the results of the operations causing them
+                self.store.add_all(message[1])
+                self._synced.set()
+                continue
+            _, call_id, success, value = message
+            with self._lock:
+                future = self._calls.pop(call_id)
+            if success:
+                future.set_result(value)
+            else:
+                future.set_exception(value)
+        logging.error("connection to the writer process lost, this replica serves its last state")
+        with self._lock:
+            self._error = ReplicationError("connection to the writer process lost")
+            calls, self._calls = self._calls, {}
+        for future in calls.values():
+            future.set_exception(self._error)
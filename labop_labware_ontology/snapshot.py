@@ -0,0 +1,327 @@
+"""_____________________________________________________________________
+
+:PROJECT: LabOP Labware Ontology
+
+* Compiled binary ontology snapshot *
+
+:details: A snapshot holds the term dictionary, the SPO/POS/OSP indexes and the secondary indexes
+          of a store in one versioned binary file. It is memory-mapped on load, so opening even a large
+          catalog takes milliseconds instead of parsing the ontology sources again.
+
+          File layout (native byte order):
+
+          header          magic, format version, SHA-256 of the ontology sources, number of sections
+          section table   per section: name, array typecode, offset, length in bytes
+          sections        8-byte aligned arrays, "meta" is a JSON document
+
+          The numeric labware geometry is stored as columns (see dimension_table).
+
+          The snapshot is stale if the content hash of the ontology sources changed - it is then
+          rebuilt from the sources.
+
+          Checkpoints of the write-ahead log rewrite the snapshot with the triples added since it was compiled
+          and the LSN of the last logged update. These triples are also kept as N-Triples in the "delta" section,
+          so they survive a rebuild from changed sources.
+
+.. note:: -
+.. todo:: -
+________________________________________________________________________
+"""
+
+import hashlib
+import json
+import logging
+import mmap
+import os
+import struct
+import sys
+from array import array
+from datetime import datetime, timezone
+from io import StringIO
+from typing import Any, Dict, Iterable, List, NamedTuple, Optional, Sequence, Union
+
+from .compiled_index import PERMUTATION_ARRAYS, PERMUTATIONS, CompiledIndexes, CompiledPermutation, compile_indexes
+from .dimension_table import COLUMNS, DimensionTable
+from .labware_index import LabwareIndex
+from .rdf_sources import load_sources, parse_ntriples, write_ntriples
+from .term_dictionary import CompiledTerms, TermDictionary
+from .triple_store import Triple, TripleStore
+
+MAGIC = b"LWSNAPSH"
+FORMAT_VERSION = 1
+
+_HEADER = struct.Struct("<8sI32sI")
+_SECTION = struct.Struct("<31scQQ")
+_ALIGNMENT = 8
+
+SectionData = Union[bytes, array]
+
+
+class SnapshotError(Exception):
+    """The snapshot file is missing, damaged or of an incompatible format version"""
+
+
+class Snapshot(NamedTuple):
+    store: TripleStore
+    labware_index: LabwareIndex
+    dimension_table: DimensionTable
+    source_hash: Optional[str] = None
+    wal_lsn: int = 0  # LSN of the last write-ahead log record contained in the snapshot
+
+
+def sources_hash(paths: Sequence[str]) -> str:
+    """content hash (hex SHA-256) of the ontology sources and the snapshot format version
+
+    :param paths: ontology source files, the order is significant
+    """
+    digest = hashlib.sha256(f"labware snapshot format {FORMAT_VERSION}".encode())
+    for path in paths:
+        with open(path, "rb") as stream:
+            for chunk in iter(lambda: stream.read(1 << 20), b""):
+                digest.update(chunk)
+        digest.update(b"\x00")
+    return digest.hexdigest()
+
+
+class SnapshotFile:
+    def __init__(self, path: str) -> None:
+        """read-only memory-mapped snapshot file
+
+        :param path: path of the snapshot
+        :raises SnapshotError: if the file is no valid snapshot of the current format version
+        """
+        self.path = path
+        try:
+            with open(path, "rb") as stream:
+                self._mmap = mmap.mmap(stream.fileno(), 0, access=mmap.ACCESS_READ)
+        except (OSError, ValueError) as error:
+            raise SnapshotError(f"cannot open snapshot {path}: {error}") from error
+        buffer = memoryview(self._mmap)
+        self.source_hash, section_count = _read_header(bytes(buffer[: _HEADER.size]), path)
+        self.sections: Dict[str, memoryview] = {}
+        position = _HEADER.size
+        for _ in range(section_count):
+            raw_name, typecode, offset, length = _SECTION.unpack_from(buffer, position)
+            position += _SECTION.size
+            if offset + length > len(buffer):
+                raise SnapshotError(f"snapshot {path} is truncated")
+            section = buffer[offset : offset + length]
+            self.sections[raw_name.rstrip(b"\x00").decode()] = section.cast(typecode.decode())
+        self.meta: Dict[str, Any] = json.loads(bytes(self.sections.pop("meta")))
+        if self.meta.get("byteorder") != sys.byteorder:
+            raise SnapshotError(f"snapshot {path} was compiled on a {self.meta.get('byteorder')} endian machine")
+
+
+def _read_header(header: bytes, path: str):
+    if len(header) < _HEADER.size:
+        raise SnapshotError(f"snapshot {path} is truncated")
+    magic, version, digest, section_count = _HEADER.unpack(header)
+    if magic != MAGIC:
+        raise SnapshotError(f"{path} is no labware ontology snapshot")
+    if version != FORMAT_VERSION:
+        raise SnapshotError(f"snapshot {path} has format version {version}, expected {FORMAT_VERSION}")
+    return digest.hex(), section_count
+
+
+def read_source_hash(path: str) -> str:
+    """source hash stored in the snapshot header (without mapping the file)
+
+    :raises SnapshotError: if the file is missing or no valid snapshot
+    """
+    try:
+        with open(path, "rb") as stream:
+            header = stream.read(_HEADER.size)
+    except OSError as error:
+        raise SnapshotError(f"cannot open snapshot {path}: {error}") from error
+    return _read_header(header, path)[0]
+
+
+def write_snapshot(
+    path: str,
+    store: TripleStore,
+    labware_index: LabwareIndex,
+    source_hash: str,
+    meta: Optional[Dict[str, Any]] = None,
+    delta: Iterable[Triple] = (),
+) -> None:
+    """compiles the store and its secondary indexes into a snapshot file
+
+    The file is written next to the target and renamed, so readers never see a partial snapshot.
+
+    :param path: path of the snapshot
+    :param store: the store to compile (compiled base and in-memory triples are merged)
+    :param labware_index: the (vendor, product number) index of the store
+    :param source_hash: content hash of the ontology sources, see sources_hash
+    :param meta: additional entries for the meta data section
+    :param delta: triples of the store that are not from the ontology sources
+    """
+    terms = list(store.dictionary)
+    blob, offsets, table = CompiledTerms.build(terms)
+    compiled = compile_indexes(len(terms), store.match())
+    entries = list(labware_index.items())
+
+    sections: Dict[str, SectionData] = {
+        "terms.blob": blob,
+        "terms.offsets": offsets,
+        "terms.table": table,
+    }
+    for name, permutation in zip(PERMUTATIONS, (compiled.spo, compiled.pos, compiled.osp)):
+        for array_name, values in permutation.arrays.items():
+            sections[f"{name}.{array_name}"] = values
+    sections["labware.vendors"] = "\n".join(key[0] for key, _ in entries).encode()
+    sections["labware.product_numbers"] = "\n".join(key[1] for key, _ in entries).encode()
+    sections["labware.ids"] = array("I", (labware_id for _, labware_id in entries))
+    rows, columns = DimensionTable.build_arrays(store)
+    sections["dimensions.rows"] = rows
+    for name, column in columns.items():
+        sections[f"dimensions.{name}"] = column
+    delta_text = StringIO()
+    write_ntriples(delta, delta_text)
+    sections["delta"] = delta_text.getvalue().encode()
+    sections["meta"] = json.dumps(
+        {
+            "byteorder": sys.byteorder,
+            "created": datetime.now(timezone.utc).isoformat(),
+            "terms": len(terms),
+            "triples": len(compiled),
+            "labware": len(entries),
+            **(meta or {}),
+        }
+    ).encode()
+
+    table_size = _HEADER.size + _SECTION.size * len(sections)
+    layout = []
+    position = _align(table_size)
+    for name, data in sections.items():
+        length = len(data) * (data.itemsize if isinstance(data, array) else 1)
+        typecode = data.typecode if isinstance(data, array) else "B"
+        layout.append((name, typecode, position, length, data))
+        position = _align(position + length)
+
+    temporary_path = f"{path}.tmp{os.getpid()}"
+    with open(temporary_path, "wb") as stream:
+        stream.write(_HEADER.pack(MAGIC, FORMAT_VERSION, bytes.fromhex(source_hash), len(sections)))
+        for name, typecode, offset, length, _ in layout:
+            stream.write(_SECTION.pack(name.encode(), typecode.encode(), offset, length))
+        for _, _, offset, _, data in layout:
+            stream.write(b"\x00" * (offset - stream.tell()))
+            stream.write(data if isinstance(data, bytes) else data.tobytes())
+        stream.flush()
+        os.fsync(stream.fileno())
+    os.replace(temporary_path, path)
+    logging.info(f"wrote snapshot {path}: {len(terms)} terms, {len(compiled)} triples")
+
+
+def _align(position: int) -> int:
+    return (position + _ALIGNMENT - 1) // _ALIGNMENT * _ALIGNMENT
+
+
+def load_snapshot(path: str) -> Snapshot:
+    """opens a snapshot - the arrays stay in the memory-mapped file, nothing is parsed or rebuilt
+
+    :param path: path of the snapshot
+    :raises SnapshotError: if the file is no valid snapshot of the current format version
+    """
+    snapshot_file = SnapshotFile(path)
+    sections = snapshot_file.sections
+    try:
+        dictionary = TermDictionary(
+            CompiledTerms(sections["terms.blob"], sections["terms.offsets"], sections["terms.table"])
+        )
+        permutations = [
+            CompiledPermutation(*(sections[f"{name}.{array_name}"] for array_name in PERMUTATION_ARRAYS))
+            for name in PERMUTATIONS
+        ]
+        store = TripleStore(dictionary, CompiledIndexes(*permutations))
+        keys = zip(
+            str(sections["labware.vendors"], "utf-8").split("\n"),
+            str(sections["labware.product_numbers"], "utf-8").split("\n"),
+        )
+        labware_index = LabwareIndex(store, entries=dict(zip(keys, sections["labware.ids"])))
+        dimension_table = DimensionTable(
+            store, sections["dimensions.rows"], {name: sections[f"dimensions.{name}"] for name in COLUMNS}
+        )
+    except KeyError as error:
+        raise SnapshotError(f"snapshot {path} has no section {error}") from error
+    return Snapshot(
+        store, labware_index, dimension_table, snapshot_file.source_hash, snapshot_file.meta.get("wal_lsn", 0)
+    )
+
+
+def read_delta(path: str) -> List[Triple]:
+    """triples of a snapshot that are not from the ontology sources (created and checkpointed later)
+
+    :raises SnapshotError: if the file is no valid snapshot of the current format version
+    """
+    section = SnapshotFile(path).sections.get("delta", b"")
+    return list(parse_ntriples(str(section, "utf-8").splitlines(), path))
+
+
+def compile_snapshot(
+    sources: Sequence[str], path: Optional[str] = None, delta: Sequence[Triple] = (), wal_lsn: int = 0
+) -> Snapshot:
+    """parses the ontology sources and writes their snapshot (if a path is given)
+
+    With a path, the written snapshot is returned memory-mapped like on any later start.
+
+    :param sources: ontology source files
+    :param path: path of the snapshot to write
+    :param delta: triples to keep from a previous snapshot, see read_delta
+    :param wal_lsn: LSN of the last write-ahead log record contained in the delta
+    """
+    store = TripleStore()
+    load_sources(store, sources)
+    store.add_all(delta)
+    labware_index = LabwareIndex(store)
+    source_hash = sources_hash(sources)
+    if path is None:
+        return Snapshot(store, labware_index, DimensionTable.build(store), source_hash, wal_lsn)
+    meta = {"sources": [os.path.basename(s) for s in sources], "wal_lsn": wal_lsn}
+    write_snapshot(path, store, labware_index, source_hash, meta, delta)
+    return load_snapshot(path)
+
+
+def checkpoint_snapshot(path: str, snapshot: Snapshot, wal_lsn: int) -> None:
+    """rewrites the snapshot with the current content of its store
+
+    The store must not change meanwhile (writes are blocked by the caller).
+    Afterwards the write-ahead log records up to wal_lsn are no longer needed.
+
+    :param path: path of the snapshot the store was loaded from
+    :param snapshot: the loaded snapshot
+    :param wal_lsn: LSN of the last write-ahead log record applied to the store
+    """
+    store = snapshot.store
+    meta: Dict[str, Any] = {}
+    delta: Dict[Triple, None] = {}
+    if os.path.exists(path):
+        meta = {key: value for key, value in SnapshotFile(path).meta.items() if key == "sources"}
+        delta = dict.fromkeys(read_delta(path))
+    decode = store.dictionary.decode
+    delta.update(dict.fromkeys((decode(s), decode(p), decode(o)) for s, p, o in store.delta()))
+    meta["wal_lsn"] = wal_lsn
+    write_snapshot(path, store, snapshot.labware_index, snapshot.source_hash, meta, delta)
+
+
+def open_snapshot(sources: Sequence[str] = (), path: Optional[str] = None) -> Snapshot:
+    """store for the ontology sources - loaded from the snapshot if it is up to date, else from the sources
+
+    Without sources the snapshot is loaded as it is. A missing or stale snapshot is (re)written
+    after parsing the sources, so the next start is fast again.
+
+    :param sources: ontology source files
+    :param path: path of the snapshot
+    """
+    if path is not None and os.path.exists(path):
+        try:
+            if not sources:
+                return load_snapshot(path)
+            current_hash = sources_hash(sources)
+            if read_source_hash(path) == current_hash:
+                return load_snapshot(path)
+            logging.info(f"snapshot {path} is stale, recompiling from the ontology sources")
+            # keep the labware created since the sources were compiled
+            return compile_snapshot(sources, path, read_delta(path), SnapshotFile(path).meta.get("wal_lsn", 0))
+        except SnapshotError as error:
+            logging.warning(f"{error}, recompiling from the ontology sources")
+    return compile_snapshot(sources, path)
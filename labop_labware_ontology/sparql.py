@@ -0,0 +1,1197 @@
+"""_____________________________________________________________________
+
+:PROJECT: LabOP Labware Ontology
+
+* SPARQL query engine *
+
+:details: SPARQL subset evaluated on the TripleStore:
+          PREFIX/BASE, SELECT [DISTINCT] and ASK over a basic graph pattern, LIMIT and OFFSET.
+          The property paths rdfs:subClassOf* and rdfs:subClassOf+ (subclasses and superclasses) and
+          a/rdfs:subClassOf* and a/rdfs:subClassOf+ (instances of a class and its subclasses) are evaluated
+          on the closure index of the class hierarchy (see class_hierarchy), without traversing the graph.
+          The triple patterns of a basic graph pattern are joined in the order of least estimated cost
+          (cardinalities from the store statistics, see store_statistics), each by an index nested loop
+          (an index lookup per solution so far) or a hash join (the matches of the pattern are hashed once,
+          when many solutions would each need a lookup).
+          EXPLAIN SELECT/ASK ... evaluates the query and gives the join steps with their estimated and actual
+          numbers of solutions instead of the result.
+          Solutions are tuples of term IDs, terms are only decoded when the result is serialized.
+          A query is parsed and planned (QueryPlan: constants resolved to term IDs, the join steps),
+          the plans of repeated query texts can be cached (see query_cache).
+          A query can be planned with parameters - variables that are bound to terms given on execution
+          (prepared queries, the values are parsed as single terms and never become query text).
+          An optional QueryBudget limits the evaluation time and the number of intermediate solutions,
+          the join loops check it cooperatively and abort the query with QueryLimitExceeded.
+
+.. note:: -
+.. todo:: - FILTER, OPTIONAL, UNION
+________________________________________________________________________
+"""
+
+import itertools
+import json
+import re
+import time
+from typing import (
+    TYPE_CHECKING,
+    Callable,
+    Dict,
+    FrozenSet,
+    Iterator,
+    List,
+    NamedTuple,
+    Optional,
+    Sequence,
+    Tuple,
+    Union,
+)
+from urllib.parse import urljoin
+
+from .class_hierarchy import SUBCLASS_OF, ClassHierarchy, ClassLabels
+from .namespaces import DEFAULT_PREFIXES, RDF, XSD
+from .rdf_terms import iri, literal, term_to_json, unescape
+from .store_statistics import StoreStatistics
+from .triple_store import IDTriple, StoreVersion, TripleStore
+
+if TYPE_CHECKING:
+    from .query_cache import PlanCache
+
+
+class SPARQLError(Exception):
+    """Base class of all query errors"""
+
+
+class SPARQLSyntaxError(SPARQLError):
+    """The query text is not valid (or not supported) SPARQL"""
+
+
+class QueryLimitExceeded(SPARQLError):
+    """The evaluation of a query was aborted: it exceeded its time limit or its budget, or was cancelled"""
+
+
+class BindingError(SPARQLError):
+    """The values given for the parameters of a prepared query are missing, unknown or not single terms"""
+
+
+class Variable(str):
+    """query variable, the name is stored without the leading '?'"""
+
+    def __repr__(self) -> str:
+        return f"?{self}"
+
+
+PatternTerm = Union[str, Variable]
+
+RDF_TYPE = iri(RDF.type)
+
+
+class SubClassPath(NamedTuple):
+    """the property path rdfs:subClassOf* (min_length 0) or rdfs:subClassOf+ (min_length 1),
+    preceded by rdf:type if typed"""
+
+    typed: bool
+    min_length: int
+
+    def __str__(self) -> str:
+        path = SUBCLASS_OF + ("*" if self.min_length == 0 else "+")
+        return f"{RDF_TYPE}/{path}" if self.typed else path
+
+    @property
+    def predicates(self) -> Tuple[str, ...]:
+        """the predicates of the path"""
+        return (RDF_TYPE, SUBCLASS_OF) if self.typed else (SUBCLASS_OF,)
+
+
+class TriplePattern(NamedTuple):
+    subject: PatternTerm
+    predicate: Union[PatternTerm, SubClassPath]
+    object: PatternTerm
+
+
+class Query(NamedTuple):
+    form: str  # "SELECT" or "ASK"
+    variables: Optional[List[Variable]]  # projection, None for SELECT *
+    patterns: List[TriplePattern]
+    distinct: bool = False
+    limit: Optional[int] = None
+    offset: int = 0
+    explain: bool = False  # EXPLAIN: the join steps with their cardinalities instead of the result
+
+    @property
+    def pattern_variables(self) -> List[Variable]:
+        """variables of the graph pattern in order of appearance"""
+        seen: Dict[Variable, None] = {}
+        for pattern in self.patterns:
+            for term in pattern:
+                if isinstance(term, Variable):
+                    seen.setdefault(term)
+        return list(seen)
+
+
+# parser -----------------------------------------------------------------
+
+_TOKEN_RE = re.compile(
+    r"""
+    (?P<ws>\s+|\#[^\n]*)
+    |(?P<iri><[^<>"{}|^`\\\s]*>)
+    |(?P<var>[?$][A-Za-z_][A-Za-z0-9_]*)
+    |(?P<string>"(?:[^"\\\n\r]|\\.)*"|'(?:[^'\\\n\r]|\\.)*')
+    |(?P<langtag>@[A-Za-z]+(?:-[A-Za-z0-9]+)*)
+    |(?P<dtype>\^\^)
+    |(?P<double>[+-]?(?:\d+\.\d*|\.\d+|\d+)[eE][+-]?\d+)
+    |(?P<decimal>[+-]?\d*\.\d+)
+    |(?P<integer>[+-]?\d+)
+    |(?P<pname>(?:[A-Za-z][\w\-]*(?:\.[\w\-]+)*)?:(?:[\w\-]+(?:\.[\w\-]+)*)?)
+    |(?P<name>[A-Za-z_][A-Za-z0-9_]*)
+    |(?P<punct>[{}().;,*+/])
+    """,
+    re.VERBOSE,
+)
+
+
+class _Token(NamedTuple):
+    kind: str
+    value: str
+    position: int
+
+
+def _tokenize(text: str) -> List[_Token]:
+    tokens = []
+    position = 0
+    while position < len(text):
+        match = _TOKEN_RE.match(text, position)
+        if match is None:
+            raise SPARQLSyntaxError(f"unexpected character {text[position]!r} at position {position}")
+        if match.lastgroup != "ws":
+            tokens.append(_Token(match.lastgroup, match.group(), position))
+        position = match.end()
+    tokens.append(_Token("eof", "", position))
+    return tokens
+
+
+class _Parser:
+    def __init__(self, text: str, prefixes: Optional[Dict[str, str]] = None) -> None:
+        self.tokens = _tokenize(text)
+        self.pos = 0
+        self.prefixes = dict(DEFAULT_PREFIXES)
+        self.prefixes.update(prefixes or {})
+        self.base: Optional[str] = None
+
+    # token helpers
+
+    def peek(self) -> _Token:
+        return self.tokens[self.pos]
+
+    def next(self) -> _Token:
+        token = self.tokens[self.pos]
+        self.pos += 1
+        return token
+
+    def error(self, expected: str) -> SPARQLSyntaxError:
+        token = self.peek()
+        found = "end of query" if token.kind == "eof" else repr(token.value)
+        return SPARQLSyntaxError(f"expected {expected}, found {found} at position {token.position}")
+
+    def accept_keyword(self, keyword: str) -> bool:
+        token = self.peek()
+        if token.kind == "name" and token.value.upper() == keyword:
+            self.pos += 1
+            return True
+        return False
+
+    def accept_punct(self, punct: str) -> bool:
+        token = self.peek()
+        if token.kind == "punct" and token.value == punct:
+            self.pos += 1
+            return True
+        return False
+
+    def expect_punct(self, punct: str) -> None:
+        if not self.accept_punct(punct):
+            raise self.error(f"'{punct}'")
+
+    def expect_integer(self) -> int:
+        token = self.next()
+        if token.kind != "integer":
+            self.pos -= 1
+            raise self.error("an integer")
+        return int(token.value)
+
+    # grammar
+
+    def parse(self) -> Query:
+        self.parse_prologue()
+        explain = self.accept_keyword("EXPLAIN")
+        if self.accept_keyword("SELECT"):
+            query = self.parse_select()
+        elif self.accept_keyword("ASK"):
+            self.accept_keyword("WHERE")
+            query = Query("ASK", [], self.parse_group_graph_pattern())
+        else:
+            raise self.error("SELECT or ASK")
+        if self.peek().kind != "eof":
+            raise self.error("end of query")
+        return query._replace(explain=explain)
+
+    def parse_prologue(self) -> None:
+        while True:
+            if self.accept_keyword("PREFIX"):
+                token = self.next()
+                if token.kind != "pname" or not token.value.endswith(":"):
+                    self.pos -= 1
+                    raise self.error("a prefix name")
+                self.prefixes[token.value[:-1]] = self.parse_iriref()
+            elif self.accept_keyword("BASE"):
+                self.base = self.parse_iriref()
+            else:
+                return
+
+    def parse_iriref(self) -> str:
+        token = self.next()
+        if token.kind != "iri":
+            self.pos -= 1
+            raise self.error("an IRI")
+        value = unescape(token.value[1:-1])
+        return urljoin(self.base, value) if self.base else value
+
+    def parse_select(self) -> Query:
+        distinct = self.accept_keyword("DISTINCT")
+        if not distinct:
+            self.accept_keyword("REDUCED")
+        variables: Optional[List[Variable]] = []
+        if self.accept_punct("*"):
+            variables = None
+        else:
+            while self.peek().kind == "var":
+                variables.append(Variable(self.next().value[1:]))
+            if not variables:
+                raise self.error("variables or '*'")
+        self.accept_keyword("WHERE")
+        patterns = self.parse_group_graph_pattern()
+        limit, offset = None, 0
+        while True:
+            if self.accept_keyword("LIMIT"):
+                limit = self.expect_integer()
+            elif self.accept_keyword("OFFSET"):
+                offset = self.expect_integer()
+            else:
+                break
+        return Query("SELECT", variables, patterns, distinct, limit, offset)
+
+    def parse_group_graph_pattern(self) -> List[TriplePattern]:
+        self.expect_punct("{")
+        patterns: List[TriplePattern] = []
+        while not self.accept_punct("}"):
+            subject = self.parse_term()
+            self.parse_predicate_object_list(subject, patterns)
+            if not self.accept_punct("."):
+                self.expect_punct("}")
+                break
+        return patterns
+
+    def parse_predicate_object_list(self, subject: PatternTerm, patterns: List[TriplePattern]) -> None:
+        while True:
+            predicate = self.parse_predicate()
+            patterns.append(TriplePattern(subject, predicate, self.parse_term()))
+            while self.accept_punct(","):
+                patterns.append(TriplePattern(subject, predicate, self.parse_term()))
+            if not self.accept_punct(";"):
+                return
+            token = self.peek()
+            if token.kind == "punct" and token.value in ".}":
+                return
+
+    def parse_predicate(self) -> Union[PatternTerm, SubClassPath]:
+        """a predicate or one of the supported property paths"""
+        token = self.peek()
+        if token.kind == "name" and token.value == "a":
+            self.pos += 1
+            predicate: PatternTerm = RDF_TYPE
+        else:
+            predicate = self.parse_term()
+        typed = self.accept_punct("/")
+        if typed:
+            if predicate != RDF_TYPE:
+                raise SPARQLSyntaxError(f"unsupported property path at position {token.position}")
+            predicate = self.parse_term()
+        for quantifier, min_length in (("*", 0), ("+", 1)):
+            if self.accept_punct(quantifier):
+                if predicate != SUBCLASS_OF:
+                    raise SPARQLSyntaxError(f"unsupported property path at position {token.position}")
+                return SubClassPath(typed, min_length)
+        if typed:
+            raise SPARQLSyntaxError(f"unsupported property path at position {token.position}")
+        return predicate
+
+    def parse_term(self) -> PatternTerm:
+        token = self.next()
+        kind, value = token.kind, token.value
+        if kind == "var":
+            return Variable(value[1:])
+        if kind == "iri":
+            self.pos -= 1
+            return iri(self.parse_iriref())
+        if kind == "pname":
+            prefix, local = value.split(":", 1)
+            if prefix not in self.prefixes:
+                raise SPARQLSyntaxError(f"undefined prefix '{prefix}:' at position {token.position}")
+            return iri(self.prefixes[prefix] + local)
+        if kind == "string":
+            lexical = unescape(value[1:-1])
+            next_token = self.peek()
+            if next_token.kind == "langtag":
+                self.pos += 1
+                return literal(lexical, lang=next_token.value[1:])
+            if next_token.kind == "dtype":
+                self.pos += 1
+                datatype = self.parse_term()
+                if isinstance(datatype, Variable) or not datatype.startswith("<"):
+                    raise self.error("a datatype IRI")
+                return literal(lexical, datatype=datatype[1:-1])
+            return literal(lexical)
+        if kind == "integer":
+            return literal(value, datatype=XSD.integer)
+        if kind == "decimal":
+            return literal(value, datatype=XSD.decimal)
+        if kind == "double":
+            return literal(value, datatype=XSD.double)
+        if kind == "name" and value in ("true", "false"):
+            return literal(value, datatype=XSD.boolean)
+        self.pos -= 1
+        raise self.error("a variable, IRI or literal")
+
+
+def parse_query(text: str, prefixes: Optional[Dict[str, str]] = None) -> Query:
+    """parses a SPARQL query
+
+    :param text: SPARQL query text
+    :type text: str
+    :param prefixes: additional prefix declarations (prefix -> namespace IRI)
+    :raises SPARQLSyntaxError: if the query is invalid or uses unsupported SPARQL features
+    """
+    return _Parser(text, prefixes).parse()
+
+
+def parse_term(text: str, prefixes: Optional[Dict[str, str]] = None) -> str:
+    """parses a single IRI or literal (SPARQL or N-Triples notation) into its N-Triples notation
+
+    :param text: the term, e.g. "Corning", 96, lw:Microplate or <http://example.org/plate>
+    :param prefixes: additional prefix declarations (prefix -> namespace IRI)
+    :raises SPARQLSyntaxError: if the text is not exactly one IRI or literal
+    """
+    parser = _Parser(text, prefixes)
+    term = parser.parse_term()
+    if isinstance(term, Variable):
+        raise SPARQLSyntaxError(f"expected an IRI or literal, got the variable ?{term}")
+    if parser.peek().kind != "eof":
+        raise parser.error("the end of the term")
+    return term
+
+
+def normalize_query(text: str, prefixes: Optional[Dict[str, str]] = None) -> str:
+    """canonical text of a query, the same for queries differing only in whitespace, comments,
+    the case of keywords, $/? variables and PREFIX declarations (prefixed names are expanded)
+
+    Queries with the same canonical text have the same meaning, the text is not parsed.
+
+    :param text: SPARQL query text
+    :param prefixes: additional prefix declarations (prefix -> namespace IRI)
+    :raises SPARQLSyntaxError: if the query contains invalid characters
+    """
+    parser = _Parser(text, prefixes)
+    normalized = []
+    # the prologue: prefixes are expanded below, BASE is kept
+    while True:
+        if parser.accept_keyword("PREFIX"):
+            token = parser.next()
+            if token.kind != "pname" or not token.value.endswith(":"):
+                # invalid, the parser reports it
+                normalized.extend(["PREFIX", token.value])
+                break
+            parser.prefixes[token.value[:-1]] = parser.parse_iriref()
+        elif parser.accept_keyword("BASE"):
+            parser.base = parser.parse_iriref()
+            normalized.append(f"BASE <{parser.base}>")
+        else:
+            break
+    for kind, value, _ in parser.tokens[parser.pos : -1]:
+        if kind == "name" and value not in ("a", "true", "false"):
+            value = value.upper()
+        elif kind == "var":
+            value = "?" + value[1:]
+        elif kind == "pname":
+            prefix, local = value.split(":", 1)
+            if prefix in parser.prefixes:
+                value = f"<{parser.prefixes[prefix]}{local}>"
+        normalized.append(value)
+    return " ".join(normalized)
+
+
+# evaluation -------------------------------------------------------------
+
+Row = Tuple[Optional[int], ...]
+
+# matches of a triple pattern: (subject, predicate, object), None for a variable
+_Match = Callable[[Optional[int], Optional[int], Optional[int]], Iterator[IDTriple]]
+
+
+class _Step(NamedTuple):
+    """one triple pattern of the join, prepared for the bindings available at this point"""
+
+    constants: Tuple[Optional[int], Optional[int], Optional[int]]  # term ID per position, None if variable
+    bound_slots: Tuple[Tuple[int, int], ...]  # (position, slot) of variables bound by earlier steps
+    new_slots: Tuple[Tuple[int, int], ...]  # (position, slot) of variables bound by this step
+    checks: Tuple[Tuple[int, int], ...]  # positions that must be equal (variable repeated in the pattern)
+    pattern: TriplePattern
+    method: str = "index"  # "index": index nested loop join, "hash": hash join on the bound positions
+    estimate: float = 0.0  # estimated number of solutions after this step
+    path: Optional[SubClassPath] = None  # the property path of the pattern, matched on the class hierarchy
+
+
+# relative costs of the join methods per solution so far / matched triple: an index lookup,
+# adding a triple to a hash table and probing it (producing a solution costs 1)
+INDEX_LOOKUP_COST = 4.0
+HASH_BUILD_COST = 2.0
+HASH_PROBE_COST = 1.0
+
+# the join order of up to this many triple patterns is optimal (dynamic programming), of more greedy
+MAX_DP_PATTERNS = 10
+
+_ResolvedPattern = Tuple[Union[int, Variable, SubClassPath], ...]
+
+
+class _JoinPlanner:
+    def __init__(
+        self,
+        version: StoreVersion,
+        statistics: StoreStatistics,
+        patterns: Sequence[_ResolvedPattern],
+        parameters: Sequence[Variable] = (),
+        labels: Optional[ClassLabels] = None,
+    ) -> None:
+        """orders the triple patterns of a basic graph pattern by estimated cost and chooses the join methods
+
+        The cost of an order is the sum of its join steps: the solutions produced, plus an index lookup per
+        solution so far (index nested loop) or hashing the matches of the pattern and a probe per solution so far
+        (hash join). Cardinalities are estimated per group of patterns with the same subject - from the
+        characteristic sets for a star with constant predicates - and joins of groups on a shared variable
+        keep 1 / (distinct values of the variable) of the product. A subclass path pattern is a group of its own,
+        its matches are counted on the class hierarchy.
+
+        :param version: the store version to plan for
+        :param statistics: statistics of the store
+        :param patterns: triple patterns with term IDs for the constants
+        :param parameters: variables bound to one term each before the first step
+        :param labels: the class hierarchy, required if a pattern has a subclass path
+        """
+        self.version = version
+        self.statistics = statistics
+        self.patterns = patterns
+        self.parameters = frozenset(parameters)
+        self.labels = labels
+        self.variables = [frozenset(term for term in pattern if isinstance(term, Variable)) for pattern in patterns]
+        self._cardinalities: Dict[FrozenSet[int], float] = {frozenset(): 1.0}
+
+    def order(self) -> List[Tuple[int, str, float]]:
+        """(pattern index, join method, estimated solutions after the step) in evaluation order"""
+        count = len(self.patterns)
+        if count > MAX_DP_PATTERNS:
+            steps = self._greedy()
+        else:
+            # cheapest left-deep order of every subset, cross products only where no pattern is connected
+            best: Dict[FrozenSet[int], Tuple[bool, float, Tuple[Tuple[int, str], ...]]] = {
+                frozenset(): (False, 0.0, ())
+            }
+            for size in range(1, count + 1):
+                for combination in itertools.combinations(range(count), size):
+                    subset = frozenset(combination)
+                    options = []
+                    for index in combination:
+                        rest = subset - {index}
+                        cross, cost, steps = best[rest]
+                        step_cost, method = self._step_cost(rest, index)
+                        cross = cross or not self._connected(rest, index)
+                        options.append((cross, cost + step_cost, steps + ((index, method),)))
+                    best[subset] = min(options)
+            steps = list(best[frozenset(range(count))][2])
+        order, done = [], frozenset()
+        for index, method in steps:
+            done = done | {index}
+            order.append((index, method, self.cardinality(done)))
+        return order
+
+    def _greedy(self) -> List[Tuple[int, str]]:
+        steps: List[Tuple[int, str]] = []
+        done: FrozenSet[int] = frozenset()
+        while len(done) < len(self.patterns):
+            options = []
+            for index in range(len(self.patterns)):
+                if index not in done:
+                    cost, method = self._step_cost(done, index)
+                    options.append((not self._connected(done, index), cost, index, method))
+            _, _, index, method = min(options)
+            steps.append((index, method))
+            done = done | {index}
+        return steps
+
+    def _connected(self, done: FrozenSet[int], index: int) -> bool:
+        """True if the pattern shares a variable with the patterns done (or a parameter)"""
+        if not done:
+            return True
+        variables = self.variables[index]
+        return bool(variables & self.parameters) or any(variables & self.variables[other] for other in done)
+
+    def _step_cost(self, done: FrozenSet[int], index: int) -> Tuple[float, str]:
+        rows_in = self.cardinality(done)
+        rows_out = self.cardinality(done | {index})
+        index_cost = rows_in * INDEX_LOOKUP_COST + rows_out
+        if done and any(self.variables[index] & self.variables[other] for other in done):
+            # one lookup for the matches to hash
+            hash_cost = (
+                INDEX_LOOKUP_COST + self.scan_size(index) * HASH_BUILD_COST + rows_in * HASH_PROBE_COST + rows_out
+            )
+            if hash_cost < index_cost:
+                return hash_cost, "hash"
+        return index_cost, "index"
+
+    def scan_size(self, index: int) -> float:
+        """number of triples matching the constants of a pattern"""
+        constants = [None if isinstance(term, Variable) else term for term in self.patterns[index]]
+        subject, predicate, obj = constants
+        if isinstance(predicate, SubClassPath):
+            return self._path_size(subject, predicate, obj)  # type: ignore
+        if subject is None and obj is None:
+            if predicate is None:
+                return float(len(self.version))
+            return float(self.statistics.predicate(predicate).triples)
+        return float(self.version.count(subject, predicate, obj))
+
+    def cardinality(self, subset: FrozenSet[int]) -> float:
+        """estimated number of solutions of a set of patterns"""
+        cardinality = self._cardinalities.get(subset)
+        if cardinality is not None:
+            return cardinality
+        groups: Dict[Union[int, Variable], List[int]] = {}
+        paths: List[int] = []
+        for index in sorted(subset):
+            if isinstance(self.patterns[index][1], SubClassPath):
+                paths.append(index)
+            else:
+                groups.setdefault(self.patterns[index][0], []).append(index)  # type: ignore
+        cardinality = 1.0
+        distinct: Dict[Variable, List[float]] = {}
+        estimates = [self._group_cardinality(subject, members) for subject, members in groups.items()]
+        estimates.extend(self._path_cardinality(index) for index in paths)
+        for group_cardinality, group_distinct in estimates:
+            cardinality *= group_cardinality
+            for var, values in group_distinct.items():
+                distinct.setdefault(var, []).append(max(values, 1.0))
+        for var, values in distinct.items():
+            if var in self.parameters:
+                # bound to one value: each group keeps the solutions with this value
+                for value in values:
+                    cardinality /= value
+            else:
+                # joined on the variable: 1 / distinct values, of all but the group with the fewest
+                values.sort()
+                for value in values[1:]:
+                    cardinality /= value
+        self._cardinalities[subset] = cardinality
+        return cardinality
+
+    def _group_cardinality(
+        self, subject: Union[int, Variable], members: List[int]
+    ) -> Tuple[float, Dict[Variable, float]]:
+        """estimated solutions of patterns with the same subject, and distinct values of their variables"""
+        statistics = self.statistics
+        patterns = [self.patterns[index] for index in members]
+        predicates = [pattern[1] for pattern in patterns]
+        distinct: Dict[Variable, float] = {}
+        if isinstance(subject, Variable) and not any(isinstance(predicate, Variable) for predicate in predicates):
+            # star join: subjects with all the predicates, times the triples per subject of each pattern
+            subjects, per_subject = statistics.star(predicates)  # type: ignore
+            cardinality = subjects
+            for _, predicate, obj in patterns:
+                rows = per_subject[predicate]
+                if not isinstance(obj, Variable):
+                    triples = statistics.predicate(predicate).triples  # type: ignore
+                    rows *= self.version.count(None, predicate, obj) / triples if triples else 0.0  # type: ignore
+                cardinality *= rows
+            distinct[subject] = min(subjects, cardinality)
+        else:
+            cardinality = 1.0
+            for index in members:
+                cardinality *= self.scan_size(index)
+            if isinstance(subject, Variable):
+                subjects = float(max(statistics.collect().subjects, 1))
+                cardinality /= subjects ** (len(members) - 1)
+                distinct[subject] = min(subjects, cardinality)
+        for _, predicate, obj in patterns:
+            if isinstance(predicate, Variable):
+                distinct[predicate] = min(distinct.get(predicate, cardinality), len(statistics.predicates), cardinality)
+            if isinstance(obj, Variable) and obj != subject:
+                objects = (
+                    len(self.version) if isinstance(predicate, Variable) else statistics.predicate(predicate).objects
+                )
+                distinct[obj] = min(distinct.get(obj, cardinality), objects, cardinality)
+        return cardinality, distinct
+
+    def _path_cardinality(self, index: int) -> Tuple[float, Dict[Variable, float]]:
+        """estimated solutions of a subclass path pattern, and distinct values of its variables"""
+        subject, path, obj = self.patterns[index]
+        cardinality = self.scan_size(index)
+        classes = float(max(len(self.labels.classes), 1))  # type: ignore
+        distinct: Dict[Variable, float] = {}
+        if isinstance(obj, Variable):
+            distinct[obj] = min(classes, cardinality)
+        if isinstance(subject, Variable) and subject != obj:
+            subjects = float(self.statistics.collect().subjects) if path.typed else classes  # type: ignore
+            distinct[subject] = min(max(subjects, 1.0), cardinality)
+        return cardinality, distinct
+
+    def _path_size(self, subject: Optional[int], path: SubClassPath, obj: Optional[int]) -> float:
+        """number of (subject, object) pairs connected by a subclass path"""
+        labels: ClassLabels = self.labels  # type: ignore
+        if obj is not None:
+            descendants = labels.descendants(obj) if path.min_length == 0 else labels.proper_descendants(obj)
+            if not path.typed:
+                return 1.0 if subject is not None else float(sum(1 for _ in descendants))
+            type_id = self.version.term_id(RDF_TYPE)
+            if type_id is None:
+                return 0.0
+            if subject is not None:
+                return float(min(self.version.count(subject, type_id, None), 1))
+            return float(sum(self.version.count(None, type_id, cls) for cls in descendants))
+        # superclasses per class on average: every class is in the intervals of each of its superclasses
+        classes = max(len(labels.classes), 1)
+        labelled = sum(last - first + 1 for intervals in labels.intervals.values() for first, last in intervals)
+        ancestors = max(labelled / classes, 1.0) - path.min_length
+        if path.typed:
+            type_id = self.version.term_id(RDF_TYPE)
+            return 0.0 if type_id is None else self.version.count(subject, type_id, None) * ancestors
+        return ancestors if subject is not None else classes * ancestors
+
+
+# a plan is made again when the size of the store changed by more than this share since it was planned
+PLAN_STATS_TOLERANCE = 0.1
+
+
+class QueryPlan(NamedTuple):
+    """a query prepared for the evaluation: constants resolved to term IDs, the join steps in evaluation order"""
+
+    query: Query
+    variables: List[Variable]  # result columns
+    width: int  # slots of a solution
+    steps: Optional[List[_Step]]  # None if a constant is not in the store - there are no solutions
+    projection: Optional[List[Optional[int]]]  # slot of each result column, None if the slots are the columns
+    triples: int  # size of the store version the plan was made for
+    terms: int  # size of the term dictionary the plan was made with
+    parameters: Tuple[Variable, ...] = ()  # variables bound on execution, in the order of their values
+
+    def is_current(self, version: StoreVersion) -> bool:
+        """False if the plan should be made again for this version: a constant unknown when planning
+        may be in the store now, or the size of the store changed materially"""
+        if self.steps is None:
+            return len(version.dictionary) == self.terms
+        return abs(len(version) - self.triples) <= PLAN_STATS_TOLERANCE * self.triples
+
+
+class QueryBudget:
+    # units of work between two checks of the budget
+    CHECK_INTERVAL = 1024
+
+    def __init__(self, timeout: Optional[float] = None, max_rows: Optional[int] = None) -> None:
+        """Limits of one query evaluation, checked by the join loops every CHECK_INTERVAL intermediate results
+        (triples matched by a join step - each is a candidate solution of the step)
+
+        :param timeout: seconds the evaluation may take from now on, None for no limit
+        :param max_rows: maximal number of intermediate results, None for no limit
+        """
+        self.timeout = timeout
+        self.deadline = None if timeout is None else time.monotonic() + timeout
+        self.max_rows = max_rows
+        self.rows = 0
+        self.cancelled = False
+
+    def cancel(self) -> None:
+        """aborts the evaluation at its next check (may be called from another thread)"""
+        self.cancelled = True
+
+    def charge(self, rows: int) -> None:
+        """accounts intermediate results
+
+        :raises QueryLimitExceeded: if a limit is exceeded or the evaluation was cancelled
+        """
+        self.rows += rows
+        if self.cancelled:
+            raise QueryLimitExceeded("the query was cancelled")
+        if self.max_rows is not None and self.rows > self.max_rows:
+            raise QueryLimitExceeded(f"the query exceeded its budget of {self.max_rows} intermediate results")
+        if self.deadline is not None and time.monotonic() > self.deadline:
+            raise QueryLimitExceeded(f"the query exceeded its time limit of {self.timeout} s")
+
+
+class QueryResult:
+    def __init__(
+        self,
+        store: TripleStore,
+        query: Query,
+        variables: List[Variable],
+        rows: Iterator[Row],
+        budget: Optional[QueryBudget] = None,
+        steps: Sequence[_Step] = (),
+        profile: Optional[List[int]] = None,
+    ) -> None:
+        """Lazy query result - rows of term IDs, one column per variable
+
+        The budget of the evaluation is also checked while the rows are serialized.
+
+        :param steps: the join steps of the evaluation (for EXPLAIN)
+        :param profile: solutions produced by each join step, counted while the rows are consumed (for EXPLAIN)
+        """
+        self.store = store
+        self.query = query
+        self.variables = variables
+        self.rows = rows
+        self.budget = budget
+        self.steps = steps
+        self.profile = profile
+        self.row_count = 0  # solutions serialized so far
+
+    def __iter__(self) -> Iterator[Row]:
+        return self.rows
+
+    def decoded(self) -> Iterator[Dict[str, str]]:
+        """solutions as dicts variable name -> term (N-Triples notation), unbound variables are omitted"""
+        decode = self.store.dictionary.decode
+        for row in self.rows:
+            yield {var: decode(value) for var, value in zip(self.variables, row) if value is not None}
+
+    def explain(self) -> Dict:
+        """the join steps with their estimated and actual numbers of solutions, consumes the rows
+
+        With LIMIT, the actual numbers are the solutions produced until the limit was reached.
+        """
+        rows = sum(1 for _ in self.rows)
+        profile = self.profile or [0] * len(self.steps)
+        steps = [
+            {
+                "pattern": " ".join(repr(term) if isinstance(term, Variable) else str(term) for term in step.pattern),
+                "join": step.method,
+                "estimated": round(step.estimate, 1),
+                "actual": actual,
+            }
+            for step, actual in zip(self.steps, profile)
+        ]
+        return {"steps": steps, "rows": rows}
+
+    def to_json(self) -> str:
+        """result in the SPARQL 1.1 query results JSON format, the plan of an EXPLAIN query as {"head", "plan"}"""
+        if self.query.explain:
+            return json.dumps({"head": {"vars": list(self.variables)}, "plan": self.explain()})
+        if self.query.form == "ASK":
+            return json.dumps({"head": {}, "boolean": any(True for _ in self.rows)})
+        bindings = list(self._bindings())
+        return json.dumps({"head": {"vars": list(self.variables)}, "results": {"bindings": bindings}})
+
+    def json_chunks(self, chunk_size: int = 1000) -> Iterator[str]:
+        """result as a sequence of SPARQL 1.1 query results JSON documents of at most chunk_size solutions each
+
+        The rows are evaluated while the chunks are consumed, so only one chunk is held in memory.
+        An ASK query or an empty result gives a single document.
+
+        :param chunk_size: maximal number of solutions per document
+        """
+        if self.query.form == "ASK" or self.query.explain:
+            yield self.to_json()
+            return
+        head = {"vars": list(self.variables)}
+        bindings = self._bindings()
+        chunk = list(itertools.islice(bindings, chunk_size))
+        while True:
+            yield json.dumps({"head": head, "results": {"bindings": chunk}})
+            chunk = list(itertools.islice(bindings, chunk_size))
+            if not chunk:
+                return
+
+    def _bindings(self) -> Iterator[Dict[str, Dict[str, str]]]:
+        decode = self.store.dictionary.decode
+        variables = self.variables
+        budget = self.budget
+        for row in self.rows:
+            self.row_count += 1
+            if budget is not None and self.row_count % QueryBudget.CHECK_INTERVAL == 0:
+                budget.charge(0)
+            yield {var: term_to_json(decode(value)) for var, value in zip(variables, row) if value is not None}
+
+
+class QueryEngine:
+    def __init__(
+        self,
+        store: TripleStore,
+        prefixes: Optional[Dict[str, str]] = None,
+        plan_cache: Optional["PlanCache"] = None,
+        statistics: Optional[StoreStatistics] = None,
+        class_hierarchy: Optional[ClassHierarchy] = None,
+    ) -> None:
+        """SPARQL query engine on top of a TripleStore
+
+        :param store: the triple store to query
+        :param prefixes: prefix declarations available in every query
+        :param plan_cache: cache of the plans of repeated query texts (see query_cache), used by this engine only
+        :param statistics: statistics of the store for the join order, collected on the first plan by default
+        :param class_hierarchy: closure index of the class hierarchy for subclass paths, built from the store by default
+        """
+        self.store = store
+        self.prefixes = prefixes or {}
+        self.plan_cache = plan_cache
+        self.statistics = statistics if statistics is not None else StoreStatistics(store)
+        self.class_hierarchy = class_hierarchy if class_hierarchy is not None else ClassHierarchy(store)
+
+    def query(self, text: str, budget: Optional[QueryBudget] = None) -> QueryResult:
+        """parses and evaluates a SPARQL query
+
+        The query runs on the store version current at this call, later updates are not visible to it.
+
+        :param text: SPARQL query text
+        :type text: str
+        :param budget: limits of the evaluation, consuming the result raises QueryLimitExceeded if exceeded
+        """
+        version = self.store.version
+        return self.execute(self.prepare(text, version), budget, version)
+
+    def evaluate(self, query: Query, budget: Optional[QueryBudget] = None) -> QueryResult:
+        """evaluates a parsed query, rows are produced lazily while the result is consumed
+
+        The query runs on the store version current at this call, later updates are not visible to it.
+
+        :param query: the parsed query
+        :param budget: limits of the evaluation, consuming the result raises QueryLimitExceeded if exceeded
+        """
+        version = self.store.version
+        return self.execute(self.plan(query, version), budget, version)
+
+    def prepare(self, text: str, version: Optional[StoreVersion] = None, parameters: Sequence[str] = ()) -> QueryPlan:
+        """parses and plans a query, the plan of a repeated query text is taken from the plan cache
+
+        :param text: SPARQL query text
+        :param version: store version the plan is made for, default: the current one
+        :param parameters: names of the variables bound on execution (see plan)
+        :raises SPARQLSyntaxError: if the query is invalid or uses unsupported SPARQL features
+        """
+        version = version if version is not None else self.store.version
+        cache = self.plan_cache
+        if cache is None:
+            return self.plan(parse_query(text, self.prefixes), version, parameters)
+        key = self.normalize(text)
+        if parameters:
+            # not a valid query text, cannot collide with the key of another query
+            key += " PARAMETERS " + " ".join(f"?{name}" for name in parameters)
+        plan = cache.get(key, version)
+        if plan is None:
+            plan = self.plan(parse_query(text, self.prefixes), version, parameters)
+            cache.put(key, plan)
+        return plan
+
+    def normalize(self, text: str) -> str:
+        """the normalized text of a query (see normalize_query), the key of its cached plan and result
+
+        :raises SPARQLSyntaxError: if the query contains invalid characters
+        """
+        if self.plan_cache is not None:
+            return self.plan_cache.key(text, self.prefixes)
+        return normalize_query(text, self.prefixes)
+
+    def plan(self, query: Query, version: Optional[StoreVersion] = None, parameters: Sequence[str] = ()) -> QueryPlan:
+        """prepares a parsed query for the evaluation
+
+        :param query: the parsed query
+        :param version: store version the plan is made for, default: the current one
+        :param parameters: names of variables of the graph pattern that are bound on execution,
+            the join steps are prepared with these variables bound
+        :raises SPARQLSyntaxError: if a parameter is not a variable of the graph pattern
+        """
+        version = version if version is not None else self.store.version
+        # the dictionary only grows: taken first, all terms of the version are in it
+        terms = len(version.dictionary)
+        slots = {var: index for index, var in enumerate(query.pattern_variables)}
+        bound = tuple(Variable(name) for name in parameters)
+        for var in bound:
+            if var not in slots:
+                raise SPARQLSyntaxError(f"the parameter ?{var} is not a variable of the graph pattern")
+        if len(set(bound)) != len(bound):
+            raise SPARQLSyntaxError("a parameter is given more than once")
+        variables = list(slots) if query.variables is None else query.variables
+        steps = self._prepare_steps(query.patterns, slots, bound, version)
+        projection: Optional[List[Optional[int]]] = [slots.get(var) for var in variables]
+        if projection == list(range(len(slots))):
+            projection = None
+        return QueryPlan(query, variables, len(slots), steps, projection, len(version), terms, bound)
+
+    def bind(self, plan: QueryPlan, bindings: Dict[str, str]) -> Tuple[str, ...]:
+        """the values of the parameters of a plan, in N-Triples notation and the order of plan.parameters
+
+        :param plan: plan of a query with parameters
+        :param bindings: parameter name -> IRI or literal in SPARQL or N-Triples notation
+        :raises BindingError: if a parameter is missing or unknown, or a value is not a single IRI or literal
+        """
+        missing = [f"?{var}" for var in plan.parameters if var not in bindings]
+        if missing:
+            raise BindingError(f"no values given for {', '.join(missing)}")
+        unknown = [f"?{name}" for name in bindings if name not in plan.parameters]
+        if unknown:
+            raise BindingError(f"the query has no parameters {', '.join(unknown)}")
+        values = []
+        for var in plan.parameters:
+            try:
+                values.append(parse_term(bindings[var], self.prefixes))
+            except SPARQLSyntaxError as error:
+                raise BindingError(f"invalid value of ?{var}: {error}") from None
+        return tuple(values)
+
+    def execute(
+        self,
+        plan: QueryPlan,
+        budget: Optional[QueryBudget] = None,
+        version: Optional[StoreVersion] = None,
+        values: Sequence[str] = (),
+    ) -> QueryResult:
+        """evaluates a planned query, rows are produced lazily while the result is consumed
+
+        :param plan: the plan of the query (see prepare)
+        :param budget: limits of the evaluation, consuming the result raises QueryLimitExceeded if exceeded
+        :param version: store version to query, default: the current one
+        :param values: terms (N-Triples notation) of the parameters of the plan, see bind
+        :raises BindingError: if the number of values does not match the parameters
+        """
+        version = version if version is not None else self.store.version
+        query, projection = plan.query, plan.projection
+        if len(values) != len(plan.parameters):
+            raise BindingError(f"expected {len(plan.parameters)} parameter values, got {len(values)}")
+        initial: Optional[List[Optional[int]]] = [None] * plan.width
+        if values:
+            slots = {var: index for index, var in enumerate(query.pattern_variables)}
+            lookup = self.store.dictionary.lookup
+            for var, value in zip(plan.parameters, values):
+                term_id = lookup(value)
+                if term_id is None:
+                    # an unknown term matches no triple
+                    initial = None
+                    break
+                initial[slots[var]] = term_id
+        profile = [0] * len(plan.steps or ()) if query.explain else None
+        rows: Iterator[Row] = (
+            iter(())
+            if plan.steps is None or initial is None
+            else self._join(version, plan.steps, tuple(initial), budget, profile)
+        )
+        if projection is not None:
+            rows = (tuple(None if slot is None else row[slot] for slot in projection) for row in rows)
+        if query.distinct:
+            rows = self._distinct(rows)
+        if query.offset or query.limit is not None:
+            stop = None if query.limit is None else query.offset + query.limit
+            rows = itertools.islice(rows, query.offset, stop)
+        return QueryResult(self.store, query, plan.variables, rows, budget, plan.steps or (), profile)
+
+    def _prepare_steps(
+        self,
+        patterns: Sequence[TriplePattern],
+        slots: Dict[Variable, int],
+        parameters: Sequence[Variable],
+        version: StoreVersion,
+    ) -> Optional[List[_Step]]:
+        """resolves constants to term IDs and orders the join steps, None if a constant is unknown
+        (the pattern cannot match)"""
+        lookup = self.store.dictionary.lookup
+        resolved: List[_ResolvedPattern] = []
+        for pattern in patterns:
+            ids: List[Union[int, Variable, SubClassPath]] = []
+            for term in pattern:
+                term_id = term if isinstance(term, (Variable, SubClassPath)) else lookup(term)
+                if term_id is None:
+                    return None
+                ids.append(term_id)
+            resolved.append(tuple(ids))
+
+        labels = None
+        if any(isinstance(pattern.predicate, SubClassPath) for pattern in patterns):
+            labels = self.class_hierarchy.labels(version)
+        steps = []
+        bound: set = set(parameters)
+        for index, method, estimate in _JoinPlanner(version, self.statistics, resolved, parameters, labels).order():
+            pattern = resolved[index]
+            constants: List[Optional[int]] = []
+            bound_slots, new_slots, checks = [], [], []
+            first_position: Dict[Variable, int] = {}
+            path = pattern[1] if isinstance(pattern[1], SubClassPath) else None
+            for position, term in enumerate(pattern):
+                if isinstance(term, SubClassPath):
+                    constants.append(None)
+                    continue
+                if not isinstance(term, Variable):
+                    constants.append(term)
+                    continue
+                constants.append(None)
+                if term in bound:
+                    bound_slots.append((position, slots[term]))
+                elif term in first_position:
+                    checks.append((first_position[term], position))
+                else:
+                    first_position[term] = position
+                    new_slots.append((position, slots[term]))
+            bound.update(first_position)
+            if not bound_slots:
+                # nothing to join on
+                method = "index"
+            steps.append(
+                _Step(
+                    tuple(constants),  # type: ignore
+                    tuple(bound_slots),
+                    tuple(new_slots),
+                    tuple(checks),
+                    patterns[index],
+                    method,
+                    estimate,
+                    path,
+                )
+            )
+        return steps
+
+    def _join(
+        self,
+        version: StoreVersion,
+        steps: List[_Step],
+        initial: Row,
+        budget: Optional[QueryBudget],
+        profile: Optional[List[int]] = None,
+    ) -> Iterator[Row]:
+        rows: Iterator[Row] = iter([initial])
+        labels = None
+        for index, step in enumerate(steps):
+            match = version.match
+            if step.path is not None:
+                if labels is None:
+                    labels = self.class_hierarchy.labels(version)
+                match = self._path_match(version, labels, step.path)
+            join = self._hash_join if step.method == "hash" else self._extend
+            rows = join(match, rows, step, budget)
+            if profile is not None:
+                rows = self._counted(rows, profile, index)
+        return rows
+
+    @staticmethod
+    def _counted(rows: Iterator[Row], profile: List[int], index: int) -> Iterator[Row]:
+        for row in rows:
+            profile[index] += 1
+            yield row
+
+    @staticmethod
+    def _path_match(version: StoreVersion, labels: ClassLabels, path: SubClassPath) -> _Match:
+        """match function of a subclass path: (subject, 0, object) for each pair connected by the path
+
+        A typed path gives a pair once per rdf:type triple of the subject it is connected by.
+        With both ends unbound, the zero-length path only connects the classes of the hierarchy.
+        """
+        zero_length = path.min_length == 0
+        ancestors = labels.ancestors if zero_length else labels.proper_ancestors
+        descendants = labels.descendants if zero_length else labels.proper_descendants
+        is_subclass = labels.is_subclass if zero_length else labels.is_proper_subclass
+
+        def closure(s: Optional[int], _: Optional[int], o: Optional[int]) -> Iterator[IDTriple]:
+            if s is not None and o is not None:
+                if is_subclass(s, o):
+                    yield s, 0, o
+            elif s is not None:
+                for superclass in ancestors(s):
+                    yield s, 0, superclass
+            elif o is not None:
+                for subclass in descendants(o):
+                    yield subclass, 0, o
+            else:
+                for cls in labels.classes:
+                    for superclass in ancestors(cls):
+                        yield cls, 0, superclass
+
+        if not path.typed:
+            return closure
+        type_id = version.term_id(RDF_TYPE)
+        match = version.match
+
+        def typed(s: Optional[int], _: Optional[int], o: Optional[int]) -> Iterator[IDTriple]:
+            if type_id is None:
+                return
+            if s is None and o is not None:
+                # the instances: the rdf:type index for each class in the intervals of o
+                for subclass in descendants(o):
+                    for individual, _, _ in match(None, type_id, subclass):
+                        yield individual, 0, o
+                return
+            for individual, _, cls in match(s, type_id, None):
+                for _, _, superclass in closure(cls, None, o):
+                    yield individual, 0, superclass
+
+        return typed
+
+    @staticmethod
+    def _extend(match: _Match, rows: Iterator[Row], step: _Step, budget: Optional[QueryBudget]) -> Iterator[Row]:
+        """index nested loop join of the solutions so far with one triple pattern"""
+        constants, bound_slots, new_slots, checks = step[:4]
+        interval = QueryBudget.CHECK_INTERVAL
+        work = 0
+        for row in rows:
+            pattern = list(constants)
+            for position, slot in bound_slots:
+                pattern[position] = row[slot]
+            for triple in match(*pattern):
+                if budget is not None:
+                    work += 1
+                    if work >= interval:
+                        budget.charge(work)
+                        work = 0
+                if checks and any(triple[a] != triple[b] for a, b in checks):
+                    continue
+                extended = list(row)
+                for position, slot in new_slots:
+                    extended[slot] = triple[position]
+                yield tuple(extended)
+
+    @staticmethod
+    def _hash_join(match: _Match, rows: Iterator[Row], step: _Step, budget: Optional[QueryBudget]) -> Iterator[Row]:
+        """hash join of the solutions so far with one triple pattern: its matches are hashed by the values
+        at the positions of the bound variables (once, at the first solution), every solution is a probe"""
+        constants, bound_slots, new_slots, checks = step[:4]
+        positions = [position for position, _ in bound_slots]
+        interval = QueryBudget.CHECK_INTERVAL
+        work = 0
+        table: Optional[Dict[Tuple[int, ...], List[Tuple[int, int, int]]]] = None
+        for row in rows:
+            if table is None:
+                table = {}
+                for triple in match(*constants):
+                    if budget is not None:
+                        work += 1
+                        if work >= interval:
+                            budget.charge(work)
+                            work = 0
+                    if checks and any(triple[a] != triple[b] for a, b in checks):
+                        continue
+                    table.setdefault(tuple(triple[position] for position in positions), []).append(triple)
+            for triple in table.get(tuple(row[slot] for _, slot in bound_slots), ()):
+                if budget is not None:
+                    work += 1
+                    if work >= interval:
+                        budget.charge(work)
+                        work = 0
+                extended = list(row)
+                for position, slot in new_slots:
+                    extended[slot] = triple[position]
+                yield tuple(extended)
+
+    @staticmethod
+    def _distinct(rows: Iterator[Row]) -> Iterator[Row]:
+        seen = set()
+        for row in rows:
+            if row not in seen:
+                seen.add(row)
+                yield row
@@ -0,0 +1,225 @@
+"""_____________________________________________________________________
+
+:PROJECT: LabOP Labware Ontology
+
+* Store statistics for the query planner *
+
+:details: Statistics of the triples of a store, used to estimate the cardinalities of triple patterns
+          and their joins (see sparql.QueryEngine.plan):
+
+          per predicate     number of triples, distinct subjects and distinct objects
+          characteristic    per set of predicates that some subjects have exactly: the number of these
+          sets              subjects and the number of triples of each predicate they have
+
+          Characteristic sets capture the correlation of the predicates of a subject - e.g. only labware
+          has a vendor and a product number - so the size of a star join (one subject variable, several
+          predicates) is estimated well, where per-predicate statistics alone assume independence.
+
+          The statistics are collected on first use (from the compiled arrays of a snapshot, one pass over
+          the subjects) and then maintained incrementally as a listener of the store.
+
+.. note:: -
+.. todo:: -
+________________________________________________________________________
+"""
+
+from collections import Counter
+from threading import Lock
+from typing import Dict, FrozenSet, Iterable, List, NamedTuple, Optional, Sequence, Tuple
+
+from .triple_store import IDTriple, StoreVersion, TripleStore
+
+
+class PredicateStatistics(NamedTuple):
+    triples: int
+    subjects: int  # distinct subjects
+    objects: int  # distinct objects
+
+
+class CharacteristicSet(NamedTuple):
+    subjects: int  # subjects with exactly these predicates
+    occurrences: Dict[int, int]  # predicate -> number of triples of these subjects with the predicate
+
+
+_NO_PREDICATE = PredicateStatistics(0, 0, 0)
+
+
+class StoreStatistics:
+    def __init__(self, store: TripleStore) -> None:
+        """statistics of the triples of a store, see the module documentation
+
+        The statistics are replaced (not modified) on every update, a reader may keep the dicts
+        predicates and characteristic_sets while the store is written.
+
+        :param store: the store to describe
+        """
+        self.store = store
+        self.predicates: Dict[int, PredicateStatistics] = {}
+        self.characteristic_sets: Dict[FrozenSet[int], CharacteristicSet] = {}
+        self.subjects = 0  # distinct subjects
+        self._lock = Lock()
+        # number of the store version described, -1: not collected yet
+        self._version = -1
+        store.add_listener(self._triples_added)
+
+    def collect(self) -> "StoreStatistics":
+        """collects the statistics of the current store version, if not done yet"""
+        if self._version < 0:
+            with self._lock:
+                if self._version < 0:
+                    self._collect(self.store.version)
+        return self
+
+    def predicate(self, predicate: int) -> PredicateStatistics:
+        return self.collect().predicates.get(predicate, _NO_PREDICATE)
+
+    def star(self, predicates: Iterable[int]) -> Tuple[float, Dict[int, float]]:
+        """estimated number of subjects having all the predicates,
+        and per predicate the average number of its triples per such subject
+
+        :param predicates: term IDs of the predicates
+        """
+        wanted = frozenset(predicates)
+        subjects = 0
+        occurrences: Counter = Counter()
+        for predicate_set, characteristic_set in self.collect().characteristic_sets.items():
+            if wanted <= predicate_set:
+                subjects += characteristic_set.subjects
+                for predicate in wanted:
+                    occurrences[predicate] += characteristic_set.occurrences[predicate]
+        if not subjects:
+            return 0.0, {predicate: 0.0 for predicate in wanted}
+        return float(subjects), {predicate: occurrences[predicate] / subjects for predicate in wanted}
+
+    def _collect(self, version: StoreVersion) -> None:
+        # subjects with triples in the in-memory segments are counted from all their triples,
+        # all others from the compiled arrays: their distinct predicates are a slice of the SPO index
+        segment_subjects = set()
+        for segment in version.segments:
+            segment_subjects.update(segment.spo)
+        sets: Dict[Tuple[int, ...], List] = {}  # predicates -> [subjects, occurrences per predicate]
+        compiled = version.compiled
+        if compiled is not None:
+            first, second, offsets = compiled.spo.first, compiled.spo.second, compiled.spo.second_offsets
+            # subjects with one triple per predicate only add to the count, the occurrences are added below
+            single: Counter = Counter()
+            for subject in range(len(first) - 1):
+                lo, hi = first[subject], first[subject + 1]
+                if lo == hi or subject in segment_subjects:
+                    continue
+                predicates = tuple(second[lo:hi])
+                if offsets[hi] - offsets[lo] == hi - lo:
+                    single[predicates] += 1
+                    continue
+                entry = sets.get(predicates)
+                if entry is None:
+                    entry = sets[predicates] = [0, [0] * len(predicates)]
+                entry[0] += 1
+                counts = entry[1]
+                for index, j in enumerate(range(lo, hi)):
+                    counts[index] += offsets[j + 1] - offsets[j]
+            for predicates, subjects in single.items():
+                entry = sets.get(predicates)
+                if entry is None:
+                    entry = sets[predicates] = [0, [0] * len(predicates)]
+                entry[0] += subjects
+                entry[1] = [count + subjects for count in entry[1]]
+        for subject in segment_subjects:
+            counts = Counter(p for _, p, _ in version.match(subject, None, None))
+            predicates = tuple(sorted(counts))
+            entry = sets.get(predicates)
+            if entry is None:
+                entry = sets[predicates] = [0, [0] * len(predicates)]
+            entry[0] += 1
+            entry[1] = [total + counts[p] for total, p in zip(entry[1], predicates)]
+
+        characteristic_sets = {
+            frozenset(predicates): CharacteristicSet(subjects, dict(zip(predicates, occurrences)))
+            for predicates, (subjects, occurrences) in sets.items()
+        }
+        triples: Counter = Counter()
+        subjects_of: Counter = Counter()
+        for characteristic_set in characteristic_sets.values():
+            for predicate, occurrences in characteristic_set.occurrences.items():
+                triples[predicate] += occurrences
+                subjects_of[predicate] += characteristic_set.subjects
+        self.predicates = {
+            predicate: PredicateStatistics(
+                triples[predicate], subjects_of[predicate], self._objects(version, predicate)
+            )
+            for predicate in triples
+        }
+        self.characteristic_sets = characteristic_sets
+        self.subjects = sum(characteristic_set.subjects for characteristic_set in characteristic_sets.values())
+        self._version = version.number
+
+    @staticmethod
+    def _objects(version: StoreVersion, predicate: int) -> int:
+        """number of distinct objects of a predicate"""
+        objects = 0
+        compiled = version.compiled
+        if compiled is not None:
+            lo, hi = compiled.pos._second_range(predicate)  # pylint: disable=protected-access
+            objects = hi - lo
+        added = set()
+        for segment in version.segments:
+            added.update(segment.pos.get(predicate, ()))
+        if compiled is not None:
+            added = {obj for obj in added if not compiled.pos.count(predicate, obj)}
+        return objects + len(added)
+
+    def _triples_added(self, triples: Sequence[IDTriple]) -> None:
+        with self._lock:
+            # called after the new version is published, writes are blocked meanwhile
+            version = self.store.version
+            if self._version < 0 or self._version >= version.number:
+                # not collected yet, or collected from this version
+                return
+            new_pairs = Counter((s, p) for s, p, _ in triples)
+            predicates = dict(self.predicates)
+            added_triples = Counter(p for _, p, _ in triples)
+            added_subjects = Counter(p for (s, p), count in new_pairs.items() if version.count(s, p, None) == count)
+            added_objects = Counter(
+                p
+                for (p, o), count in Counter((p, o) for _, p, o in triples).items()
+                if version.count(None, p, o) == count
+            )
+            for predicate, count in added_triples.items():
+                old = predicates.get(predicate, _NO_PREDICATE)
+                predicates[predicate] = PredicateStatistics(
+                    old.triples + count,
+                    old.subjects + added_subjects[predicate],
+                    old.objects + added_objects[predicate],
+                )
+
+            characteristic_sets = dict(self.characteristic_sets)
+            new_by_subject: Dict[int, Counter] = {}
+            for (s, p), count in new_pairs.items():
+                new_by_subject.setdefault(s, Counter())[p] = count
+            for subject, new_counts in new_by_subject.items():
+                counts = Counter(p for _, p, _ in version.match(subject, None, None))
+                old_counts = {p: count - new_counts[p] for p, count in counts.items() if count > new_counts[p]}
+                if old_counts:
+                    self._update_set(characteristic_sets, old_counts, -1)
+                else:
+                    self.subjects += 1
+                self._update_set(characteristic_sets, counts, 1)
+            self.predicates = predicates
+            self.characteristic_sets = characteristic_sets
+            self._version = version.number
+
+    @staticmethod
+    def _update_set(
+        characteristic_sets: Dict[FrozenSet[int], CharacteristicSet], counts: Dict[int, int], sign: int
+    ) -> None:
+        """adds (sign 1) or removes (sign -1) a subject with the predicate counts to its characteristic set"""
+        key = frozenset(counts)
+        old: Optional[CharacteristicSet] = characteristic_sets.get(key)
+        subjects = (old.subjects if old is not None else 0) + sign
+        if subjects <= 0:
+            characteristic_sets.pop(key, None)
+            return
+        occurrences = dict(old.occurrences) if old is not None else dict.fromkeys(counts, 0)
+        for predicate, count in counts.items():
+            occurrences[predicate] += sign * count
+        characteristic_sets[key] = CharacteristicSet(subjects, occurrences)
@@ -0,0 +1,153 @@
+"""_____________________________________________________________________
+
+:PROJECT: LabOP Labware Ontology
+
+* Synthetic labware catalogs *
+
+:details: Deterministic catalogs of plates, tubes, reservoirs and tip racks of any size,
+          e.g. for benchmarks and load tests. The same size and seed always give the same catalog.
+
+          The labware kinds follow a typical lab inventory (mostly plates and tubes),
+          the vendors a Zipf distribution (few large vendors supply most of the labware).
+          Every entry has a unique name and (vendor, product number), its class is a subclass of lw:Labware.
+
+.. note:: -
+.. todo:: -
+________________________________________________________________________
+"""
+
+import itertools
+import random
+from typing import Dict, Iterator, NamedTuple, TextIO
+
+from .labware_batch import LabwareDefinition, labware_triples
+from .namespaces import LABWARE, RDF, RDFS
+from .rdf_sources import write_ntriples
+from .rdf_terms import iri
+from .triple_store import Triple
+
+# class -> superclass (local names in the labware namespace)
+CLASS_HIERARCHY = {
+    "Microplate": "Labware",
+    "DeepWellPlate": "Microplate",
+    "Tube": "Labware",
+    "MicrocentrifugeTube": "Tube",
+    "ConicalTube": "Tube",
+    "Reservoir": "Labware",
+    "TipRack": "Labware",
+}
+
+
+class LabwareTemplate(NamedTuple):
+    labware_class: str  # local name in the labware namespace
+    description: str
+    weight: float  # share of the catalog
+    dimensions: Dict[str, float]
+
+
+# lengths in mm, plates, reservoirs and tip racks in the SBS footprint (127.76 x 85.48)
+TEMPLATES = (
+    LabwareTemplate(
+        "Microplate",
+        "96 well plate",
+        25,
+        dict(length=127.76, width=85.48, height=14.22, well_count=96, well_pitch=9.0, plate_height=14.22),
+    ),
+    LabwareTemplate(
+        "Microplate",
+        "384 well plate",
+        12,
+        dict(length=127.76, width=85.48, height=14.35, well_count=384, well_pitch=4.5, plate_height=14.35),
+    ),
+    LabwareTemplate(
+        "Microplate",
+        "1536 well plate",
+        3,
+        dict(length=127.76, width=85.48, height=10.4, well_count=1536, well_pitch=2.25, plate_height=10.4),
+    ),
+    LabwareTemplate(
+        "DeepWellPlate",
+        "96 deep well plate",
+        10,
+        dict(length=127.76, width=85.48, height=44.0, well_count=96, well_pitch=9.0, plate_height=44.0),
+    ),
+    LabwareTemplate("MicrocentrifugeTube", "1.5 ml tube", 15, dict(length=10.8, width=10.8, height=39.0, well_count=1)),
+    LabwareTemplate("ConicalTube", "15 ml tube", 7, dict(length=17.0, width=17.0, height=120.0, well_count=1)),
+    LabwareTemplate("ConicalTube", "50 ml tube", 6, dict(length=30.0, width=30.0, height=115.0, well_count=1)),
+    LabwareTemplate(
+        "Reservoir", "single well reservoir", 5, dict(length=127.76, width=85.48, height=31.4, well_count=1)
+    ),
+    LabwareTemplate(
+        "Reservoir",
+        "12 channel reservoir",
+        3,
+        dict(length=127.76, width=85.48, height=44.0, well_count=12, well_pitch=9.0),
+    ),
+    LabwareTemplate(
+        "TipRack", "200 ul tip rack", 8, dict(length=127.76, width=85.48, height=60.0, well_count=96, well_pitch=9.0)
+    ),
+    LabwareTemplate(
+        "TipRack", "1000 ul tip rack", 6, dict(length=127.76, width=85.48, height=98.0, well_count=96, well_pitch=9.0)
+    ),
+)
+
+# vendor -> product number format, in order of market share
+VENDORS = {
+    "Corning": "CLS{:07d}",
+    "Thermo Fisher Scientific": "AB-{:07d}",
+    "Greiner Bio-One": "{:07d}",
+    "Eppendorf": "0030{:07d}",
+    "Sarstedt": "72.{:07d}",
+    "Nunc": "N{:07d}",
+    "Agilent": "5190-{:07d}",
+    "Hamilton": "23{:07d}",
+    "Beckman Coulter": "B{:07d}",
+    "Starlab": "S{:07d}",
+}
+VENDOR_ZIPF_EXPONENT = 1.1
+
+# +- mm of the height of a product compared to its template
+HEIGHT_VARIATION = 0.5
+
+
+class CatalogEntry(NamedTuple):
+    definition: LabwareDefinition
+    labware_class: str  # IRI (N-Triples notation)
+
+
+def generate_catalog(size: int, seed: int = 0) -> Iterator[CatalogEntry]:
+    """the entries of a synthetic catalog
+
+    :param size: number of labware entries
+    :param seed: seed of the random choices, the same seed gives the same catalog
+    """
+    rng = random.Random(seed)
+    templates = list(itertools.accumulate(template.weight for template in TEMPLATES))
+    vendors = list(VENDORS)
+    vendor_weights = list(itertools.accumulate(1 / rank**VENDOR_ZIPF_EXPONENT for rank in range(1, len(vendors) + 1)))
+    product_numbers = {vendor: itertools.count(1) for vendor in vendors}
+    for _ in range(size):
+        template = rng.choices(TEMPLATES, cum_weights=templates)[0]
+        vendor = rng.choices(vendors, cum_weights=vendor_weights)[0]
+        product_number = VENDORS[vendor].format(next(product_numbers[vendor]))
+        dimensions = dict(template.dimensions)
+        dimensions["height"] = round(dimensions["height"] + rng.uniform(-HEIGHT_VARIATION, HEIGHT_VARIATION), 2)
+        definition = LabwareDefinition(
+            f"{vendor} {template.description} {product_number}", vendor, product_number, dimensions
+        )
+        yield CatalogEntry(definition, iri(LABWARE.term(template.labware_class)))
+
+
+def catalog_triples(size: int, seed: int = 0) -> Iterator[Triple]:
+    """the class hierarchy and the labware individuals of a synthetic catalog as triples"""
+    for labware_class, superclass in CLASS_HIERARCHY.items():
+        yield iri(LABWARE.term(labware_class)), iri(RDFS.subClassOf), iri(LABWARE.term(superclass))
+    for definition, labware_class in generate_catalog(size, seed):
+        triples = labware_triples(definition)
+        yield from triples
+        yield triples[0][0], iri(RDF.type), labware_class
+
+
+def write_catalog(stream: TextIO, size: int, seed: int = 0) -> int:
+    """writes a synthetic catalog as N-Triples, returns the number of triples"""
+    return write_ntriples(catalog_triples(size, seed), stream)
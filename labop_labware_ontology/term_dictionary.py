@@ -0,0 +1,153 @@
+"""_____________________________________________________________________
+
+:PROJECT: LabOP Labware Ontology
+
+* Term dictionary *
+
+:details: Interns every RDF term (IRI, literal, blank node in N-Triples notation) once
+          and maps it to a dense integer ID. Triples, indexes and query solutions only carry these IDs,
+          terms are decoded to strings when a response is serialized.
+
+          A dictionary loaded from a snapshot keeps the compiled terms in the (memory-mapped) snapshot:
+          a UTF-8 blob with an offset array for decoding and an open addressing hash table for lookups.
+          Terms added later are held in memory and get the IDs following the compiled ones.
+
+          The dictionary is append-only: IDs are never reassigned, so readers need no lock.
+
+.. note:: -
+.. todo:: -
+________________________________________________________________________
+"""
+
+import zlib
+from array import array
+from threading import Lock
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+
+def term_hash(encoded_term: bytes) -> int:
+    """stable hash of an UTF-8 encoded term, used for the compiled hash table (python's hash() is salted)"""
+    return zlib.crc32(encoded_term)
+
+
+class CompiledTerms:
+    def __init__(self, blob: Sequence[int], offsets: Sequence[int], table: Sequence[int]) -> None:
+        """read-only terms of a snapshot
+
+        :param blob: UTF-8 encoded terms, concatenated
+        :param offsets: start of term i in the blob at offsets[i], end at offsets[i + 1]
+        :param table: hash table of size 2^k, slot content is term ID + 1, 0 marks an empty slot
+        """
+        self.blob = blob
+        self.offsets = offsets
+        self.table = table
+        self._mask = len(table) - 1
+
+    def __len__(self) -> int:
+        return len(self.offsets) - 1
+
+    def decode(self, term_id: int) -> str:
+        return str(self.blob[self.offsets[term_id] : self.offsets[term_id + 1]], "utf-8")
+
+    def lookup(self, term: str) -> Optional[int]:
+        encoded = term.encode()
+        table, blob, offsets = self.table, self.blob, self.offsets
+        slot = term_hash(encoded) & self._mask
+        while True:
+            entry = table[slot]
+            if entry == 0:
+                return None
+            term_id = entry - 1
+            if blob[offsets[term_id] : offsets[term_id + 1]] == encoded:
+                return term_id
+            slot = (slot + 1) & self._mask
+
+    @staticmethod
+    def build(terms: Sequence[str]) -> Tuple[bytes, array, array]:
+        """compiles terms into (blob, offsets, table) arrays"""
+        encoded = [term.encode() for term in terms]
+        offsets = array("Q", [0])
+        position = 0
+        for item in encoded:
+            position += len(item)
+            offsets.append(position)
+        capacity = 1
+        while capacity < 2 * len(encoded):
+            capacity <<= 1
+        mask = capacity - 1
+        table = array("I", bytes(4 * capacity))
+        for term_id, item in enumerate(encoded):
+            slot = term_hash(item) & mask
+            while table[slot]:
+                slot = (slot + 1) & mask
+            table[slot] = term_id + 1
+        return b"".join(encoded), offsets, table
+
+
+class TermDictionary:
+    def __init__(self, compiled: Optional[CompiledTerms] = None) -> None:
+        """Bidirectional mapping term <-> ID, IDs are assigned consecutively starting at 0.
+
+        Each term string is held once - the list entry and the dictionary key are the same object.
+
+        :param compiled: compiled terms of a snapshot, they keep their IDs 0 .. len(compiled) - 1
+        """
+        self.compiled = compiled
+        self._first_id = len(compiled) if compiled is not None else 0
+        self._ids: Dict[str, int] = {}
+        self._terms: List[str] = []
+        self._lock = Lock()
+
+    def __len__(self) -> int:
+        return self._first_id + len(self._terms)
+
+    def __contains__(self, term: str) -> bool:
+        return self.lookup(term) is not None
+
+    def __iter__(self) -> Iterator[str]:
+        if self.compiled is not None:
+            for term_id in range(self._first_id):
+                yield self.compiled.decode(term_id)
+        yield from self._terms
+
+    def encode(self, term: str) -> int:
+        """ID of a term, the term is added if it is not yet in the dictionary
+
+        :param term: term in N-Triples notation
+        :type term: str
+        """
+        term_id = self.lookup(term)
+        if term_id is not None:
+            return term_id
+        with self._lock:
+            term_id = self._ids.get(term)
+            if term_id is None:
+                term_id = self._first_id + len(self._terms)
+                # the term is decodable before its ID is published
+                self._terms.append(term)
+                self._ids[term] = term_id
+        return term_id
+
+    def encode_triple(self, triple: Tuple[str, str, str]) -> Tuple[int, int, int]:
+        encode = self.encode
+        return encode(triple[0]), encode(triple[1]), encode(triple[2])
+
+    def lookup(self, term: str) -> Optional[int]:
+        """ID of a term without adding it, None if the term is unknown"""
+        term_id = self._ids.get(term)
+        if term_id is None and self.compiled is not None:
+            return self.compiled.lookup(term)
+        return term_id
+
+    def decode(self, term_id: int) -> str:
+        """term (N-Triples notation) of an ID
+
+        :raises IndexError: if the ID was never assigned
+        """
+        if term_id < self._first_id:
+            return self.compiled.decode(term_id)
+        return self._terms[term_id - self._first_id]
+
+    def decode_many(self, term_ids: Iterable[int]) -> List[str]:
+        decode = self.decode
+        return [decode(term_id) for term_id in term_ids]
@@ -0,0 +1,341 @@
+"""_____________________________________________________________________
+
+:PROJECT: LabOP Labware Ontology
+
+* Indexed in-memory triple store *
+
+:details: Triples are stored as integer term IDs in three permutation indexes (SPO, POS, OSP),
+          so every triple pattern is answered by index lookups instead of a scan over all triples.
+          A store loaded from a snapshot has a read-only compiled base layer,
+          triples added afterwards go into in-memory indexes on top of it.
+
+          The store is multi-versioned: a StoreVersion is an immutable view of the store
+          (the compiled base and a stack of immutable in-memory segments). Readers pin the current version
+          and never block or see a partial update, writers build the next version copy-on-write and publish it
+          atomically. Each update adds a segment, small segments are merged like a binary counter,
+          so a version has O(log n) segments and every triple is copied O(log n) times.
+
+          Secondary indexes are maintained by listeners, which get all new triples of an update at once -
+          a batch of triples is merged into them once instead of triple by triple.
+
+.. note:: -
+.. todo:: -
+________________________________________________________________________
+"""
+
+from threading import Lock
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Set, Tuple
+
+from .compiled_index import CompiledIndexes
+from .term_dictionary import TermDictionary
+
+IDTriple = Tuple[int, int, int]
+Triple = Tuple[str, str, str]
+TripleListener = Callable[[Sequence[IDTriple]], None]
+
+_Index = Dict[int, Dict[int, Set[int]]]
+
+
+def _index_add(index: _Index, a: int, b: int, c: int) -> None:
+    second = index.get(a)
+    if second is None:
+        index[a] = {b: {c}}
+        return
+    third = second.get(b)
+    if third is None:
+        second[b] = {c}
+    else:
+        third.add(c)
+
+
+def _merged_index(older: _Index, newer: _Index) -> _Index:
+    """union of two disjoint indexes, shares all unchanged inner dicts and sets with them"""
+    merged = older.copy()
+    for a, second in newer.items():
+        current = merged.get(a)
+        if current is None:
+            merged[a] = second
+            continue
+        current = current.copy()
+        for b, third in second.items():
+            existing = current.get(b)
+            current[b] = third if existing is None else existing | third
+        merged[a] = current
+    return merged
+
+
+class _Segment:
+    __slots__ = ("spo", "pos", "osp", "size")
+
+    def __init__(self, triples: Iterable[IDTriple] = ()) -> None:
+        """in-memory SPO/POS/OSP indexes of distinct triples, not modified after construction"""
+        self.spo: _Index = {}
+        self.pos: _Index = {}
+        self.osp: _Index = {}
+        self.size = 0
+        for s, p, o in triples:
+            _index_add(self.spo, s, p, o)
+            _index_add(self.pos, p, o, s)
+            _index_add(self.osp, o, s, p)
+            self.size += 1
+
+    @classmethod
+    def merged(cls, older: "_Segment", newer: "_Segment") -> "_Segment":
+        """union of two segments, copy-on-write - both stay valid for the versions using them"""
+        segment = cls()
+        segment.spo = _merged_index(older.spo, newer.spo)
+        segment.pos = _merged_index(older.pos, newer.pos)
+        segment.osp = _merged_index(older.osp, newer.osp)
+        segment.size = older.size + newer.size
+        return segment
+
+    def contains(self, s: int, p: int, o: int) -> bool:
+        return o in self.spo.get(s, {}).get(p, ())
+
+    def match(self, s: Optional[int], p: Optional[int], o: Optional[int]) -> Iterator[IDTriple]:
+        if s is not None:
+            if p is not None:
+                objects = self.spo.get(s, {}).get(p, ())
+                if o is not None:
+                    if o in objects:
+                        yield s, p, o
+                    return
+                for obj in objects:
+                    yield s, p, obj
+            elif o is not None:
+                for pred in self.osp.get(o, {}).get(s, ()):
+                    yield s, pred, o
+            else:
+                for pred, objects in self.spo.get(s, {}).items():
+                    for obj in objects:
+                        yield s, pred, obj
+        elif p is not None:
+            if o is not None:
+                for subj in self.pos.get(p, {}).get(o, ()):
+                    yield subj, p, o
+            else:
+                for obj, subjects in self.pos.get(p, {}).items():
+                    for subj in subjects:
+                        yield subj, p, obj
+        elif o is not None:
+            for subj, predicates in self.osp.get(o, {}).items():
+                for pred in predicates:
+                    yield subj, pred, o
+        else:
+            for subj, predicates in self.spo.items():
+                for pred, objects in predicates.items():
+                    for obj in objects:
+                        yield subj, pred, obj
+
+    def count(self, s: Optional[int], p: Optional[int], o: Optional[int]) -> int:
+        if s is None and p is None and o is None:
+            return self.size
+        if s is not None and p is not None and o is None:
+            return len(self.spo.get(s, {}).get(p, ()))
+        if p is not None and o is not None and s is None:
+            return len(self.pos.get(p, {}).get(o, ()))
+        if o is not None and s is not None and p is None:
+            return len(self.osp.get(o, {}).get(s, ()))
+        return sum(1 for _ in self.match(s, p, o))
+
+
+class StoreVersion:
+    def __init__(
+        self,
+        dictionary: TermDictionary,
+        compiled: Optional[CompiledIndexes] = None,
+        segments: Tuple[_Segment, ...] = (),
+        number: int = 0,
+    ) -> None:
+        """Immutable view of a triple store, with the read interface of the store.
+
+        :param dictionary: the (append-only) term dictionary shared by all versions of the store
+        :param compiled: read-only base indexes
+        :param segments: in-memory segments on top of the base, oldest first, disjoint from each other and the base
+        :param number: version number, increases with every update
+        """
+        self.dictionary = dictionary
+        self.compiled = compiled
+        self.segments = segments
+        self.number = number
+        self.size = sum(segment.size for segment in segments) + (len(compiled) if compiled is not None else 0)
+
+    def __len__(self) -> int:
+        return self.size
+
+    def __contains__(self, triple: Triple) -> bool:
+        ids = tuple(self.dictionary.lookup(term) for term in triple)
+        if None in ids:
+            return False
+        return self.contains_ids(*ids)
+
+    def extend(self, triples: Sequence[IDTriple]) -> "StoreVersion":
+        """the next version, with new (not yet contained) triples added"""
+        segments = list(self.segments)
+        segments.append(_Segment(triples))
+        while len(segments) > 1 and segments[-2].size <= segments[-1].size:
+            newer, older = segments.pop(), segments.pop()
+            segments.append(_Segment.merged(older, newer))
+        return StoreVersion(self.dictionary, self.compiled, tuple(segments), self.number + 1)
+
+    def term_id(self, term: str) -> Optional[int]:
+        """ID of a term, None if the term is unknown
+
+        :param term: term in N-Triples notation
+        :type term: str
+        """
+        return self.dictionary.lookup(term)
+
+    def term(self, term_id: int) -> str:
+        """term (N-Triples notation) of a term ID"""
+        return self.dictionary.decode(term_id)
+
+    def contains_ids(self, s: int, p: int, o: int) -> bool:
+        if self.compiled is not None and self.compiled.contains(s, p, o):
+            return True
+        return any(segment.contains(s, p, o) for segment in self.segments)
+
+    def match(self, s: Optional[int] = None, p: Optional[int] = None, o: Optional[int] = None) -> Iterator[IDTriple]:
+        """all triples matching a pattern of term IDs, None is a wildcard
+
+        The index is chosen by the bound positions, so only the matching part of the store is visited.
+        """
+        if self.compiled is not None:
+            yield from self.compiled.match(s, p, o)
+        for segment in self.segments:
+            yield from segment.match(s, p, o)
+
+    def count(self, s: Optional[int] = None, p: Optional[int] = None, o: Optional[int] = None) -> int:
+        """number of triples matching a pattern of term IDs"""
+        compiled = self.compiled.count(s, p, o) if self.compiled is not None else 0
+        return compiled + sum(segment.count(s, p, o) for segment in self.segments)
+
+    def delta(self) -> Iterator[IDTriple]:
+        """triples of the in-memory segments - all triples added after the compiled base was loaded"""
+        for segment in self.segments:
+            yield from segment.match(None, None, None)
+
+    def triples(
+        self, subject: Optional[str] = None, predicate: Optional[str] = None, obj: Optional[str] = None
+    ) -> Iterator[Triple]:
+        """all triples matching a pattern of terms (N-Triples notation), None is a wildcard"""
+        ids = []
+        for term in (subject, predicate, obj):
+            if term is None:
+                ids.append(None)
+                continue
+            term_id = self.dictionary.lookup(term)
+            if term_id is None:
+                return
+            ids.append(term_id)
+        decode = self.dictionary.decode
+        for s, p, o in self.match(*ids):
+            yield decode(s), decode(p), decode(o)
+
+
+class TripleStore:
+    def __init__(self, dictionary: Optional[TermDictionary] = None, compiled: Optional[CompiledIndexes] = None) -> None:
+        """In-memory RDF triple store.
+
+        Terms are given in N-Triples notation (see rdf_terms) and interned to integer IDs
+        by the term dictionary, the permutation indexes only hold these IDs.
+        The read methods use the current version, readers that need a consistent view over
+        several calls (e.g. a query) pin store.version instead.
+
+        :param dictionary: term dictionary to use, a new one is created by default
+        :param compiled: read-only base indexes (of a snapshot), their term IDs refer to the dictionary
+        """
+        self.dictionary = dictionary if dictionary is not None else TermDictionary()
+        self.compiled = compiled
+        self.version = StoreVersion(self.dictionary, compiled)
+        self._listeners: List[TripleListener] = []
+        self._write_lock = Lock()
+
+    def __len__(self) -> int:
+        return len(self.version)
+
+    def __contains__(self, triple: Triple) -> bool:
+        return triple in self.version
+
+    # terms --------------------------------------------------------------
+
+    def term_id(self, term: str) -> Optional[int]:
+        """ID of a term, None if the term is unknown
+
+        :param term: term in N-Triples notation
+        :type term: str
+        """
+        return self.dictionary.lookup(term)
+
+    def term(self, term_id: int) -> str:
+        """term (N-Triples notation) of a term ID"""
+        return self.dictionary.decode(term_id)
+
+    # updates ------------------------------------------------------------
+
+    def add_listener(self, listener: TripleListener) -> None:
+        """registers a callback listener(triples) that is called with the new triples of every update,
+        used to maintain secondary indexes
+
+        Listeners are called in update order after the new version is published, writes are blocked meanwhile.
+
+        :param listener: callable receiving the (s, p, o) term IDs of the added triples
+        """
+        self._listeners.append(listener)
+
+    def add(self, subject: str, predicate: str, obj: str) -> bool:
+        """adds a triple, returns False if the triple was already in the store
+
+        :param subject: subject term in N-Triples notation
+        :param predicate: predicate term in N-Triples notation
+        :param obj: object term in N-Triples notation
+        """
+        return bool(self.add_all(((subject, predicate, obj),)))
+
+    def add_ids(self, s: int, p: int, o: int) -> bool:
+        """adds a triple of already interned term IDs"""
+        return bool(self.add_all_ids(((s, p, o),)))
+
+    def add_all(self, triples: Iterable[Triple]) -> int:
+        """adds triples as one update, returns the number of new triples"""
+        return len(self.add_all_ids(map(self.dictionary.encode_triple, triples)))
+
+    def add_all_ids(self, triples: Iterable[IDTriple]) -> List[IDTriple]:
+        """adds triples of term IDs as one update (one new version), returns the new triples
+
+        The listeners are notified once with all new triples.
+        """
+        with self._write_lock:
+            version = self.version
+            contains = version.contains_ids
+            new: Dict[IDTriple, None] = {}
+            for triple in triples:
+                if triple not in new and not contains(*triple):
+                    new[triple] = None
+            if not new:
+                return []
+            added = list(new)
+            self.version = version.extend(added)
+            for listener in self._listeners:
+                listener(added)
+        return added
+
+    # lookups (on the current version) -------------------------------------
+
+    def match(self, s: Optional[int] = None, p: Optional[int] = None, o: Optional[int] = None) -> Iterator[IDTriple]:
+        """all triples matching a pattern of term IDs, None is a wildcard"""
+        return self.version.match(s, p, o)
+
+    def count(self, s: Optional[int] = None, p: Optional[int] = None, o: Optional[int] = None) -> int:
+        """number of triples matching a pattern of term IDs"""
+        return self.version.count(s, p, o)
+
+    def delta(self) -> Iterator[IDTriple]:
+        """triples added after the compiled base was loaded"""
+        return self.version.delta()
+
+    def triples(
+        self, subject: Optional[str] = None, predicate: Optional[str] = None, obj: Optional[str] = None
+    ) -> Iterator[Triple]:
+        """all triples matching a pattern of terms (N-Triples notation), None is a wildcard"""
+        return self.version.triples(subject, predicate, obj)
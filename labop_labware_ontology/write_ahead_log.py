@@ -0,0 +1,246 @@
+"""_____________________________________________________________________
+
+:PROJECT: LabOP Labware Ontology
+
+* Write-ahead log of store updates *
+
+:details: Append-only log of the triples added to a store, one record per store update:
+
+          header          magic
+          record          log sequence number (LSN), payload length, CRC-32 of the payload
+                          payload: the added triples as UTF-8 N-Triples
+
+          Writers append their record in memory and wait until it is durable (group commit):
+          the first waiting writer flushes and fsyncs all pending records, writers arriving meanwhile
+          wait for the next flush - concurrent writes share one fsync.
+
+          A checkpoint writes the store into the snapshot (see snapshot.checkpoint_snapshot) together with
+          the LSN of the last logged update, the log is then truncated to the records after it.
+          On restart only the records after the checkpoint are replayed.
+          A torn record at the end of the log (crash during a write) is discarded.
+
+.. note:: -
+.. todo:: -
+________________________________________________________________________
+"""
+
+import logging
+import os
+import struct
+import zlib
+from threading import Condition, Event, Lock, Thread
+from typing import BinaryIO, Iterator, List, Optional, Sequence, Tuple
+
+from .rdf_sources import parse_ntriples
+from .snapshot import Snapshot, checkpoint_snapshot
+from .triple_store import IDTriple, Triple, TripleStore
+
+MAGIC = b"LWWAL001"
+
+_RECORD = struct.Struct("<QII")
+
+LogRecord = Tuple[int, List[Triple]]
+
+
+class WALError(Exception):
+    """The write-ahead log is no valid log or could not be written"""
+
+
+def _read_records(stream: BinaryIO, path: str) -> Iterator[Tuple[int, int, bytes]]:
+    """(end offset, LSN, payload) of the intact records of a log file"""
+    if stream.read(len(MAGIC)) != MAGIC:
+        raise WALError(f"{path} is no labware write-ahead log")
+    while True:
+        header = stream.read(_RECORD.size)
+        if len(header) < _RECORD.size:
+            return
+        lsn, length, checksum = _RECORD.unpack(header)
+        payload = stream.read(length)
+        if len(payload) < length or zlib.crc32(payload) != checksum:
+            return
+        yield stream.tell(), lsn, payload
+
+
+def _record(lsn: int, payload: bytes) -> bytes:
+    return _RECORD.pack(lsn, len(payload), zlib.crc32(payload)) + payload
+
+
+class WriteAheadLog:
+    def __init__(self, path: str, after_lsn: int = 0, sync: bool = True) -> None:
+        """opens (or creates) a write-ahead log, a torn record at its end is cut off
+
+        :param path: path of the log file
+        :param after_lsn: LSN of the last checkpoint, new records get higher LSNs even if the log is empty
+        :param sync: fsync on every flush, disable only for tests and benchmarks
+        :raises WALError: if the file is no write-ahead log
+        """
+        self.path = path
+        self.sync_enabled = sync
+        self._condition = Condition()
+        self._pending: List[bytes] = []
+        self._flushing = False
+        self._error: Optional[WALError] = None
+        self.last_lsn = after_lsn
+        if not os.path.exists(path):
+            with open(path, "wb") as stream:
+                stream.write(MAGIC)
+                stream.flush()
+                os.fsync(stream.fileno())
+        end = len(MAGIC)
+        with open(path, "rb") as stream:
+            for end, lsn, _ in _read_records(stream, path):
+                self.last_lsn = max(self.last_lsn, lsn)
+            if stream.seek(0, os.SEEK_END) > end:
+                logging.warning(f"write-ahead log {path}: discarding a torn record at offset {end}")
+        self._file = open(path, "r+b")
+        self._file.truncate(end)
+        self._file.seek(end)
+        self.durable_lsn = self.last_lsn
+
+    def close(self) -> None:
+        """flushes the pending records and closes the log"""
+        self.sync()
+        self._file.close()
+
+    def records(self, after_lsn: int = 0) -> Iterator[LogRecord]:
+        """(LSN, triples) of the durable records with an LSN after after_lsn, in log order"""
+        with open(self.path, "rb") as stream:
+            for _, lsn, payload in _read_records(stream, self.path):
+                if lsn > after_lsn:
+                    yield lsn, list(parse_ntriples(str(payload, "utf-8").splitlines(), self.path))
+
+    def attach(self, store: TripleStore) -> None:
+        """logs every update of the store from now on (as store listener)
+
+        Writers have to call sync() before acknowledging their update.
+        """
+        decode = store.dictionary.decode
+
+        def triples_added(triples: Sequence[IDTriple]) -> None:
+            self.append([(decode(s), decode(p), decode(o)) for s, p, o in triples])
+
+        store.add_listener(triples_added)
+
+    def append(self, triples: Sequence[Triple]) -> int:
+        """adds a record to the log (in memory), returns its LSN - it is durable after sync(LSN)"""
+        payload = "".join(f"{s} {p} {o} .\n" for s, p, o in triples).encode()
+        with self._condition:
+            self.last_lsn += 1
+            self._pending.append(_record(self.last_lsn, payload))
+            return self.last_lsn
+
+    def sync(self, lsn: Optional[int] = None) -> None:
+        """waits until all records up to lsn (default: all appended records) are durable
+
+        :raises WALError: if the log could not be written
+        """
+        with self._condition:
+            if lsn is None:
+                lsn = self.last_lsn
+            while self.durable_lsn < lsn:
+                if self._error is not None:
+                    raise self._error
+                if self._flushing:
+                    # another writer flushes - our record is either in its flush or in the next one
+                    self._condition.wait()
+                    continue
+                self._flush_pending()
+
+    def _flush_pending(self) -> None:
+        """writes the pending records, the caller holds the condition"""
+        pending, self._pending = self._pending, []
+        target = self.last_lsn
+        self._flushing = True
+        self._condition.release()
+        try:
+            self._file.write(b"".join(pending))
+            self._file.flush()
+            if self.sync_enabled:
+                os.fsync(self._file.fileno())
+        except OSError as error:
+            # the pending records are lost, no later record may be reported durable
+            self._error = WALError(f"cannot write the write-ahead log {self.path}: {error}")
+            raise self._error from error
+        finally:
+            self._condition.acquire()
+            self._flushing = False
+            self._condition.notify_all()
+        self.durable_lsn = target
+
+    def truncate(self, lsn: int) -> None:
+        """removes the records up to lsn (after they were checkpointed)"""
+        self.sync()
+        with self._condition:
+            while self._flushing:
+                self._condition.wait()
+            with open(self.path, "rb") as stream:
+                kept = [
+                    _record(record_lsn, payload)
+                    for _, record_lsn, payload in _read_records(stream, self.path)
+                    if record_lsn > lsn
+                ]
+            temporary_path = f"{self.path}.tmp{os.getpid()}"
+            with open(temporary_path, "wb") as stream:
+                stream.write(MAGIC)
+                stream.write(b"".join(kept))
+                stream.flush()
+                os.fsync(stream.fileno())
+            self._file.close()
+            os.replace(temporary_path, self.path)
+            self._file = open(self.path, "r+b")
+            self._file.seek(0, os.SEEK_END)
+
+
+def replay_log(store: TripleStore, log: WriteAheadLog, after_lsn: int = 0) -> int:
+    """adds the logged triples after the checkpoint after_lsn to the store as one update, returns their number"""
+    encode_triple = store.dictionary.encode_triple
+    triples = [encode_triple(triple) for _, record in log.records(after_lsn) for triple in record]
+    added = store.add_all_ids(triples)
+    if triples:
+        logging.info(f"replayed {len(triples)} logged triples from {log.path}, {len(added)} new")
+    return len(added)
+
+
+class Checkpointer(Thread):
+    def __init__(self, path: str, snapshot: Snapshot, log: WriteAheadLog, write_lock: Lock, interval: float) -> None:
+        """background thread writing a checkpoint of the store into the snapshot every interval seconds
+
+        :param path: path of the snapshot
+        :param snapshot: the snapshot the store was loaded from
+        :param log: the write-ahead log of the store
+        :param write_lock: the lock serializing the writes to the store
+        :param interval: seconds between two checkpoints
+        """
+        super().__init__(name="labware-checkpointer", daemon=True)
+        self.path = path
+        self.snapshot = snapshot
+        self.log = log
+        self.write_lock = write_lock
+        self.interval = interval
+        self.checkpoint_lsn = snapshot.wal_lsn
+        self._stopped = Event()
+
+    def run(self) -> None:
+        while not self._stopped.wait(self.interval):
+            try:
+                self.checkpoint()
+            except Exception:  # pylint: disable=broad-except
+                logging.exception(f"checkpoint of {self.path} failed")
+
+    def stop(self) -> None:
+        """stops the thread and writes a last checkpoint"""
+        self._stopped.set()
+        if self.is_alive():
+            self.join()
+        self.checkpoint()
+
+    def checkpoint(self) -> None:
+        """writes the store into the snapshot and truncates the log, writes are blocked meanwhile"""
+        with self.write_lock:
+            lsn = self.log.last_lsn
+            if lsn == self.checkpoint_lsn:
+                return
+            checkpoint_snapshot(self.path, self.snapshot, lsn)
+            self.log.truncate(lsn)
+            self.checkpoint_lsn = lsn
+        logging.info(f"checkpoint of {self.path} at LSN {lsn}")
@@ -3,10 +3,14 @@ Tasks for maintaining the project.
 
 Execute 'invoke --list' for guidance on using Invoke
 """
+import ast
 import os
+import re
 import sys
 import platform
 import shutil
+import tempfile
+import textwrap
 import webbrowser
 from pathlib import Path
 from distutils.util import strtobool
@@ -31,6 +35,9 @@ DOCS_DIR = ROOT_DIR.joinpath("docs")
 DOCS_SOURCE_DIR = DOCS_DIR.joinpath("source")
 DOCS_BUILD_DIR = DOCS_DIR.joinpath("_build")
 DOCS_INDEX = DOCS_BUILD_DIR.joinpath("index.html")
+SILA_DIR = ROOT_DIR.joinpath("SiLA")
+SILA_FEATURES_DIR = SILA_DIR.joinpath("SiLA_features")
+SILA_GENERATED_DIR = SILA_DIR.joinpath("labop_labware_sila", "generated")
 PYTHON_DIRS = [str(d) for d in [SOURCE_DIR, TEST_DIR]]
 SAFETY_REQUIREMENTS_FILE = BIN_DIR.joinpath("safety_requirements.txt")
 PYPI_URL = "https://pypi.python.org/api/pypi/pypi/simple"
@@ -413,6 +420,131 @@ def generate_reqs(_c):
     """
     _run(_c, f"poetry export --without dev --without-hashes -f requirements.txt -o {ROOT_DIR}/requirements.txt")
     _run(_c, f"poetry export --only dev --without-hashes -f requirements.txt -o {ROOT_DIR}/requirements_dev.txt")
+@task
+def generate_sila(_c):
+    """
+    It regenerates the `generated` package of the SiLA server from the feature definitions in `SILA_FEATURES_DIR`
+    with `sila2-codegen update`, and repairs the code the generator (sila2 0.10.1) gets wrong
+
+    :param _c: The context object that is passed to invoke tasks
+    """
+    with tempfile.TemporaryDirectory() as package_dir:
+        # update also writes templates of the changed feature implementations, only `generated` is kept
+        package = Path(package_dir)
+        shutil.copy(SILA_DIR.joinpath("pyproject.toml"), package)
+        shutil.copytree(
+            SILA_GENERATED_DIR,
+            package.joinpath("labop_labware_sila", "generated"),
+            ignore=shutil.ignore_patterns("__pycache__"),
+        )
+        package.joinpath("labop_labware_sila", "feature_implementations").mkdir()
+        features = " ".join(str(path) for path in sorted(SILA_FEATURES_DIR.glob("*.sila.xml")))
+        _run(_c, f"sila2-codegen update --package-directory {package} {features}")
+        shutil.rmtree(SILA_GENERATED_DIR)
+        shutil.copytree(package.joinpath("labop_labware_sila", "generated"), SILA_GENERATED_DIR)
+
+    repaired = [_import_error_classes_by_feature(SILA_GENERATED_DIR.joinpath("client.py"))]
+    for feature_dir in sorted(path.parent for path in SILA_GENERATED_DIR.glob("*/__init__.py")):
+        repaired.extend(_import_data_types(feature_dir))
+        repaired.extend(_import_client_annotations(client) for client in feature_dir.glob("*_client.py"))
+    files = " ".join(str(file) for file in repaired)
+    _run(_c, f"isort --profile black --line-length 120 --quiet {files}")
+    _run(_c, f"black --line-length 120 --quiet {files}")
+
+
+def _import_data_types(feature_dir):
+    """
+    The generated base class and client of a feature import its data types only where they are the type
+    of a parameter, not where they are the items of a list parameter (List[LabwareKey]).
+    It adds the missing imports from the types module of the feature.
+
+    :param feature_dir: directory of the feature in the generated package
+    :return: the repaired files
+    """
+    types_file = next(feature_dir.glob("*_types.py"))
+    data_types = set()
+    for node in ast.parse(types_file.read_text()).body:
+        if isinstance(node, ast.ClassDef):
+            data_types.add(node.name)
+        elif isinstance(node, ast.Assign):
+            data_types.update(target.id for target in node.targets if isinstance(target, ast.Name))
+    repaired = []
+    for file in sorted(feature_dir.glob("*_base.py")) + sorted(feature_dir.glob("*_client.py")):
+        code = file.read_text()
+        tree = ast.parse(code)
+        imported = {
+            alias.asname or alias.name
+            for node in ast.walk(tree)
+            if isinstance(node, (ast.Import, ast.ImportFrom))
+            for alias in node.names
+        }
+        used = {node.id for node in ast.walk(tree) if isinstance(node, ast.Name)}
+        missing = sorted(used & data_types - imported)
+        if not missing:
+            continue
+        lines = code.splitlines(keepends=True)
+        first_import = next(node for node in tree.body if isinstance(node, (ast.Import, ast.ImportFrom)))
+        lines.insert(first_import.end_lineno, f"from .{types_file.stem} import {', '.join(missing)}\n")
+        file.write_text("".join(lines))
+        repaired.append(file)
+    return repaired
+
+
+def _import_client_annotations(client_file):
+    """
+    The generated client of a feature imports the types of its annotations only for type checkers,
+    the types module with an absolute import that does not resolve, so typing.get_type_hints fails.
+    It imports them at runtime, the types module relative to the feature.
+
+    :param client_file: client module of the feature in the generated package
+    :return: the repaired file
+    """
+    code = client_file.read_text()
+    tree = ast.parse(code)
+    lines = code.splitlines(keepends=True)
+    types_module = client_file.stem.replace("_client", "_types")
+    for node in reversed(tree.body):
+        if isinstance(node, ast.If) and isinstance(node.test, ast.Name) and node.test.id == "TYPE_CHECKING":
+            block = "".join(lines[node.body[0].lineno - 1 : node.end_lineno])
+            block = textwrap.dedent(block).replace(f"from {types_module} import", f"from .{types_module} import")
+            lines[node.lineno - 1 : node.end_lineno] = [block]
+        elif isinstance(node, ast.ImportFrom) and [alias.name for alias in node.names] == ["TYPE_CHECKING"]:
+            lines[node.lineno - 1 : node.end_lineno] = []
+    client_file.write_text("".join(lines))
+    return client_file
+
+
+def _import_error_classes_by_feature(client_file):
+    """
+    The generated client imports the defined execution errors of all features by their name, so errors of the same
+    name in several features (ServerBusy) are all registered with the class of the last feature.
+    It imports the feature modules instead and registers the error class of each feature.
+
+    :param client_file: client.py of the generated package
+    :return: the repaired file
+    """
+    registration = r'(\w+)Feature\.defined_execution_errors\["(\w+)"\], \w+'
+    code = client_file.read_text()
+    registered = re.findall(registration, code)
+    code = re.sub(
+        registration,
+        lambda match: f'{match[1]}Feature.defined_execution_errors["{match[2]}"], {match[1].lower()}.{match[2]}',
+        code,
+    )
+    errors = {error for _, error in registered}
+    lines = code.splitlines(keepends=True)
+    feature_imports = [
+        node for node in ast.parse(code).body if isinstance(node, ast.ImportFrom) and node.level == 1 and node.module
+    ]
+    for node in reversed(feature_imports):
+        names = ", ".join(alias.name for alias in node.names if alias.name not in errors)
+        lines[node.lineno - 1 : node.end_lineno] = [f"from .{node.module} import {names}\n"] if names else []
+    modules = ", ".join(sorted({feature.lower() for feature, _ in registered}))
+    lines.insert(feature_imports[0].lineno - 1, f"from . import {modules}\n")
+    client_file.write_text("".join(lines))
+    return client_file
+
+
 # --------------- installation helper functions, please do not modify -----------------------------
 
 def query_yes_no(question, default_answer="yes", help=""):
@@ -0,0 +1,90 @@
+#!/usr/bin/env python
+"""Tests for the closure index of the class hierarchy."""
+
+import itertools
+
+from labop_labware_ontology.class_hierarchy import ClassHierarchy, ClassLabels
+from labop_labware_ontology.namespaces import LABWARE, RDF, RDFS
+from labop_labware_ontology.rdf_terms import iri
+from labop_labware_ontology.triple_store import TripleStore
+
+# 1 <- 2 <- 4, 1 <- 3 <- 4 (two superclasses), 3 <- 5, 6 <- 7 <- 6 (a cycle)
+EDGES = [(2, 1), (3, 1), (4, 2), (4, 3), (5, 3), (7, 6), (6, 7)]
+
+
+def closure(edges):
+    """ (subclass, superclass) pairs of the reflexive transitive closure, by traversal
+    """
+    parents = {}
+    for child, parent in edges:
+        parents.setdefault(child, set()).add(parent)
+    pairs = set()
+    for start in {term for edge in edges for term in edge}:
+        pending, seen = [start], {start}
+        while pending:
+            term = pending.pop()
+            pairs.add((start, term))
+            for parent in parents.get(term, ()):
+                if parent not in seen:
+                    seen.add(parent)
+                    pending.append(parent)
+    return pairs
+
+
+def assert_closure(labels, edges):
+    pairs = closure(edges)
+    classes = {term for edge in edges for term in edge}
+    for subclass, superclass in itertools.product(classes, repeat=2):
+        assert labels.is_subclass(subclass, superclass) == ((subclass, superclass) in pairs)
+    for cls in classes:
+        assert sorted(labels.descendants(cls)) == sorted(sub for sub, sup in pairs if sup == cls)
+        assert sorted(labels.ancestors(cls)) == sorted(sup for sub, sup in pairs if sub == cls)
+
+
+def test_labels():
+    """ the interval labels answer subclass tests, subclasses and superclasses like a traversal
+    """
+    labels = ClassLabels.build(EDGES)
+    assert_closure(labels, EDGES)
+    assert labels.intervals[2] == ((labels.number[2], labels.number[4]),)
+    assert sorted(labels.proper_descendants(1)) == [2, 3, 4, 5]
+    assert sorted(labels.proper_ancestors(6)) == [6, 7]
+    assert not labels.is_proper_subclass(1, 1) and labels.is_proper_subclass(4, 1)
+    assert list(labels.descendants(99)) == [99] and not labels.is_subclass(99, 1)
+
+
+def test_labels_with_edges():
+    """ new edges update the labels like building them again, the old labels are not changed
+    """
+    labels = ClassLabels.build(EDGES[:3])
+    updated = labels
+    for edge in EDGES[3:] + [(8, 5), (1, 9)]:
+        updated = updated.with_edges([edge], 1)
+    assert_closure(updated, EDGES + [(8, 5), (1, 9)])
+    assert_closure(labels, EDGES[:3])
+
+
+def test_hierarchy_of_store():
+    """ the hierarchy follows the writes to the store, instances are found through all subclasses
+    """
+    store = TripleStore()
+    subclass_of, rdf_type = iri(RDFS.subClassOf), iri(RDF.type)
+    store.add(iri(LABWARE.Microplate), subclass_of, iri(LABWARE.Labware))
+    store.add(iri(LABWARE.term("plate")), rdf_type, iri(LABWARE.Microplate))
+    hierarchy = ClassHierarchy(store)
+    before = store.version
+
+    store.add_all(
+        [
+            (iri(LABWARE.DeepWellPlate), subclass_of, iri(LABWARE.Microplate)),
+            (iri(LABWARE.term("deep well plate")), rdf_type, iri(LABWARE.DeepWellPlate)),
+        ]
+    )
+    labware, deep_well_plate = store.term_id(iri(LABWARE.Labware)), store.term_id(iri(LABWARE.DeepWellPlate))
+    assert hierarchy.labels().is_subclass(deep_well_plate, labware)
+    assert not hierarchy.labels(before).is_subclass(deep_well_plate, labware)
+    assert sorted(map(store.term, hierarchy.instances(labware))) == [
+        iri(LABWARE.term("deep well plate")),
+        iri(LABWARE.term("plate")),
+    ]
+    assert list(hierarchy.instances(labware, before)) == [store.term_id(iri(LABWARE.term("plate")))]
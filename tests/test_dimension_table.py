@@ -0,0 +1,73 @@
+#!/usr/bin/env python
+"""Tests for the columnar labware dimension table."""
+# pylint: disable=redefined-outer-name
+import pytest
+
+from labop_labware_ontology.dimension_table import DimensionTable
+from labop_labware_ontology.labware import DIMENSION_PROPERTIES, labware_iri
+from labop_labware_ontology.rdf_sources import write_ntriples
+from labop_labware_ontology.rdf_terms import literal
+from labop_labware_ontology.snapshot import load_snapshot, open_snapshot
+
+TRIPLES = [
+    (labware_iri("plate"), DIMENSION_PROPERTIES["length"], literal(127.76)),
+    (labware_iri("plate"), DIMENSION_PROPERTIES["width"], literal(85.48)),
+    (labware_iri("plate"), DIMENSION_PROPERTIES["well_count"], literal(96)),
+    (labware_iri("tube"), DIMENSION_PROPERTIES["height"], literal(40.0)),
+]
+
+
+@pytest.fixture
+def snapshot(tmp_path):
+    source = tmp_path / "labware.nt"
+    with open(source, "w", encoding="utf-8") as stream:
+        write_ntriples(TRIPLES, stream)
+    path = str(tmp_path / "labware.snapshot")
+    open_snapshot([str(source)], path)
+    return load_snapshot(path)
+
+
+def test_columns_in_snapshot(snapshot):
+    """ the columns are read from the memory-mapped snapshot, missing values are omitted
+    """
+    table, store = snapshot.dimension_table, snapshot.store
+    assert isinstance(table.columns["length"], memoryview)
+    assert len(table) == 2
+    plate, tube = store.term_id(labware_iri("plate")), store.term_id(labware_iri("tube"))
+    assert table.dimensions(plate) == {"length": 127.76, "width": 85.48, "well_count": 96}
+    assert table.dimensions(tube) == {"height": 40.0}
+    assert table.row(store.term_id(DIMENSION_PROPERTIES["length"])) is None
+
+
+def test_changed_dimensions(snapshot):
+    """ labware with dimensions added after compilation is answered from the store
+    """
+    table, store = snapshot.dimension_table, snapshot.store
+    store.add(labware_iri("tube"), DIMENSION_PROPERTIES["width"], literal(12.0))
+    store.add(labware_iri("tip rack"), DIMENSION_PROPERTIES["length"], literal(122))
+    store.add(labware_iri("tip rack"), DIMENSION_PROPERTIES["well_count"], literal("96"))
+    store.add(labware_iri("tip rack"), DIMENSION_PROPERTIES["height"], literal("tall"))
+    assert table.dimensions(store.term_id(labware_iri("tube"))) == {"height": 40.0, "width": 12.0}
+    # the types of the columns, as if the record was read from the table
+    tip_rack = table.dimensions(store.term_id(labware_iri("tip rack")))
+    assert tip_rack == {"length": 122.0, "well_count": 96}
+    assert isinstance(tip_rack["length"], float) and isinstance(tip_rack["well_count"], int)
+
+
+def test_unknown_dimension_property(snapshot):
+    """ the table does not add the dimension properties to the store, changes of later ones are noticed
+    """
+    table, store = snapshot.dimension_table, snapshot.store
+    assert store.term_id(DIMENSION_PROPERTIES["well_pitch"]) is None
+    store.add(labware_iri("plate"), DIMENSION_PROPERTIES["well_pitch"], literal(9.0))
+    assert table.dimensions(store.term_id(labware_iri("plate")))["well_pitch"] == 9.0
+
+
+def test_build_in_memory(snapshot):
+    """ a table built from the store has the same records as the compiled one
+    """
+    store = snapshot.store
+    table = DimensionTable.build(store)
+    for name in ("plate", "tube"):
+        labware_id = store.term_id(labware_iri(name))
+        assert table.dimensions(labware_id) == snapshot.dimension_table.dimensions(labware_id)
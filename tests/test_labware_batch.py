@@ -0,0 +1,73 @@
+#!/usr/bin/env python
+"""Tests for the batch creation of labware individuals."""
+# pylint: disable=redefined-outer-name
+import pytest
+
+from labop_labware_ontology.dimension_table import DimensionTable
+from labop_labware_ontology.labware import labware_iri
+from labop_labware_ontology.labware_batch import (
+    LabwareDefinition,
+    LabwareDefinitionError,
+    create_labware_batch,
+    labware_triples,
+)
+from labop_labware_ontology.labware_index import LabwareIndex
+from labop_labware_ontology.triple_store import TripleStore
+
+
+@pytest.fixture
+def store():
+    return TripleStore()
+
+
+def test_labware_triples():
+    """ definitions are validated before any triple is created
+    """
+    assert len(labware_triples(LabwareDefinition("plate", "Corning", "3635", {"length": 127, "well_count": 96}))) == 6
+    with pytest.raises(LabwareDefinitionError):
+        labware_triples(LabwareDefinition(" "))
+    with pytest.raises(LabwareDefinitionError):
+        labware_triples(LabwareDefinition("plate", "Corning"))
+    with pytest.raises(LabwareDefinitionError):
+        labware_triples(LabwareDefinition("plate", dimensions={"depth": 1.0}))
+    with pytest.raises(LabwareDefinitionError):
+        labware_triples(LabwareDefinition("plate", dimensions={"well_count": 9.5}))
+
+
+def test_batch_with_invalid_items(store):
+    """ invalid and duplicate items get an error, the others are created and indexed
+    """
+    index = LabwareIndex(store)
+    table = DimensionTable.build(store)
+    results = create_labware_batch(
+        store,
+        index,
+        [
+            LabwareDefinition("plate", "Corning", "3635", {"length": 127.76, "well_count": 96}),
+            LabwareDefinition("plate"),
+            LabwareDefinition("tube", "corning ", "36 35"),
+            LabwareDefinition("reservoir", dimensions={"height": "high"}),
+            LabwareDefinition("tips", "Eppendorf", "0030073070"),
+            LabwareDefinition("deep well plate", dimensions={"well_count": float("nan")}),
+            LabwareDefinition("lid", dimensions={"height": float("inf")}),
+        ],
+    )
+    assert [result is None for result in results] == [True, False, False, False, True, False, False]
+    assert "not finite" in results[5] and store.term_id(labware_iri("deep well plate")) is None
+    assert store.term_id(labware_iri("reservoir")) is None
+    plate = index.lookup("Corning", "3635")
+    assert plate == store.term_id(labware_iri("plate"))
+    assert table.dimensions(plate) == {"length": 127.76, "well_count": 96}
+    assert index.lookup("eppendorf", "0030073070") == store.term_id(labware_iri("tips"))
+
+    again = create_labware_batch(store, index, [LabwareDefinition("plate"), LabwareDefinition("lid")])
+    assert again[0] is not None and again[1] is None
+
+
+def test_listeners_notified_once(store):
+    """ a batch is one store update
+    """
+    updates = []
+    store.add_listener(updates.append)
+    create_labware_batch(store, LabwareIndex(store), [LabwareDefinition(f"plate {i}") for i in range(100)])
+    assert len(updates) == 1 and len(updates[0]) == 200
@@ -0,0 +1,70 @@
+#!/usr/bin/env python
+"""Tests for the (vendor, product number) labware index."""
+# pylint: disable=redefined-outer-name
+import pytest
+
+from labop_labware_ontology.labware import DIMENSION_PROPERTIES, PRODUCT_NUMBER, VENDOR, labware_dimensions, labware_iri
+from labop_labware_ontology.labware_index import LabwareIndex, normalize_key
+from labop_labware_ontology.rdf_terms import literal
+from labop_labware_ontology.triple_store import TripleStore
+
+
+@pytest.fixture
+def store():
+    store = TripleStore()
+    plate = labware_iri("Greiner 655101")
+    store.add(plate, VENDOR, literal("Greiner Bio-One"))
+    store.add(plate, PRODUCT_NUMBER, literal("655101"))
+    store.add(plate, DIMENSION_PROPERTIES["length"], literal(127.76))
+    store.add(plate, DIMENSION_PROPERTIES["well_count"], literal(96))
+    return store
+
+
+def test_normalize_key():
+    """ keys ignore case and surplus whitespace
+    """
+    assert normalize_key(" Greiner  Bio-One", "655 101 ") == normalize_key("greiner bio-one", "655101")
+
+
+def test_index_built_at_load(store):
+    """ existing individuals are indexed when the index is created
+    """
+    index = LabwareIndex(store)
+    labware_id = index.lookup("GREINER BIO-ONE", "655101")
+    assert labware_id == store.term_id(labware_iri("Greiner 655101"))
+    assert labware_dimensions(store, labware_id) == {"length": 127.76, "well_count": 96}
+    assert index.lookup("Greiner Bio-One", "655102") is None
+
+
+def test_index_maintained_on_insert(store):
+    """ new individuals are indexed as soon as vendor and product number are both known
+    """
+    index = LabwareIndex(store)
+    tube = labware_iri("Eppendorf 0030120086")
+    store.add(tube, PRODUCT_NUMBER, literal("0030120086"))
+    assert index.lookup("Eppendorf", "0030120086") is None
+    store.add(tube, VENDOR, literal("Eppendorf"))
+    assert index.lookup("Eppendorf", "0030120086") == store.term_id(tube)
+    assert len(index) == 2
+
+
+def test_lookup_on_pinned_version(store):
+    """ a pinned version resolves keys as they were in that version, also while a write is not yet indexed
+    """
+    seen = []
+    # registered before the index, so it runs before the index has seen the write
+    store.add_listener(lambda triples: seen.append(index.lookup("Eppendorf", "0030120086", store.version)))
+    index = LabwareIndex(store)
+    plate, tube = store.term_id(labware_iri("Greiner 655101")), labware_iri("Eppendorf 0030120086")
+    pinned = store.version
+
+    store.add_all([(tube, VENDOR, literal("Eppendorf")), (tube, PRODUCT_NUMBER, literal("0030120086"))])
+    assert seen[-1] == store.term_id(tube)
+    assert index.lookup("Eppendorf", "0030120086") == store.term_id(tube)
+    assert index.lookup("Eppendorf", "0030120086", pinned) is None
+
+    # the key of the plate moves to another individual
+    store.add_all([(tube, VENDOR, literal("Greiner Bio-One")), (tube, PRODUCT_NUMBER, literal("655101"))])
+    assert index.lookup("Greiner Bio-One", "655101") == store.term_id(tube)
+    assert index.lookup("Greiner Bio-One", "655101", pinned) == plate
+    assert index.lookup("Greiner Bio-One", "655101", store.version) == store.term_id(tube)
@@ -0,0 +1,105 @@
+#!/usr/bin/env python
+"""Tests for the embedded labware service."""
+
+# pylint: disable=redefined-outer-name
+import json
+
+import pytest
+
+from labop_labware_ontology.labware_batch import LabwareDefinition
+from labop_labware_ontology.labware_service import LabwareService, UnknownLabwareError, UnknownQueryHandleError
+from labop_labware_ontology.sparql import BindingError, QueryLimitExceeded, SPARQLSyntaxError
+from labop_labware_ontology.synthetic_catalog import generate_catalog, write_catalog
+
+
+@pytest.fixture
+def source(tmp_path):
+    path = tmp_path / "catalog.nt"
+    with open(path, "w", encoding="utf-8") as stream:
+        write_catalog(stream, 100)
+    return str(path)
+
+
+def test_dimensions(source, tmp_path):
+    """ dimensions are looked up by vendor and product number, unknown labware is reported
+    """
+    with LabwareService([source], str(tmp_path / "catalog.snapshot")) as service:
+        entry = next(generate_catalog(100)).definition
+        dimensions = service.dimensions(entry.vendor, entry.product_number)
+        assert dimensions["height"] == entry.dimensions["height"]
+        assert service.dimensions_batch([(entry.vendor, entry.product_number), ("nobody", "0")]) == [dimensions, None]
+        with pytest.raises(UnknownLabwareError):
+            service.dimensions("nobody", "0")
+
+
+def test_create_and_query(source):
+    """ created labware is found by lookups and queries, the catalog version changes
+    """
+    service = LabwareService([source])
+    version = service.catalog_version()
+    service.create_labware("my plate")
+    errors = service.create_labware_batch(
+        [LabwareDefinition("new plate", "ACME", "P-1", {"height": 14.5}), LabwareDefinition(" ")]
+    )
+    assert errors[0] is None and errors[1]
+    assert service.catalog_version() != version
+    assert service.dimensions("ACME", "P-1") == {"height": 14.5}
+
+    result = json.loads(service.query("SELECT ?x { ?x rdfs:label 'my plate' }").to_json())
+    assert len(result["results"]["bindings"]) == 1
+    with pytest.raises(SPARQLSyntaxError):
+        service.query("SELECT")
+
+
+def test_query_limits(source):
+    """ queries get the row budget of the service
+    """
+    service = LabwareService([source], query_row_budget=10)
+    with pytest.raises(QueryLimitExceeded):
+        service.query("SELECT * { ?s ?p ?o }").to_json()
+    assert service.query_budget(5.0).timeout == 5.0
+    assert service.query_budget(0).timeout is None
+
+
+def test_write_ahead_log(source, tmp_path):
+    """ created labware is persisted in the write-ahead log and replayed
+    """
+    snapshot, wal = str(tmp_path / "catalog.snapshot"), str(tmp_path / "catalog.wal")
+    with LabwareService([source], snapshot, wal_path=wal) as service:
+        service.create_labware_batch([LabwareDefinition("new plate", "ACME", "P-1", {"height": 14.5})])
+    with LabwareService([source], snapshot, wal_path=wal) as service:
+        assert service.dimensions("ACME", "P-1") == {"height": 14.5}
+
+
+def test_query_json_cache(source):
+    """ repeated queries are answered from the result cache until a write changes their result
+    """
+    service = LabwareService([source])
+    query = "SELECT ?x { ?x rdfs:label 'my plate' }"
+    assert json.loads(service.query_json(query))["results"]["bindings"] == []
+    assert json.loads(service.query_json(" select ?x {?x rdfs:label 'my plate'}"))["results"]["bindings"] == []
+    assert service.result_cache.hits == 1
+    service.create_labware("my plate")
+    assert len(json.loads(service.query_json(query))["results"]["bindings"]) == 1
+    service.query_json("EXPLAIN " + query)
+    assert json.loads(service.query_json("EXPLAIN " + query))["plan"]["rows"] == 1
+    assert len(service.result_cache) == 1
+
+
+def test_prepared_queries(source):
+    """ prepared queries are executed with parameter values, the results are cached per value
+    """
+    service = LabwareService([source], prepared_query_limit=1)
+    entry = next(generate_catalog(100)).definition
+    handle = service.prepare_query("SELECT ?x { ?x lw:productNumber ?number }", ["number"])
+    assert handle == service.prepare_query("select ?x {?x lw:productNumber ?number}", ["number"])
+    results = service.execute_prepared_batch(handle, [{"number": f"'{entry.product_number}'"}, {"number": "'none'"}])
+    assert [len(json.loads(result)["results"]["bindings"]) for result in results] == [1, 0]
+    service.execute_prepared(handle, {"number": f'"{entry.product_number}"'})
+    assert service.result_cache.hits == 1
+
+    with pytest.raises(BindingError):
+        service.execute_prepared(handle, {"vendor": "'ACME'"})
+    service.prepare_query("SELECT ?x { ?x lw:vendor ?vendor }", ["vendor"])
+    with pytest.raises(UnknownQueryHandleError):
+        service.execute_prepared(handle, {"number": "'none'"})
@@ -0,0 +1,74 @@
+#!/usr/bin/env python
+"""Tests for the `labop_labware_ontology` command line interface."""
+# pylint: disable=redefined-outer-name
+import io
+import json
+
+import pytest
+
+from labop_labware_ontology.__main__ import EXIT_INVALID, EXIT_NOT_FOUND, main
+from labop_labware_ontology.synthetic_catalog import generate_catalog, write_catalog
+
+
+@pytest.fixture
+def snapshot(tmp_path):
+    source = tmp_path / "catalog.nt"
+    with open(source, "w", encoding="utf-8") as stream:
+        write_catalog(stream, 200)
+    path = str(tmp_path / "catalog.snapshot")
+    assert main(["compile", str(source), "-o", path]) == 0
+    return path
+
+
+def test_lookup(snapshot, capsys, monkeypatch):
+    """ single lookups print the dimensions, batch lookups read tab separated keys from stdin
+    """
+    entry = next(generate_catalog(200)).definition
+    assert main(["lookup", snapshot, entry.vendor, entry.product_number]) == 0
+    assert json.loads(capsys.readouterr().out)["height"] == entry.dimensions["height"]
+    assert main(["lookup", snapshot, "nobody", "0"]) == EXIT_NOT_FOUND
+
+    monkeypatch.setattr("sys.stdin", io.StringIO(f"{entry.vendor}\t{entry.product_number}\n\nnobody\t0\n"))
+    capsys.readouterr()
+    assert main(["lookup", snapshot]) == EXIT_NOT_FOUND
+    lines = [line.split("\t") for line in capsys.readouterr().out.splitlines()]
+    assert [line[:2] for line in lines] == [[entry.vendor, entry.product_number], ["nobody", "0"]]
+    assert json.loads(lines[0][2])["height"] == entry.dimensions["height"] and lines[1][2] == "null"
+
+    # the lines before a malformed line are answered before the error is reported
+    monkeypatch.setattr("sys.stdin", io.StringIO(f"{entry.vendor}\t{entry.product_number}\nno tab\n"))
+    assert main(["lookup", snapshot]) == EXIT_INVALID
+    output = capsys.readouterr()
+    assert output.out.startswith(f"{entry.vendor}\t{entry.product_number}\t") and "line 2" in output.err
+
+
+def test_query(snapshot, capsys, monkeypatch):
+    """ queries are given as argument or on stdin, results as JSON or tab separated terms
+    """
+    assert main(["query", snapshot, "SELECT ?x { ?x a lw:Labware } LIMIT 2"]) == 0
+    assert len(json.loads(capsys.readouterr().out)["results"]["bindings"]) == 2
+    monkeypatch.setattr("sys.stdin", io.StringIO("SELECT ?x ?label { ?x a lw:Labware ; rdfs:label ?label } LIMIT 2"))
+    assert main(["query", snapshot, "--format", "tsv"]) == 0
+    lines = capsys.readouterr().out.splitlines()
+    assert lines[0] == "?x\t?label" and len(lines) == 3
+    capsys.readouterr()
+    assert main(["query", snapshot, "EXPLAIN SELECT ?x { ?x a lw:Labware } LIMIT 2", "-f", "tsv"]) == 0
+    assert json.loads(capsys.readouterr().out)["plan"]["rows"] == 2
+    assert main(["query", snapshot, "SELECT"]) == EXIT_INVALID
+    assert main(["query", snapshot, "SELECT * { ?s ?p ?o }", "--row-budget", "5"]) == EXIT_NOT_FOUND
+
+
+def test_stats(snapshot, capsys, tmp_path):
+    """ stats describe the snapshot, damaged snapshots are reported and not overwritten
+    """
+    assert main(["stats", snapshot]) == 0
+    stats = json.loads(capsys.readouterr().out)
+    assert stats["labware_keys"] == 200
+    assert sum(count for term, count in stats["instances_per_class"].items() if term.endswith("#Labware>")) == 200
+    assert stats["predicates"]["<http://www.w3id.org/labop/labware#vendor>"]["subjects"] == 200
+
+    damaged = tmp_path / "damaged.snapshot"
+    damaged.write_bytes(b"garbage")
+    assert main(["stats", str(damaged)]) == EXIT_INVALID
+    assert damaged.read_bytes() == b"garbage"
+    assert main(["stats", str(tmp_path / "missing.snapshot")]) == EXIT_INVALID
@@ -0,0 +1,45 @@
+#!/usr/bin/env python
+"""Tests for the metrics in the Prometheus text exposition format."""
+from urllib.request import urlopen
+
+from labop_labware_ontology.metrics import MetricsRegistry, serve_metrics
+
+
+def test_render():
+    """ counters, gauges (also computed) and histograms with labels
+    """
+    registry = MetricsRegistry()
+    calls = registry.counter("calls_total", "Calls", ("command",))
+    calls.inc("Lookup")
+    calls.inc("Lookup", amount=2)
+    registry.gauge("store_triples", "Triples", (), lambda: 42)
+    duration = registry.histogram("duration_seconds", "Duration", ("command",), buckets=(0.1, 1.0))
+    duration.observe(0.05, "Lookup")
+    duration.observe(0.5, "Lookup")
+    duration.observe(5.0, "Lookup")
+
+    assert calls.value("Lookup") == 3
+    assert duration.count("Lookup") == 3
+    lines = registry.render().splitlines()
+    assert "# TYPE calls_total counter" in lines
+    assert 'calls_total{command="Lookup"} 3' in lines
+    assert "store_triples 42" in lines
+    assert 'duration_seconds_bucket{command="Lookup",le="0.1"} 1' in lines
+    assert 'duration_seconds_bucket{command="Lookup",le="1"} 2' in lines
+    assert 'duration_seconds_bucket{command="Lookup",le="+Inf"} 3' in lines
+    assert 'duration_seconds_sum{command="Lookup"} 5.55' in lines
+    assert 'duration_seconds_count{command="Lookup"} 3' in lines
+
+
+def test_serve_metrics():
+    """ the metrics are served over HTTP
+    """
+    registry = MetricsRegistry()
+    registry.gauge("labels", "Label escaping", ("name",)).set(1, 'a "b"')
+    endpoint = serve_metrics(registry, "127.0.0.1", 0)
+    try:
+        with urlopen(f"http://127.0.0.1:{endpoint.server_address[1]}/metrics") as response:
+            assert response.headers["Content-Type"].startswith("text/plain; version=0.0.4")
+            assert 'labels{name="a \\"b\\""} 1' in response.read().decode()
+    finally:
+        endpoint.shutdown()
@@ -0,0 +1,127 @@
+#!/usr/bin/env python
+"""Tests for the query caches."""
+
+# pylint: disable=redefined-outer-name
+import pytest
+
+from labop_labware_ontology.namespaces import LABWARE, RDF, RDFS
+from labop_labware_ontology.query_cache import PlanCache, ResultCache, query_predicates
+from labop_labware_ontology.rdf_terms import iri, literal
+from labop_labware_ontology.sparql import QueryEngine, normalize_query, parse_query
+from labop_labware_ontology.triple_store import TripleStore
+
+
+def add_plates(store, first, count):
+    for index in range(first, first + count):
+        labware = iri(LABWARE.term(f"plate_{index}"))
+        store.add_all([(labware, iri(RDF.type), iri(LABWARE.Microplate)), (labware, iri(RDFS.label), literal(index))])
+
+
+@pytest.fixture
+def engine():
+    store = TripleStore()
+    add_plates(store, 0, 10)
+    return QueryEngine(store, plan_cache=PlanCache(max_size=2))
+
+
+def test_normalize_query():
+    """ whitespace, comments, keyword case, variable markers and prefixes do not change the normalized text
+    """
+    expected = normalize_query("SELECT ?x WHERE { ?x a lw:Microplate }")
+    assert normalize_query("select  $x\nwhere { ?x a lw:Microplate } # plates") == expected
+    assert normalize_query("PREFIX p: <http://www.w3id.org/labop/labware#> SELECT ?x WHERE { ?x a p:Microplate }") == (
+        expected
+    )
+    assert normalize_query(f"SELECT ?x WHERE {{ ?x a {iri(LABWARE.Microplate)} }}") == expected
+    assert normalize_query("SELECT ?x WHERE { ?x a lw:Microplate } LIMIT 1") != expected
+    assert normalize_query("SELECT ?x WHERE { ?x lw:p 'SELECT' }") != normalize_query(
+        "SELECT ?x WHERE { ?x lw:p 'select' }"
+    )
+
+
+def test_plan_cache(engine):
+    """ repeated and equivalent queries are answered with the cached plan, the least recently used plan is evicted
+    """
+    cache = engine.plan_cache
+    query = "SELECT ?x { ?x a lw:Microplate }"
+    assert len(list(engine.query(query))) == 10
+    assert (cache.hits, cache.misses) == (0, 1)
+    plan = engine.prepare(query)
+    assert engine.prepare("select ?x {?x a lw:Microplate}") is plan
+    assert (cache.hits, cache.misses) == (2, 1)
+    engine.query("ASK { ?x a lw:Microplate }")
+    engine.query("ASK { ?x a lw:Reservoir }")
+    assert len(cache) == 2 and engine.prepare(query) is not plan
+
+
+def test_plan_invalidation(engine):
+    """ plans are made again when an unknown constant may be known or the store grew materially
+    """
+    cache = engine.plan_cache
+    query = "SELECT ?x { ?x a lw:Reservoir }"
+    assert not list(engine.query(query))
+    engine.store.add(iri(LABWARE.term("reservoir")), iri(RDF.type), iri(LABWARE.Reservoir))
+    assert len(list(engine.query(query))) == 1
+    assert cache.invalidations == 1
+
+    plan = engine.prepare("SELECT ?x { ?x a lw:Microplate }")
+    add_plates(engine.store, 10, 1)
+    assert engine.prepare("SELECT ?x { ?x a lw:Microplate }") is plan
+    add_plates(engine.store, 11, 10)
+    assert engine.prepare("SELECT ?x { ?x a lw:Microplate }") is not plan
+    assert cache.invalidations == 2
+
+
+def test_query_predicates():
+    """ a query depends on the predicates of its patterns, on all with a variable predicate
+    """
+    assert query_predicates(parse_query("SELECT ?x { ?x a lw:Microplate ; rdfs:label ?l }")) == {
+        iri(RDF.type),
+        iri(RDFS.label),
+    }
+    assert query_predicates(parse_query("SELECT ?x { ?x a/rdfs:subClassOf* lw:Labware }")) == {
+        iri(RDF.type),
+        iri(RDFS.subClassOf),
+    }
+    assert query_predicates(parse_query("SELECT ?x { ?x ?p ?o }")) is None
+
+
+def test_result_cache_invalidation(engine):
+    """ results are dropped by writes of the predicates they depend on, versions are never mixed
+    """
+    store = engine.store
+    cache = ResultCache(store)
+    plates, labels = "SELECT ?x { ?x a lw:Microplate }", "SELECT * { ?x ?p ?o }"
+    version = store.version
+    for query in (plates, labels):
+        cache.put(query, version, "result", query_predicates(parse_query(query)), 0.01)
+    assert cache.get(plates, version) == "result" and len(cache) == 2
+
+    store.add(iri(LABWARE.term("plate_0")), iri(LABWARE.vendor), literal("Corning"))
+    assert cache.get(plates, store.version) == "result"
+    assert cache.get(labels, store.version) is None
+    add_plates(store, 10, 1)
+    assert cache.get(plates, store.version) is None
+    assert cache.invalidations == 2 and len(cache) == 0
+
+    # computed on an older version: a later write was not checked against it
+    cache.put(plates, version, "old", None, 0.01)
+    assert cache.get(plates, store.version) is None
+    cache.put(plates, store.version, "new", None, 0.01)
+    assert cache.get(plates, version) is None and cache.get(plates, store.version) == "new"
+
+
+def test_result_cache_eviction():
+    """ the cache stays within its size, cheap results per byte are evicted first
+    """
+    store = TripleStore()
+    cache = ResultCache(store, max_bytes=3000, max_entry_bytes=1500)
+    version = store.version
+    cache.put("big cheap", version, "x" * 1000, None, 0.001)
+    cache.put("small expensive", version, "x" * 100, None, 0.1)
+    cache.put("too big", version, "x" * 2000, None, 1.0)
+    assert cache.get("too big", version) is None
+    cache.put("another", version, "x" * 1000, None, 0.01)
+    cache.put("one more", version, "x" * 500, None, 0.01)
+    assert cache.bytes <= 3000 and cache.evictions == 1
+    assert cache.get("big cheap", version) is None and cache.get("small expensive", version) is not None
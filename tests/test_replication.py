@@ -0,0 +1,54 @@
+#!/usr/bin/env python
+"""Tests for the replication of a store to read replicas."""
+# pylint: disable=redefined-outer-name
+import pytest
+
+from labop_labware_ontology.labware import labware_iri
+from labop_labware_ontology.labware_batch import LabwareDefinition, create_labware_batch
+from labop_labware_ontology.labware_index import LabwareIndex
+from labop_labware_ontology.namespaces import LABWARE, RDF
+from labop_labware_ontology.rdf_terms import iri
+from labop_labware_ontology.replication import Replica, ReplicationPublisher
+from labop_labware_ontology.triple_store import TripleStore
+
+KEY = b"test key"
+
+
+def labware(name):
+    return labware_iri(name), iri(RDF.type), iri(LABWARE.Labware)
+
+
+@pytest.fixture
+def writer(tmp_path):
+    store = TripleStore()
+    labware_index = LabwareIndex(store)
+    store.add(*labware("plate"))
+
+    def handler(operation, args):
+        if operation == "fail":
+            raise ValueError("no such labware")
+        return create_labware_batch(store, labware_index, *args)
+
+    publisher = ReplicationPublisher(store, str(tmp_path / "writer.sock"), KEY, handler)
+    yield store, publisher
+    publisher.close()
+
+
+def test_replica_follows_writer(writer):
+    """ a replica gets the state of the writer and all later updates
+    """
+    store, publisher = writer
+    replica_store = TripleStore()
+    replica = Replica(replica_store, publisher.address, KEY)
+    assert labware("plate") in replica_store
+
+    # a forwarded write is applied locally when the call returns
+    results = replica.call("create_labware_batch", [LabwareDefinition("tube", "Sarstedt", "72.690")])
+    assert results == [None]
+    assert labware("tube") in store
+    assert labware("tube") in replica_store
+    assert replica_store.version.number > 0
+
+    with pytest.raises(ValueError, match="no such labware"):
+        replica.call("fail")
+    replica.close()
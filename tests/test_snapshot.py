@@ -0,0 +1,92 @@
+#!/usr/bin/env python
+"""Tests for the compiled ontology snapshot."""
+# pylint: disable=redefined-outer-name
+import pytest
+
+from labop_labware_ontology.labware import PRODUCT_NUMBER, VENDOR, labware_iri
+from labop_labware_ontology.namespaces import LABWARE, RDF
+from labop_labware_ontology.rdf_sources import SourceError, parse_ntriples, write_ntriples
+from labop_labware_ontology.rdf_terms import iri, literal
+from labop_labware_ontology.snapshot import SnapshotError, load_snapshot, open_snapshot, read_source_hash
+from labop_labware_ontology.sparql import QueryEngine
+
+TRIPLES = [
+    (labware_iri("plate 1"), iri(RDF.type), iri(LABWARE.Microplate)),
+    (labware_iri("plate 1"), VENDOR, literal("Greiner Bio-One")),
+    (labware_iri("plate 1"), PRODUCT_NUMBER, literal("655101")),
+    (labware_iri("plate 2"), iri(RDF.type), iri(LABWARE.Microplate)),
+    (labware_iri("plate 2"), iri(LABWARE.description), literal('96 wells, "flat"\nbottom', lang="EN")),
+]
+
+
+@pytest.fixture
+def source(tmp_path):
+    path = tmp_path / "labware.nt"
+    with open(path, "w", encoding="utf-8") as stream:
+        write_ntriples(TRIPLES, stream)
+    return str(path)
+
+
+def test_parse_ntriples():
+    """ terms are returned in canonical notation, invalid lines are reported
+    """
+    lines = [
+        "# comment",
+        '<http://ex.org/a> <http://ex.org/p> "x"^^<http://www.w3.org/2001/XMLSchema#string> .',
+        '<http://ex.org/a> <http://ex.org/p> "caf\\u00e9"@DE .',
+        "",
+    ]
+    assert list(parse_ntriples(lines)) == [
+        ("<http://ex.org/a>", "<http://ex.org/p>", '"x"'),
+        ("<http://ex.org/a>", "<http://ex.org/p>", '"café"@de'),
+    ]
+    with pytest.raises(SourceError):
+        list(parse_ntriples(["<http://ex.org/a> <http://ex.org/p> ."]))
+
+
+def test_snapshot_round_trip(source, tmp_path):
+    """ a loaded snapshot has the same triples, terms and labware index as the sources
+    """
+    path = str(tmp_path / "labware.snapshot")
+    compiled = open_snapshot([source], path)
+    loaded = load_snapshot(path)
+    assert loaded.source_hash == compiled.source_hash == read_source_hash(path)
+    assert loaded.store.compiled is not None
+    assert sorted(loaded.store.triples()) == sorted(TRIPLES)
+    assert loaded.labware_index.lookup("greiner bio-one", "655101") == loaded.store.term_id(labware_iri("plate 1"))
+    result = QueryEngine(loaded.store).query("SELECT ?x { ?x a lw:Microplate ; lw:vendor ?v }")
+    assert list(result.decoded()) == [{"x": labware_iri("plate 1")}]
+
+
+def test_add_to_loaded_snapshot(source, tmp_path):
+    """ triples added after loading go on top of the compiled indexes
+    """
+    path = str(tmp_path / "labware.snapshot")
+    open_snapshot([source], path)
+    snapshot = open_snapshot([source], path)
+    store = snapshot.store
+    assert not store.add(*TRIPLES[0])
+    assert store.add(labware_iri("plate 3"), VENDOR, literal("Corning"))
+    assert store.add(labware_iri("plate 3"), PRODUCT_NUMBER, literal("3596"))
+    assert len(store) == len(TRIPLES) + 2
+    assert snapshot.labware_index.lookup("Corning", "3596") == store.term_id(labware_iri("plate 3"))
+    assert len(list(store.triples(None, PRODUCT_NUMBER))) == 2
+
+
+def test_stale_and_damaged_snapshots(source, tmp_path):
+    """ a snapshot is recompiled if the sources changed or the file is no valid snapshot
+    """
+    path = str(tmp_path / "labware.snapshot")
+    first_hash = open_snapshot([source], path).source_hash
+    with open(source, "a", encoding="utf-8") as stream:
+        write_ntriples([(labware_iri("plate 3"), iri(RDF.type), iri(LABWARE.Microplate))], stream)
+    snapshot = open_snapshot([source], path)
+    assert snapshot.source_hash != first_hash
+    assert read_source_hash(path) == snapshot.source_hash
+    assert len(load_snapshot(path).store) == len(TRIPLES) + 1
+
+    with open(path, "r+b") as stream:
+        stream.write(b"garbage!")
+    with pytest.raises(SnapshotError):
+        load_snapshot(path)
+    assert len(open_snapshot([source], path).store) == len(TRIPLES) + 1
@@ -0,0 +1,235 @@
+#!/usr/bin/env python
+"""Tests for the SPARQL query engine."""
+
+# pylint: disable=redefined-outer-name
+import json
+
+import pytest
+
+from labop_labware_ontology.namespaces import LABWARE, RDF, RDFS
+from labop_labware_ontology.rdf_terms import iri, literal
+from labop_labware_ontology.sparql import (
+    BindingError,
+    QueryBudget,
+    QueryEngine,
+    QueryLimitExceeded,
+    SPARQLSyntaxError,
+    Variable,
+    parse_query,
+    parse_term,
+)
+from labop_labware_ontology.triple_store import TripleStore
+
+
+@pytest.fixture
+def engine():
+    store = TripleStore()
+    for index, (vendor, wells) in enumerate([("Greiner", 96), ("Greiner", 384), ("Corning", 96)]):
+        labware = iri(LABWARE.term(f"plate_{index}"))
+        store.add(labware, iri(RDF.type), iri(LABWARE.Microplate))
+        store.add(labware, iri(RDFS.label), literal(f"plate {index}"))
+        store.add(labware, iri(LABWARE.vendor), literal(vendor))
+        store.add(labware, iri(LABWARE.wellCount), literal(wells))
+    return QueryEngine(store)
+
+
+def test_parse_query():
+    """ prefixes, 'a', ';' and ',' are expanded into triple patterns
+    """
+    query = parse_query(
+        "PREFIX ex: <http://example.org/> SELECT DISTINCT ?x WHERE { ?x a ex:A ; ex:p 1, 'b'@en . } LIMIT 5 OFFSET 2"
+    )
+    assert query.form == "SELECT" and query.distinct and query.limit == 5 and query.offset == 2
+    assert query.variables == [Variable("x")]
+    assert [pattern.object for pattern in query.patterns] == [
+        "<http://example.org/A>",
+        literal(1),
+        literal("b", lang="en"),
+    ]
+
+
+@pytest.mark.parametrize(
+    "text",
+    [
+        "SELECT ?x",
+        "SELECT ?x { ?x unknown:p ?y }",
+        "SELECT ?x { ?x ?p }",
+        "DESCRIBE ?x",
+        "SELECT ?x { ?x rdfs:label* ?y }",
+        "SELECT ?x { ?x a/rdfs:label ?y }",
+    ],
+)
+def test_syntax_errors(text):
+    """ invalid or unsupported queries raise a SPARQLSyntaxError
+    """
+    with pytest.raises(SPARQLSyntaxError):
+        parse_query(text)
+
+
+def test_basic_graph_pattern(engine):
+    """ joins bind variables across patterns
+    """
+    result = engine.query("SELECT ?label WHERE { ?x lw:vendor 'Greiner' ; lw:wellCount 384 ; rdfs:label ?label }")
+    assert list(result.decoded()) == [{"label": literal("plate 1")}]
+
+
+def test_distinct_limit_and_ask(engine):
+    """ solution modifiers and ASK queries
+    """
+    assert len(list(engine.query("SELECT DISTINCT ?v { ?x lw:vendor ?v }"))) == 2
+    assert len(list(engine.query("SELECT ?x { ?x a lw:Microplate } LIMIT 2"))) == 2
+    assert len(list(engine.query("SELECT ?x { ?x a lw:Microplate } OFFSET 2"))) == 1
+    assert json.loads(engine.query("ASK { ?x lw:wellCount 384 }").to_json()) == {"head": {}, "boolean": True}
+    assert json.loads(engine.query("ASK { ?x lw:wellCount 1536 }").to_json())["boolean"] is False
+
+
+def test_unknown_constant_gives_empty_result(engine):
+    """ a constant that is not in the store cannot match
+    """
+    result = json.loads(engine.query("SELECT ?x { ?x lw:vendor 'Eppendorf' }").to_json())
+    assert result == {"head": {"vars": ["x"]}, "results": {"bindings": []}}
+
+
+def test_json_results(engine):
+    """ results are serialized in the SPARQL 1.1 JSON format
+    """
+    result = json.loads(engine.query("SELECT * { lw:plate_2 lw:vendor ?v ; lw:wellCount ?n }").to_json())
+    assert result["head"]["vars"] == ["v", "n"]
+    assert result["results"]["bindings"] == [
+        {
+            "v": {"type": "literal", "value": "Corning"},
+            "n": {"type": "literal", "value": "96", "datatype": "http://www.w3.org/2001/XMLSchema#integer"},
+        }
+    ]
+
+
+def test_json_chunks(engine):
+    """ results are split into JSON documents, rows are only evaluated as far as the chunks are consumed
+    """
+    evaluated = []
+    result = engine.query("SELECT ?x ?n { ?x lw:wellCount ?n }")
+    result.rows = (evaluated.append(row) or row for row in result.rows)
+    chunks = result.json_chunks(chunk_size=2)
+    first = json.loads(next(chunks))
+    assert first["head"]["vars"] == ["x", "n"] and len(first["results"]["bindings"]) == 2
+    assert len(evaluated) == 2
+    assert [len(json.loads(chunk)["results"]["bindings"]) for chunk in chunks] == [1]
+    empty = list(engine.query("SELECT ?x { ?x lw:wellCount 1536 }").json_chunks())
+    assert [json.loads(chunk)["results"]["bindings"] for chunk in empty] == [[]]
+    assert json.loads(next(engine.query("ASK { ?x lw:vendor 'Corning' }").json_chunks()))["boolean"] is True
+
+
+def test_query_budget(monkeypatch, engine):
+    """ a query exceeding its budget, deadline or being cancelled is aborted while its result is consumed
+    """
+    monkeypatch.setattr(QueryBudget, "CHECK_INTERVAL", 2)
+    everything = "SELECT * WHERE { ?s ?p ?o . ?x ?q ?o }"
+    with pytest.raises(QueryLimitExceeded, match="budget of 10"):
+        engine.query(everything, QueryBudget(max_rows=10)).to_json()
+    with pytest.raises(QueryLimitExceeded, match="time limit"):
+        engine.query(everything, QueryBudget(timeout=-1)).to_json()
+
+    budget = QueryBudget()
+    rows = iter(engine.query(everything, budget))
+    next(rows)
+    budget.cancel()
+    with pytest.raises(QueryLimitExceeded, match="cancelled"):
+        list(rows)
+
+    # within the limits
+    result = engine.query("SELECT ?x WHERE { ?x lw:wellCount 96 }", QueryBudget(timeout=60, max_rows=100))
+    assert len(list(result)) == 2
+
+
+def test_parameters(engine):
+    """ parameters are bound to single terms on execution, unknown terms give empty results
+    """
+    plan = engine.prepare(
+        "SELECT ?label { ?x lw:vendor ?vendor ; lw:wellCount ?wells ; rdfs:label ?label }",
+        parameters=["vendor", "wells"],
+    )
+    values = engine.bind(plan, {"vendor": "'Greiner'", "wells": "384"})
+    assert list(engine.execute(plan, values=values).decoded()) == [{"label": literal("plate 1")}]
+    values = engine.bind(plan, {"vendor": '"Eppendorf"', "wells": "96"})
+    assert list(engine.execute(plan, values=values)) == []
+
+    for bindings in (
+        {"vendor": "'Greiner'"},
+        {"vendor": "'Greiner'", "wells": "96", "x": "1"},
+        {"vendor": "'Greiner' } UNION { ?x ?p ?o", "wells": "96"},
+        {"vendor": "?y", "wells": "96"},
+    ):
+        with pytest.raises(BindingError):
+            engine.bind(plan, bindings)
+    with pytest.raises(BindingError):
+        engine.execute(plan)
+    with pytest.raises(SPARQLSyntaxError):
+        engine.prepare("SELECT ?x { ?x lw:vendor 'Greiner' }", parameters=["vendor"])
+
+
+def test_parse_term():
+    """ single IRIs and literals in SPARQL notation are parsed into N-Triples notation
+    """
+    assert parse_term("lw:Microplate") == iri(LABWARE.Microplate)
+    assert parse_term("96") == literal(96)
+    assert parse_term('"plate"@en') == literal("plate", lang="en")
+    with pytest.raises(SPARQLSyntaxError):
+        parse_term("lw:Microplate lw:TipRack")
+
+
+def test_join_order(engine):
+    """ the most selective pattern is joined first, many solutions joined on a variable use a hash join
+    """
+    plan = engine.prepare("SELECT ?x { ?x a lw:Microplate ; lw:vendor 'Corning' }")
+    assert [step.pattern.object for step in plan.steps] == [literal("Corning"), iri(LABWARE.Microplate)]
+
+    store = TripleStore()
+    for index in range(40):
+        store.add(iri(LABWARE.term(f"plate_{index}")), iri(LABWARE.vendor), literal(f"vendor {index % 2}"))
+    engine = QueryEngine(store)
+    plan = engine.prepare("SELECT ?x ?y { ?x lw:vendor ?v . ?y lw:vendor ?v }")
+    assert [step.method for step in plan.steps] == ["index", "hash"]
+    assert len(list(engine.execute(plan))) == 2 * 20 * 20
+
+
+def test_explain(engine):
+    """ EXPLAIN gives the join steps with estimated and actual cardinalities
+    """
+    result = json.loads(engine.query("EXPLAIN SELECT ?x { ?x a lw:Microplate ; lw:vendor 'Greiner' }").to_json())
+    steps = result["plan"]["steps"]
+    assert [step["actual"] for step in steps] == [2, 2] and result["plan"]["rows"] == 2
+    assert steps[0]["pattern"] == f"?x {iri(LABWARE.vendor)} {literal('Greiner')}" and steps[0]["join"] == "index"
+    assert steps[0]["estimated"] == 2.0
+    assert not parse_query("SELECT ?x { ?x a lw:Microplate }").explain
+
+
+def test_subclass_paths(engine):
+    """ subClassOf paths give the subclasses, superclasses and instances of classes through the whole hierarchy
+    """
+    store = engine.store
+    store.add(iri(LABWARE.Microplate), iri(RDFS.subClassOf), iri(LABWARE.Labware))
+    store.add(iri(LABWARE.DeepWellPlate), iri(RDFS.subClassOf), iri(LABWARE.Microplate))
+    store.add(iri(LABWARE.term("deep well plate")), iri(RDF.type), iri(LABWARE.DeepWellPlate))
+
+    def values(text):
+        return sorted(value for row in engine.query(text).decoded() for value in row.values())
+
+    assert values("SELECT ?c { ?c rdfs:subClassOf* lw:Microplate }") == [
+        iri(LABWARE.DeepWellPlate),
+        iri(LABWARE.Microplate),
+    ]
+    assert values("SELECT ?c { lw:DeepWellPlate rdfs:subClassOf+ ?c }") == [
+        iri(LABWARE.Labware),
+        iri(LABWARE.Microplate),
+    ]
+    assert len(values("SELECT ?x { ?x a/rdfs:subClassOf* lw:Labware }")) == 4
+    assert values("SELECT ?x { ?x a/rdfs:subClassOf+ lw:Microplate }") == [iri(LABWARE.term("deep well plate"))]
+    assert values("SELECT ?v { ?x a/rdfs:subClassOf* lw:Microplate ; lw:vendor ?v . ?x lw:wellCount 384 }") == [
+        literal("Greiner")
+    ]
+    assert json.loads(engine.query("ASK { lw:DeepWellPlate rdfs:subClassOf* lw:Labware }").to_json())["boolean"]
+    assert not json.loads(engine.query("ASK { lw:Labware rdfs:subClassOf+ lw:Labware }").to_json())["boolean"]
+
+    # classes added later are in the closure index
+    store.add(iri(LABWARE.term("SBSPlate")), iri(RDFS.subClassOf), iri(LABWARE.DeepWellPlate))
+    assert len(values("SELECT ?c { ?c rdfs:subClassOf+ lw:Labware }")) == 3
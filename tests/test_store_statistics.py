@@ -0,0 +1,46 @@
+#!/usr/bin/env python
+"""Tests for the store statistics of the query planner."""
+
+from collections import Counter
+
+from labop_labware_ontology.namespaces import LABWARE, RDFS
+from labop_labware_ontology.rdf_terms import iri, literal
+from labop_labware_ontology.snapshot import compile_snapshot
+from labop_labware_ontology.store_statistics import StoreStatistics
+from labop_labware_ontology.synthetic_catalog import write_catalog
+from labop_labware_ontology.triple_store import TripleStore
+
+
+def test_statistics_of_compiled_store(tmp_path):
+    """ predicate counts and characteristic sets describe the compiled base and the added triples
+    """
+    source = tmp_path / "catalog.nt"
+    with open(source, "w", encoding="utf-8") as stream:
+        write_catalog(stream, 100)
+    store = compile_snapshot([str(source)], str(tmp_path / "catalog.snapshot")).store
+    statistics = StoreStatistics(store).collect()
+
+    triples = Counter(p for _, p, _ in store.match())
+    assert {p: stats.triples for p, stats in statistics.predicates.items()} == triples
+    vendor = store.term_id(iri(LABWARE.vendor))
+    assert statistics.predicate(vendor).subjects == 100
+    assert statistics.predicate(vendor).objects == len({o for _, _, o in store.match(None, vendor, None)})
+    subjects, per_subject = statistics.star([vendor, store.term_id(iri(LABWARE.productNumber))])
+    assert subjects == 100 and per_subject[vendor] == 1.0
+
+    # maintained on writes like collected from scratch
+    labware = iri(LABWARE.term("new plate"))
+    store.add_all([(labware, iri(RDFS.label), literal("new plate")), (labware, iri(LABWARE.vendor), literal("ACME"))])
+    store.add(labware, iri(RDFS.label), literal("new plate, again"))
+    fresh = StoreStatistics(store).collect()
+    assert statistics.predicates == fresh.predicates
+    assert statistics.characteristic_sets == fresh.characteristic_sets
+    assert statistics.subjects == fresh.subjects
+
+
+def test_statistics_of_empty_store():
+    """ unknown predicates have no triples, a star of them no subjects
+    """
+    statistics = StoreStatistics(TripleStore())
+    assert statistics.predicate(1).triples == 0
+    assert statistics.star([1, 2]) == (0.0, {1: 0.0, 2: 0.0})
@@ -0,0 +1,35 @@
+#!/usr/bin/env python
+"""Tests for the synthetic labware catalogs."""
+from io import StringIO
+
+from labop_labware_ontology.labware_batch import create_labware_batch
+from labop_labware_ontology.labware_index import LabwareIndex
+from labop_labware_ontology.rdf_sources import parse_ntriples
+from labop_labware_ontology.sparql import QueryEngine
+from labop_labware_ontology.synthetic_catalog import generate_catalog, write_catalog
+from labop_labware_ontology.triple_store import TripleStore
+
+
+def test_catalog_is_deterministic():
+    """ the same size and seed give the same catalog, all entries can be created
+    """
+    catalog = list(generate_catalog(500))
+    assert catalog == list(generate_catalog(500))
+    assert catalog != list(generate_catalog(500, seed=1))
+    assert catalog[:100] == list(generate_catalog(100))
+
+    store = TripleStore()
+    assert create_labware_batch(store, LabwareIndex(store), [entry.definition for entry in catalog]) == [None] * 500
+
+
+def test_write_catalog():
+    """ the N-Triples of a catalog include the classes of the labware and their hierarchy
+    """
+    stream = StringIO()
+    count = write_catalog(stream, 200)
+    store = TripleStore()
+    store.add_all(parse_ntriples(stream.getvalue().splitlines()))
+    assert len(store) == count
+    engine = QueryEngine(store)
+    assert len(list(engine.query("SELECT ?x { ?x a lw:Labware }"))) == 200
+    assert len(list(engine.query("SELECT DISTINCT ?c { ?x a ?c . ?c rdfs:subClassOf lw:Tube }"))) == 2
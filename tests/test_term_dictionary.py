@@ -0,0 +1,31 @@
+#!/usr/bin/env python
+"""Tests for the term dictionary."""
+from labop_labware_ontology.namespaces import LABWARE, RDF
+from labop_labware_ontology.rdf_terms import iri, literal
+from labop_labware_ontology.term_dictionary import TermDictionary
+from labop_labware_ontology.triple_store import TripleStore
+
+
+def test_encode_decode():
+    """ terms get consecutive IDs and are interned once
+    """
+    dictionary = TermDictionary()
+    plate = iri(LABWARE.Microplate)
+    assert dictionary.encode(plate) == 0
+    assert dictionary.encode(literal(96)) == 1
+    assert dictionary.encode("".join(["<", LABWARE.Microplate, ">"])) == 0
+    assert dictionary.decode(0) is dictionary.decode(dictionary.encode(plate))
+    assert dictionary.lookup(literal("96")) is None
+    assert len(dictionary) == 2
+    assert dictionary.decode_many([1, 0]) == [literal(96), plate]
+
+
+def test_shared_dictionary():
+    """ stores share the IDs of a common dictionary
+    """
+    dictionary = TermDictionary()
+    first, second = TripleStore(dictionary), TripleStore(dictionary)
+    first.add(iri(LABWARE.plate_1), iri(RDF.type), iri(LABWARE.Microplate))
+    second.add(iri(LABWARE.plate_2), iri(RDF.type), iri(LABWARE.Microplate))
+    assert first.term_id(iri(LABWARE.Microplate)) == second.term_id(iri(LABWARE.Microplate))
+    assert len(dictionary) == 4
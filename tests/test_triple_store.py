@@ -0,0 +1,94 @@
+#!/usr/bin/env python
+"""Tests for the indexed triple store."""
+# pylint: disable=redefined-outer-name
+import threading
+
+import pytest
+
+from labop_labware_ontology.namespaces import LABWARE, RDF
+from labop_labware_ontology.rdf_terms import iri, literal
+from labop_labware_ontology.triple_store import TripleStore
+
+TYPE = iri(RDF.type)
+PLATE = iri(LABWARE.Microplate)
+WELL_COUNT = iri(LABWARE.wellCount)
+
+
+@pytest.fixture
+def store():
+    store = TripleStore()
+    for index in range(10):
+        labware = iri(LABWARE.term(f"plate_{index}"))
+        store.add(labware, TYPE, PLATE)
+        store.add(labware, WELL_COUNT, literal(96 if index % 2 else 384))
+    return store
+
+
+def test_add_is_idempotent(store):
+    """ adding a triple twice stores it once
+    """
+    assert len(store) == 20
+    assert not store.add(iri(LABWARE.plate_0), TYPE, PLATE)
+    assert len(store) == 20
+
+
+def test_match_all_patterns(store):
+    """ every combination of bound positions is answered by the indexes
+    """
+    s, p, o = (store.term_id(term) for term in (iri(LABWARE.plate_1), WELL_COUNT, literal(96)))
+    assert list(store.match(s, p, o)) == [(s, p, o)]
+    assert list(store.match(s, p, None)) == [(s, p, o)]
+    assert list(store.match(s, None, o)) == [(s, p, o)]
+    assert len(list(store.match(None, p, o))) == 5
+    assert len(list(store.match(s, None, None))) == 2
+    assert len(list(store.match(None, p, None))) == 10
+    assert len(list(store.match(None, None, o))) == 5
+    assert len(list(store.match())) == 20
+    assert store.count(None, p, o) == 5
+    assert store.count() == 20
+
+
+def test_triples_with_terms(store):
+    """ patterns of terms are decoded from and to N-Triples notation
+    """
+    assert (iri(LABWARE.plate_2), WELL_COUNT, literal(384)) in store
+    assert set(store.triples(iri(LABWARE.plate_2), WELL_COUNT)) == {(iri(LABWARE.plate_2), WELL_COUNT, literal(384))}
+    assert list(store.triples(iri(LABWARE.unknown))) == []
+
+
+def test_pinned_version(store):
+    """ a pinned version is not changed by later updates, segments stay logarithmic
+    """
+    version = store.version
+    store.add(iri(LABWARE.plate_10), TYPE, PLATE)
+    assert len(version) == 20 and len(store) == 21
+    assert (iri(LABWARE.plate_10), TYPE, PLATE) not in version
+    assert store.version.number == version.number + 1
+    for index in range(11, 1000):
+        store.add(iri(LABWARE.term(f"plate_{index}")), TYPE, PLATE)
+    assert len(store.version.segments) <= 11
+    assert store.count(None, store.term_id(TYPE), store.term_id(PLATE)) == 1000
+
+
+def test_readers_during_writes(store):
+    """ readers iterate a consistent version while a writer adds triples
+    """
+    errors = []
+
+    def write():
+        for index in range(10, 2000):
+            store.add_all([(iri(LABWARE.term(f"plate_{index}")), TYPE, PLATE)] * 2)
+
+    writer = threading.Thread(target=write)
+    writer.start()
+    type_id, plate_id = store.term_id(TYPE), store.term_id(PLATE)
+    while writer.is_alive():
+        version = store.version
+        try:
+            if sum(1 for _ in version.match(None, type_id, plate_id)) != version.count(None, type_id, plate_id):
+                errors.append(version.number)
+        except RuntimeError as error:
+            errors.append(error)
+    writer.join()
+    assert not errors
+    assert len(store) == 2000 + 10
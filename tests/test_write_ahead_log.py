@@ -0,0 +1,118 @@
+#!/usr/bin/env python
+"""Tests for the write-ahead log and its checkpoints."""
+# pylint: disable=redefined-outer-name
+import os
+import threading
+import time
+
+import pytest
+
+from labop_labware_ontology.labware import labware_iri
+from labop_labware_ontology.labware_batch import LabwareDefinition, create_labware_batch
+from labop_labware_ontology.namespaces import LABWARE, RDF
+from labop_labware_ontology.rdf_sources import write_ntriples
+from labop_labware_ontology.rdf_terms import iri
+from labop_labware_ontology.snapshot import checkpoint_snapshot, open_snapshot
+from labop_labware_ontology.triple_store import TripleStore
+from labop_labware_ontology.write_ahead_log import WALError, WriteAheadLog, replay_log
+
+
+def labware(name):
+    return labware_iri(name), iri(RDF.type), iri(LABWARE.Labware)
+
+
+@pytest.fixture
+def source(tmp_path):
+    path = str(tmp_path / "labware.nt")
+    with open(path, "w", encoding="utf-8") as stream:
+        write_ntriples([labware("plate")], stream)
+    return path
+
+
+def test_replay(tmp_path):
+    """ store updates are logged as records and replayed into a new store
+    """
+    path = str(tmp_path / "labware.wal")
+    store = TripleStore()
+    log = WriteAheadLog(path, sync=False)
+    log.attach(store)
+    store.add(*labware("plate"))
+    store.add_all([labware("tube"), labware("rack")])
+    log.close()
+
+    log = WriteAheadLog(path)
+    assert log.last_lsn == 2
+    assert [lsn for lsn, _ in log.records()] == [1, 2]
+    replayed = TripleStore()
+    assert replay_log(replayed, log, after_lsn=1) == 2
+    assert sorted(replayed.triples()) == sorted([labware("tube"), labware("rack")])
+
+
+def test_torn_record_is_discarded(tmp_path):
+    """ an incomplete last record (crash during the write) is cut off
+    """
+    path = str(tmp_path / "labware.wal")
+    log = WriteAheadLog(path)
+    log.append([labware("plate")])
+    log.append([labware("tube")])
+    log.close()
+    with open(path, "r+b") as stream:
+        stream.truncate(os.path.getsize(path) - 3)
+    log = WriteAheadLog(path)
+    assert [triples for _, triples in log.records()] == [[labware("plate")]]
+    assert log.append([labware("rack")]) == 2
+    log.close()
+    with open(path, "wb") as stream:
+        stream.write(b"no log")
+    with pytest.raises(WALError):
+        WriteAheadLog(path)
+
+
+def test_group_commit(tmp_path, monkeypatch):
+    """ concurrent writers share flushes
+    """
+    flushes = []
+    monkeypatch.setattr(os, "fsync", lambda fd: flushes.append(fd) or time.sleep(0.002))
+    log = WriteAheadLog(str(tmp_path / "labware.wal"))
+    flushes.clear()
+
+    def write(index):
+        for number in range(20):
+            log.sync(log.append([labware(f"plate {index} {number}")]))
+
+    threads = [threading.Thread(target=write, args=(index,)) for index in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert log.durable_lsn == log.last_lsn == 160
+    assert len(flushes) < 100
+    assert len(list(log.records())) == 160
+
+
+def test_checkpoint(source, tmp_path):
+    """ after a checkpoint only the log tail is replayed, created labware survives changed sources
+    """
+    snapshot_path, log_path = str(tmp_path / "labware.snapshot"), str(tmp_path / "labware.wal")
+    snapshot = open_snapshot([source], snapshot_path)
+    log = WriteAheadLog(log_path, after_lsn=snapshot.wal_lsn)
+    log.attach(snapshot.store)
+    create_labware_batch(snapshot.store, snapshot.labware_index, [LabwareDefinition("tube", "Sarstedt", "72.690")])
+    checkpoint_snapshot(snapshot_path, snapshot, log.last_lsn)
+    log.truncate(log.last_lsn)
+    snapshot.store.add(*labware("rack"))
+    log.close()
+
+    snapshot = open_snapshot([source], snapshot_path)
+    log = WriteAheadLog(log_path, after_lsn=snapshot.wal_lsn)
+    assert snapshot.wal_lsn == 1 and [lsn for lsn, _ in log.records()] == [2]
+    assert snapshot.labware_index.lookup("sarstedt", "72.690") == snapshot.store.term_id(labware_iri("tube"))
+    replay_log(snapshot.store, log, snapshot.wal_lsn)
+    assert labware("rack") in snapshot.store
+
+    with open(source, "a", encoding="utf-8") as stream:
+        write_ntriples([labware("lid")], stream)
+    snapshot = open_snapshot([source], snapshot_path)
+    assert snapshot.wal_lsn == 1
+    assert labware("lid") in snapshot.store and labware("tube") in snapshot.store
+    assert snapshot.labware_index.lookup("sarstedt", "72.690") is not None